@@ -1,24 +1,36 @@
 import os
+import atexit
 from pathlib import Path
 from flask import Flask
-from joblib import load
 from dotenv import load_dotenv
 
 # ===== CARGAR VARIABLES DE ENTORNO =====
 load_dotenv()
 
 # ===== IMPORTAR CONFIGURACIÓN =====
-from config import BASE_DIR, MODEL_PATH, SECRET_KEY, DEBUG
+from config import (
+    BASE_DIR, SECRET_KEY, DEBUG,
+    INFERENCIA_VENTANA_MS, INFERENCIA_MAX_FILAS, SOMBRA_MODELOS,
+)
 
 # ===== IMPORTAR BASES DE DATOS =====
 from database.db import init_db
 from database.usuarios import init_db as init_db_usuarios
+from database.escritor import escritor
+from database.agregados import inicializar as inicializar_agregados
+from database.recientes import recientes
+from database.eventos import canal
 
 # ===== IMPORTAR BLUEPRINTS =====
 from routes.auth import auth
-from routes.predicciones import predicciones, set_model
+from routes.predicciones import predicciones, get_model, set_despachador
 from routes.api import api
 
+# ===== IMPORTAR INFERENCIA =====
+from inferencia.registro import registro
+from inferencia.despachador import DespachadorInferencia
+from inferencia.sombra import sombra
+
 # ===== IMPORTAR SENSOR =====
 from sensor.simulador import iniciar_simulador_sensores
 
@@ -30,12 +42,30 @@ app.secret_key = SECRET_KEY
 # ===== INICIALIZAR BASES DE DATOS =====
 init_db()
 init_db_usuarios()
+inicializar_agregados()  # reconstrucción única si la tabla de agregados es nueva
+
+# ===== ESCRITURA DIFERIDA DE PREDICCIONES =====
+recientes.sembrar()  # últimas predicciones en memoria para /api/ultimo e /api/historico
+escritor.al_guardar(recientes.agregar)
+recientes.al_agregar(canal.publicar)  # /api/stream
+escritor.iniciar()
+atexit.register(escritor.detener)  # guardar lo pendiente al apagar
 
 # ===== CARGAR MODELO ML =====
-if not MODEL_PATH.exists():
-    raise FileNotFoundError(f"Modelo no encontrado en: {MODEL_PATH}")
-model = load(MODEL_PATH)
-set_model(model)  # Establecer el modelo globalmente en el blueprint
+registro.cargar()  # único dueño del modelo en memoria (web + simulador)
+registro.iniciar_vigilancia()  # recarga en caliente al reentrenar
+
+# ===== DESPACHADOR DE INFERENCIA =====
+despachador = DespachadorInferencia(
+    get_model, ventana_ms=INFERENCIA_VENTANA_MS, max_filas=INFERENCIA_MAX_FILAS
+)
+despachador.iniciar()
+set_despachador(despachador)
+
+# ===== MODELOS SOMBRA =====
+for ruta in SOMBRA_MODELOS:
+    ruta = Path(ruta.strip())
+    sombra.registrar_desde_archivo(ruta if ruta.is_absolute() else BASE_DIR / ruta)
 
 # ===== REGISTRAR BLUEPRINTS =====
 app.register_blueprint(auth)
@@ -45,5 +75,5 @@ app.register_blueprint(api)
 
 # ===== MAIN =====
 if __name__ == "__main__":
-    iniciar_simulador_sensores()
+    iniciar_simulador_sensores(despachador)
     app.run(debug=DEBUG)
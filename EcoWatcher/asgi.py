@@ -0,0 +1,139 @@
+"""
+Despliegue ASGI opcional para el polling del dashboard.
+
+`/api/ultimo` y `/api/historico` se sirven con handlers asíncronos sobre un
+motor aiosqlite: mientras una consulta espera a SQLite el worker sigue
+atendiendo otras conexiones, en lugar de quedar bloqueado como un worker
+WSGI síncrono. `/api/stream` (SSE) mantiene cada cliente como una cola del
+event loop en lugar de un hilo; por eso el dashboard solo usa el stream
+cuando lo sirve esta app (`STREAM_SSE`) y bajo WSGI hace polling.
+
+Las consultas son las mismas de `database/lecturas.py` y las respuestas
+son idénticas a las de Flask; igual que en Flask, lo que cae en
+la ventana de `database/recientes.py` se responde desde memoria. El buffer
+es síncrono (su lock y la resiembra cuando otro proceso escribió consultan
+SQLite), así que se llama desde el threadpool y no bloquea el event loop.
+
+El resto (HTML, auth, predicción, /api/*) sigue siendo la app Flask,
+montada como WSGI dentro del mismo servidor.
+
+Dependencias opcionales: starlette, uvicorn, aiosqlite, sqlalchemy[asyncio]
+(a2wsgi si está instalado; si no, el adaptador WSGI de starlette).
+
+Uso (desde la carpeta EcoWatcher):
+    uvicorn asgi:app --workers 4 --port 8000
+"""
+import os
+import asyncio
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Mount, Route
+
+try:
+    from a2wsgi import WSGIMiddleware
+except ImportError:
+    from starlette.middleware.wsgi import WSGIMiddleware
+
+from app import app as flask_app
+from database.db import DB_PATH
+from database.sqlite import crear_motor_async
+from database.archivo import INDICE_PATH
+from database.recientes import recientes
+from database.eventos import canal, SuscripcionAsync, evento_prediccion, formato_sse, COMENTARIO_SSE
+from database.lecturas import (
+    consulta_historico, parametros_historico, respuesta_historico, respuesta_ultimo,
+    ERROR_PARAMETROS_HISTORICO,
+)
+from config import SSE_HEARTBEAT_S
+from utils.json_rapido import dumps
+
+engine_async = crear_motor_async(DB_PATH)
+
+# dashboard.js abre el EventSource solo con este flag; bajo WSGI hace polling
+flask_app.config["STREAM_SSE"] = True
+
+
+def _json(obj, status=200):
+    return Response(dumps(obj), status_code=status, media_type="application/json")
+
+
+async def _completar(funcion, *args):
+    # Leer el archivo columnar es E/S bloqueante: solo entonces se pasa a un hilo
+    if os.path.exists(INDICE_PATH):
+        return await run_in_threadpool(funcion, *args)
+    return funcion(*args)
+
+
+# ===== RUTAS ASÍNCRONAS =====
+async def historico(request):
+    try:
+        parametros = parametros_historico(request.query_params)
+    except ValueError:
+        return _json({"error": ERROR_PARAMETROS_HISTORICO}, 400)
+
+    limit, antes, despues, desde, hasta = parametros
+    rows = None
+    if desde is None and hasta is None:
+        rows = await run_in_threadpool(recientes.historico, limit, antes, despues)
+    if rows is None:
+        async with engine_async.connect() as conexion:
+            rows = (await conexion.execute(consulta_historico(*parametros))).all()
+    return _json(await _completar(respuesta_historico, rows, *parametros))
+
+
+async def ultimo(request):
+    fila = await run_in_threadpool(recientes.ultimo)
+    return _json(await _completar(respuesta_ultimo, fila))
+
+
+async def stream(request):
+    # Cada cliente es una cola en el event loop, no un hilo ni un worker
+    suscripcion = SuscripcionAsync(asyncio.get_running_loop())
+    canal.suscribir(suscripcion.entregar)
+
+    async def generar():
+        try:
+            actual = await run_in_threadpool(recientes.ultimo_y_anterior)
+            if actual is None:
+                yield formato_sse({"status": "sin_datos"}, tipo="sin_datos")
+            else:
+                yield formato_sse(evento_prediccion(*actual))
+
+            while not suscripcion.desbordada:
+                try:
+                    evento = await asyncio.wait_for(suscripcion.cola.get(), SSE_HEARTBEAT_S)
+                except asyncio.TimeoutError:
+                    await run_in_threadpool(recientes.revisar)  # escrituras de otros procesos
+                    yield COMENTARIO_SSE
+                    continue
+                yield formato_sse(evento)
+            canal.registrar_desborde()
+        finally:
+            canal.cancelar(suscripcion.entregar)
+
+    return StreamingResponse(
+        generar(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@asynccontextmanager
+async def ciclo_de_vida(_app):
+    yield
+    await engine_async.dispose()
+
+
+# ===== APP =====
+app = Starlette(
+    routes=[
+        Route("/api/historico", historico),
+        Route("/api/ultimo", ultimo),
+        Route("/api/stream", stream),
+        Mount("/", app=WSGIMiddleware(flask_app)),
+    ],
+    lifespan=ciclo_de_vida,
+)
@@ -0,0 +1,118 @@
+"""
+Benchmark del camino de lectura del histórico: ORM completo vs liviano.
+
+- actual:  db.query(Prediccion) con las 10 columnas, strftime por fila y json
+- liviano: consulta Core de 3 columnas, timestamp formateado en SQLite y
+           serialización con orjson (si está instalado)
+
+Cada tamaño usa una base temporal con N filas y se piden las N filas, que es
+el peor caso de un `limit` grande. Se reporta el mejor tiempo de varias
+rondas y el pico de memoria de Python (tracemalloc) de una ronda.
+
+Uso (desde la carpeta EcoWatcher):
+    python benchmarks/benchmark_historico.py --tamanos 10000,100000,1000000
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from config import FEATURE_ORDER
+from database.db import Base
+from database.modelodb import Prediccion
+from database.sqlite import crear_motor
+from database.lecturas import leer_historico, como_dicts
+from utils.json_rapido import dumps, orjson
+
+LOTE_INSERCION = 50_000
+
+
+def poblar(engine, n):
+    Base.metadata.create_all(bind=engine)
+    inicio = datetime(2025, 1, 1)
+    with engine.begin() as conexion:
+        for base in range(0, n, LOTE_INSERCION):
+            filas = []
+            for i in range(base, min(base + LOTE_INSERCION, n)):
+                fila = {f: random.uniform(0, 50) for f in FEATURE_ORDER}
+                fila["ecoscore"] = random.uniform(0, 500)
+                fila["timestamp"] = inicio + timedelta(minutes=i)
+                filas.append(fila)
+            conexion.execute(insert(Prediccion), filas)
+
+
+def camino_actual(Sesion, n):
+    db = Sesion()
+    rows = db.query(Prediccion).order_by(Prediccion.id.desc()).limit(n).all()
+    db.close()
+    data = [
+        {
+            "id": r.id,
+            "ecoscore": r.ecoscore,
+            "timestamp": r.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        for r in rows
+    ]
+    return json.dumps({"historico": data}).encode("utf-8")
+
+
+def camino_liviano(engine, n):
+    data = como_dicts(leer_historico(n, engine=engine))
+    return dumps({"historico": data})
+
+
+def medir(funcion, rondas):
+    mejor = float("inf")
+    for _ in range(rondas):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    funcion()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return mejor, pico
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de lectura del histórico.")
+    parser.add_argument("--tamanos", default="10000,100000,1000000")
+    parser.add_argument("--rondas", type=int, default=3)
+    args = parser.parse_args()
+    tamanos = [int(t) for t in args.tamanos.split(",")]
+
+    print(f"Codificador JSON liviano: {'orjson' if orjson is not None else 'json (orjson no instalado)'}")
+    print(f"\n{'filas':>9} | {'actual':>10} | {'liviano':>10} | {'speedup':>7} | {'mem. actual':>11} | {'mem. liviano':>12}")
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        for n in tamanos:
+            ruta = os.path.join(carpeta, f"historico_{n}.db")
+            engine = crear_motor(ruta)
+            poblar(engine, n)
+            Sesion = sessionmaker(bind=engine)
+
+            assert camino_actual(Sesion, 5) and json.loads(camino_liviano(engine, 5))
+
+            t_actual, m_actual = medir(lambda: camino_actual(Sesion, n), args.rondas)
+            t_liviano, m_liviano = medir(lambda: camino_liviano(engine, n), args.rondas)
+            print(
+                f"{n:>9} | {t_actual * 1e3:>7.0f} ms | {t_liviano * 1e3:>7.0f} ms | "
+                f"{t_actual / t_liviano:>6.1f}x | {m_actual / 2**20:>8.1f} MB | {m_liviano / 2**20:>9.1f} MB"
+            )
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
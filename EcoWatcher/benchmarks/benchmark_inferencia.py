@@ -0,0 +1,59 @@
+"""
+Benchmark: RandomForestRegressor.predict de sklearn vs BosqueCompilado,
+solo y en modo híbrido (lotes desde INFERENCIA_UMBRAL_SKLEARN filas van a sklearn).
+
+Uso (desde la carpeta EcoWatcher):
+    python benchmarks/benchmark_inferencia.py
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+from joblib import load
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from config import MODEL_PATH, INFERENCIA_UMBRAL_SKLEARN
+from inferencia.bosque_compilado import BosqueCompilado
+
+
+def medir(funcion, repeticiones):
+    """Mejor tiempo por llamada (segundos) sobre varias rondas."""
+    tiempos = timeit.repeat(funcion, number=repeticiones, repeat=5)
+    return min(tiempos) / repeticiones
+
+
+def main():
+    modelo = load(MODEL_PATH)
+    bosque = BosqueCompilado.desde_sklearn(modelo)
+    hibrido = BosqueCompilado.desde_sklearn(modelo)
+    hibrido.usar_estimador(modelo, INFERENCIA_UMBRAL_SKLEARN)
+
+    print(f"Árboles: {bosque.n_arboles} | Nodos: {bosque.n_nodos} | Profundidad: {bosque.profundidad}")
+
+    rng = np.random.default_rng(42)
+
+    # ===== EQUIVALENCIA =====
+    X_val = rng.uniform(-0.1, 1.1, size=(20_000, bosque.n_features_in_))
+    diff = np.abs(modelo.predict(X_val) - bosque.predict(X_val)).max()
+    print(f"Máxima diferencia absoluta vs sklearn: {diff:.3e}")
+    assert diff < 1e-6, "El bosque compilado no coincide con sklearn"
+
+    # ===== LATENCIA =====
+    print(f"\nUmbral sklearn: {INFERENCIA_UMBRAL_SKLEARN} filas")
+    print(f"{'filas':>8} | {'sklearn':>12} | {'compilado':>12} | {'híbrido':>12} | {'speedup':>8}")
+    for n, reps in [(1, 200), (32, 50), (1_000, 5), (10_000, 1)]:
+        X = rng.uniform(0, 1, size=(n, bosque.n_features_in_))
+        t_sk = medir(lambda: modelo.predict(X), reps)
+        t_comp = medir(lambda: bosque.predict(X), reps)
+        t_hib = medir(lambda: hibrido.predict(X), reps)
+        print(
+            f"{n:>8} | {t_sk * 1e3:>9.3f} ms | {t_comp * 1e3:>9.3f} ms | "
+            f"{t_hib * 1e3:>9.3f} ms | {t_sk / t_hib:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
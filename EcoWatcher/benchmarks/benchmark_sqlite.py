@@ -0,0 +1,167 @@
+"""
+Benchmark de contención SQLite: configuración por defecto vs ajustada.
+
+Varios hilos escriben predicciones de a una fila por transacción (como el
+simulador y /predict) mientras otros leen el histórico (como el dashboard).
+Se compara el motor por defecto (journal de rollback, synchronous=FULL)
+con los motores de `database/sqlite.py` (WAL, pragmas y pools separados).
+
+Cada escenario usa su propia base temporal, no toca data/EcoWatcher.db.
+
+Uso (desde la carpeta EcoWatcher):
+    python benchmarks/benchmark_sqlite.py --segundos 5 --escritores 2 --lectores 4
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import threading
+
+import numpy as np
+from sqlalchemy import create_engine, insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from config import FEATURE_ORDER
+from database.db import Base
+from database.modelodb import Prediccion
+from database.sqlite import crear_motor, es_bloqueo, con_reintentos
+
+FILAS_INICIALES = 20_000
+
+
+def fila_aleatoria():
+    fila = {f: random.uniform(0, 50) for f in FEATURE_ORDER}
+    fila["ecoscore"] = random.uniform(0, 500)
+    return fila
+
+
+def preparar_base(engine):
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conexion:
+        conexion.execute(insert(Prediccion), [fila_aleatoria() for _ in range(FILAS_INICIALES)])
+
+
+def escenario(nombre, motor_escritura, motor_lectura, segundos, escritores, lectores, reintentos):
+    SesionEscritura = sessionmaker(bind=motor_escritura)
+    SesionLectura = sessionmaker(bind=motor_lectura)
+
+    fin = time.perf_counter() + segundos
+    lock = threading.Lock()
+    totales = {"escrituras": 0, "lecturas": 0, "bloqueos": 0}
+    latencias_escritura, latencias_lectura = [], []
+
+    def escribir():
+        locales, bloqueos = [], 0
+
+        def una_fila():
+            db = SesionEscritura()
+            try:
+                db.add(Prediccion(**fila_aleatoria()))
+                db.commit()
+            finally:
+                db.close()
+
+        while time.perf_counter() < fin:
+            inicio = time.perf_counter()
+            try:
+                if reintentos:
+                    con_reintentos(una_fila)
+                else:
+                    una_fila()
+            except OperationalError as e:
+                if not es_bloqueo(e):
+                    raise
+                bloqueos += 1
+                continue
+            locales.append(time.perf_counter() - inicio)
+        with lock:
+            totales["escrituras"] += len(locales)
+            totales["bloqueos"] += bloqueos
+            latencias_escritura.extend(locales)
+
+    def leer():
+        locales, bloqueos = [], 0
+        while time.perf_counter() < fin:
+            inicio = time.perf_counter()
+            db = SesionLectura()
+            try:
+                db.query(Prediccion).order_by(Prediccion.id.desc()).limit(30).all()
+            except OperationalError as e:
+                if not es_bloqueo(e):
+                    raise
+                bloqueos += 1
+                continue
+            finally:
+                db.close()
+            locales.append(time.perf_counter() - inicio)
+        with lock:
+            totales["lecturas"] += len(locales)
+            totales["bloqueos"] += bloqueos
+            latencias_lectura.extend(locales)
+
+    hilos = [threading.Thread(target=escribir) for _ in range(escritores)]
+    hilos += [threading.Thread(target=leer) for _ in range(lectores)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+
+    def p99(valores):
+        return float(np.percentile(valores, 99)) * 1e3 if valores else float("nan")
+
+    return {
+        "escenario": nombre,
+        "escrituras_s": totales["escrituras"] / segundos,
+        "lecturas_s": totales["lecturas"] / segundos,
+        "bloqueos": totales["bloqueos"],
+        "p99_escritura_ms": p99(latencias_escritura),
+        "p99_lectura_ms": p99(latencias_lectura),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de contención SQLite.")
+    parser.add_argument("--segundos", type=float, default=5.0)
+    parser.add_argument("--escritores", type=int, default=2)
+    parser.add_argument("--lectores", type=int, default=4)
+    args = parser.parse_args()
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as carpeta:
+        # ===== POR DEFECTO (como estaba database/db.py) =====
+        ruta = os.path.join(carpeta, "por_defecto.db")
+        motor = create_engine(f"sqlite:///{ruta}", echo=False, future=True)
+        preparar_base(motor)
+        resultados.append(escenario(
+            "por defecto", motor, motor, args.segundos, args.escritores, args.lectores, False
+        ))
+        motor.dispose()
+
+        # ===== AJUSTADO (WAL + pragmas + pools separados + reintentos) =====
+        ruta = os.path.join(carpeta, "ajustado.db")
+        escritura = crear_motor(ruta)
+        lectura = crear_motor(ruta, lectura=True)
+        preparar_base(escritura)
+        resultados.append(escenario(
+            "ajustado", escritura, lectura, args.segundos, args.escritores, args.lectores, True
+        ))
+        escritura.dispose()
+        lectura.dispose()
+
+    print(f"\n{args.escritores} escritores, {args.lectores} lectores, {args.segundos:g} s por escenario")
+    print(f"{'escenario':>12} | {'escrit./s':>10} | {'lect./s':>10} | {'bloqueos':>8} | {'p99 escr.':>10} | {'p99 lect.':>10}")
+    for r in resultados:
+        print(
+            f"{r['escenario']:>12} | {r['escrituras_s']:>10.1f} | {r['lecturas_s']:>10.1f} | "
+            f"{r['bloqueos']:>8} | {r['p99_escritura_ms']:>7.1f} ms | {r['p99_lectura_ms']:>7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
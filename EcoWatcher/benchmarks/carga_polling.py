@@ -0,0 +1,98 @@
+"""
+Prueba de carga del polling del dashboard contra un servidor en marcha.
+
+Cada cliente simulado repite lo que hace dashboard.js: GET /api/ultimo y
+GET /api/historico?limit=30, espera `--intervalo` segundos y vuelve a
+empezar, con su propia conexión keep-alive. Se reportan peticiones por
+segundo, latencias y errores para cada nivel de concurrencia, para comparar
+el despliegue WSGI (app.py / gunicorn) con el ASGI (asgi.py).
+
+El cliente habla HTTP/1.1 directamente sobre asyncio (sin dependencias)
+para que el generador de carga gaste poca CPU frente al servidor medido.
+
+Uso (desde la carpeta EcoWatcher, con el servidor ya levantado):
+    uvicorn asgi:app --port 8000
+    python benchmarks/carga_polling.py --url http://127.0.0.1:8000 --clientes 100,500,2000
+"""
+import time
+import asyncio
+import argparse
+from urllib.parse import urlsplit
+
+import numpy as np
+
+RUTAS = ("/api/ultimo", "/api/historico?limit=30")
+TIMEOUT_S = 30.0
+
+
+async def _get(conexion, host, ruta):
+    """GET sobre una conexión (lector, escritor) abierta. Devuelve (status, mantener_conexión)."""
+    lector, escritor = conexion
+    escritor.write(f"GET {ruta} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+    await escritor.drain()
+
+    cabecera = (await lector.readuntil(b"\r\n\r\n")).decode("latin-1").lower()
+    status = int(cabecera.split(" ", 2)[1])
+    largo = 0
+    for linea in cabecera.split("\r\n"):
+        if linea.startswith("content-length:"):
+            largo = int(linea.split(":", 1)[1])
+    await lector.readexactly(largo)
+    return status, "connection: close" not in cabecera
+
+
+async def cliente(url, intervalo, fin, latencias, errores):
+    partes = urlsplit(url)
+    conexion = None
+    while time.perf_counter() < fin:
+        for ruta in RUTAS:
+            inicio = time.perf_counter()
+            try:
+                if conexion is None:
+                    conexion = await asyncio.open_connection(partes.hostname, partes.port)
+                status, mantener = await asyncio.wait_for(_get(conexion, partes.netloc, ruta), TIMEOUT_S)
+                if not mantener:
+                    conexion[1].close()
+                    conexion = None
+                if status != 200:
+                    raise ValueError(status)
+                latencias.append(time.perf_counter() - inicio)
+            except (OSError, ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                errores.append(ruta)
+                if conexion is not None:
+                    conexion[1].close()
+                conexion = None
+        await asyncio.sleep(intervalo)
+    if conexion is not None:
+        conexion[1].close()
+
+
+async def medir(url, clientes, intervalo, duracion):
+    latencias, errores = [], []
+    inicio = time.perf_counter()
+    fin = inicio + duracion
+    await asyncio.gather(*(cliente(url, intervalo, fin, latencias, errores) for _ in range(clientes)))
+    return latencias, errores, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del polling del dashboard.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--clientes", default="100,500,2000", help="niveles de concurrencia")
+    parser.add_argument("--intervalo", type=float, default=1.0, help="segundos entre polls de cada cliente")
+    parser.add_argument("--duracion", type=float, default=20.0, help="segundos por nivel")
+    args = parser.parse_args()
+
+    print(f"Servidor: {args.url} | intervalo {args.intervalo} s | {args.duracion} s por nivel\n")
+    print(f"{'clientes':>8} | {'req/s':>7} | {'p50':>8} | {'p99':>8} | {'errores':>7}")
+    for clientes in (int(c) for c in args.clientes.split(",")):
+        latencias, errores, segundos = asyncio.run(medir(args.url, clientes, args.intervalo, args.duracion))
+        p50, p99 = np.percentile(latencias, [50, 99]) * 1e3 if latencias else (float("nan"),) * 2
+        print(
+            f"{clientes:>8} | {len(latencias) / segundos:>7.0f} | {p50:>5.0f} ms | "
+            f"{p99:>5.0f} ms | {len(errores):>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ from pathlib import Path
 # ===== RUTAS =====
 BASE_DIR = Path(__file__).resolve().parent
 MODEL_PATH = BASE_DIR / "modelo" / "modelo_entrenado.pkl"
+PIPELINE_PATH = BASE_DIR / "modelo" / "pipeline_ecoscore.joblib"
 PARAMS_PATH = BASE_DIR / "preprocesamiento_datos" / "parametros_normalizados.json"
 
 # ===== CONFIGURACIÓN FLASK =====
@@ -20,3 +21,75 @@ FEATURE_ORDER = [
     "porcentaje_reciclaje",
     "porcentaje_transporte_limpio",
 ]
+
+# ===== API DE PREDICCIÓN EN LOTE =====
+API_PREDICT_MAX_FILAS = int(os.getenv("API_PREDICT_MAX_FILAS", 50000))
+
+# ===== DESPACHADOR DE INFERENCIA (micro-lotes) =====
+INFERENCIA_VENTANA_MS = float(os.getenv("INFERENCIA_VENTANA_MS", 2.0))
+INFERENCIA_MAX_FILAS = int(os.getenv("INFERENCIA_MAX_FILAS", 256))
+# Lotes de esta cantidad de filas o más se predicen con el RandomForest de
+# sklearn (más rápido en lotes grandes que el bosque compilado); 0 = nunca.
+# El .pkl se carga en cada proceso recién con el primer lote de ese tamaño
+INFERENCIA_UMBRAL_SKLEARN = int(os.getenv("INFERENCIA_UMBRAL_SKLEARN", 768))
+
+# ===== REGISTRO DE MODELOS =====
+MODELO_INTERVALO_REVISION_S = float(os.getenv("MODELO_INTERVALO_REVISION_S", 5.0))
+
+# ===== MODELOS SOMBRA =====
+# Rutas (.pkl o .joblib compilado) separadas por coma, p. ej. modelo/modelo_candidato.pkl
+SOMBRA_MODELOS = [p for p in os.getenv("SOMBRA_MODELOS", "").split(",") if p.strip()]
+SOMBRA_WORKERS = int(os.getenv("SOMBRA_WORKERS", 2))
+SOMBRA_MAX_PENDIENTES = int(os.getenv("SOMBRA_MAX_PENDIENTES", 64))
+
+# ===== CACHÉ DE PREDICCIONES =====
+CACHE_PREDICCIONES_MAX = int(os.getenv("CACHE_PREDICCIONES_MAX", 4096))
+CACHE_PREDICCIONES_TTL_S = float(os.getenv("CACHE_PREDICCIONES_TTL_S", 0))  # 0 = sin expiración
+CACHE_PREDICCIONES_DECIMALES = int(os.getenv("CACHE_PREDICCIONES_DECIMALES", 4))
+
+# ===== MOTOR ANALÍTICO (modo degradado) =====
+# Con motor=auto se usa el motor analítico si la cola del despachador supera este umbral (0 = nunca)
+ANALITICO_UMBRAL_COLA = int(os.getenv("ANALITICO_UMBRAL_COLA", 128))
+# Residuo absoluto medio (puntos de ecoscore) hasta el que el modo degradado se considera aceptable
+ANALITICO_TOLERANCIA = float(os.getenv("ANALITICO_TOLERANCIA", 15.0))
+
+# ===== ESCRITURA DIFERIDA DE PREDICCIONES =====
+ESCRITOR_MAX_LOTE = int(os.getenv("ESCRITOR_MAX_LOTE", 500))
+ESCRITOR_INTERVALO_MS = float(os.getenv("ESCRITOR_INTERVALO_MS", 200.0))
+ESCRITOR_MAX_COLA = int(os.getenv("ESCRITOR_MAX_COLA", 10000))
+ESCRITOR_REINTENTOS = int(os.getenv("ESCRITOR_REINTENTOS", 3))  # intentos por lote ante errores que no son bloqueo
+ESCRITOR_ESPERA_MS = float(os.getenv("ESCRITOR_ESPERA_MS", 200.0))  # espera antes del primer reintento (se duplica)
+ESCRITOR_MAX_DESCARTADAS = int(os.getenv("ESCRITOR_MAX_DESCARTADAS", 10000))  # filas retenidas tras agotar los intentos
+
+# ===== ALMACENAMIENTO SQLITE =====
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_MB = int(os.getenv("SQLITE_MMAP_MB", 256))
+SQLITE_CACHE_MB = int(os.getenv("SQLITE_CACHE_MB", 32))
+SQLITE_POOL_LECTURA = int(os.getenv("SQLITE_POOL_LECTURA", 5))
+SQLITE_REINTENTOS = int(os.getenv("SQLITE_REINTENTOS", 5))
+
+# ===== AGREGADOS POR INTERVALO =====
+AGREGADOS_MAX_INTERVALOS = int(os.getenv("AGREGADOS_MAX_INTERVALOS", 5000))
+
+# ===== RETENCIÓN Y ARCHIVO =====
+RETENCION_DIAS = int(os.getenv("RETENCION_DIAS", 90))  # días que se conservan en SQLite
+ARCHIVO_DIR = Path(os.getenv("ARCHIVO_DIR", BASE_DIR / "data" / "archivo"))
+
+# ===== HISTÓRICO =====
+HISTORICO_MAX_LIMIT = int(os.getenv("HISTORICO_MAX_LIMIT", 1000))  # filas por página
+DASHBOARD_PUNTOS = int(os.getenv("DASHBOARD_PUNTOS", 30))  # puntos del gráfico en /api/dashboard
+
+# ===== EXPORTACIÓN =====
+EXPORTAR_TAM_BLOQUE = int(os.getenv("EXPORTAR_TAM_BLOQUE", 5000))  # filas por lectura (yield_per)
+
+# ===== INGESTA MASIVA =====
+INGESTA_TAM_BLOQUE = int(os.getenv("INGESTA_TAM_BLOQUE", 50000))  # filas por bloque y transacción
+
+# ===== BUFFER DE PREDICCIONES RECIENTES =====
+# Filas servidas desde memoria por /api/ultimo y /api/historico (>= HISTORICO_MAX_LIMIT cubre cualquier página)
+RECIENTES_CAPACIDAD = int(os.getenv("RECIENTES_CAPACIDAD", 1000))
+
+# ===== STREAMING (SSE) =====
+SSE_HEARTBEAT_S = float(os.getenv("SSE_HEARTBEAT_S", 15.0))  # comentario keep-alive si no hay eventos
+SSE_MAX_PENDIENTES = int(os.getenv("SSE_MAX_PENDIENTES", 100))  # eventos por cliente antes de cortarlo
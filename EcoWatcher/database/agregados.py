@@ -0,0 +1,251 @@
+"""
+Agregados de ecoscore por minuto, hora y día.
+
+Cada lote de predicciones se inserta junto con la actualización de sus
+intervalos en la misma transacción (`insertar_predicciones`): el lote se
+agrupa en Python y cada intervalo tocado recibe un único UPSERT que suma
+conteo y sumas y ajusta mínimo y máximo. Así las consultas de rango largo
+leen O(intervalos) filas en lugar de O(predicciones).
+
+Reconstrucción desde `predicciones` (conserva los intervalos ya archivados;
+desde la carpeta EcoWatcher):
+    python -m database.agregados
+"""
+from datetime import datetime, timezone
+
+import pandas as pd
+from sqlalchemy import insert, select, func, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from config import FEATURE_ORDER
+from database.db import SessionLocal
+from database.modelodb import Prediccion, AgregadoEcoscore
+
+# ===== GRANULARIDADES =====
+# Formato de inicio del intervalo, común a Python (strftime) y SQLite (strftime)
+FORMATOS = {
+    "minute": "%Y-%m-%d %H:%M:00",
+    "hour": "%Y-%m-%d %H:00:00",
+    "day": "%Y-%m-%d 00:00:00",
+}
+# Mismos intervalos como frecuencia de pandas (agregación vectorizada de lotes grandes)
+FRECUENCIAS = {"minute": "min", "hour": "h", "day": "D"}
+COLUMNAS_SUMA = [f"suma_{f}" for f in FEATURE_ORDER]
+
+
+def inicio_intervalo(ts, granularidad):
+    return ts.strftime(FORMATOS[granularidad])
+
+
+def _agrupar(registros):
+    """{(granularidad, inicio): fila de agregado} para un lote de registros."""
+    grupos = {}
+    for r in registros:
+        ts = r["timestamp"]
+        score = r["ecoscore"]
+        for granularidad in FORMATOS:
+            clave = (granularidad, inicio_intervalo(ts, granularidad))
+            g = grupos.get(clave)
+            if g is None:
+                g = grupos[clave] = {
+                    "granularidad": clave[0],
+                    "inicio": clave[1],
+                    "n": 0,
+                    "suma": 0.0,
+                    "minimo": score,
+                    "maximo": score,
+                    **{c: 0.0 for c in COLUMNAS_SUMA},
+                }
+            g["n"] += 1
+            g["suma"] += score
+            g["minimo"] = min(g["minimo"], score)
+            g["maximo"] = max(g["maximo"], score)
+            for f, c in zip(FEATURE_ORDER, COLUMNAS_SUMA):
+                g[c] += r[f]
+    return list(grupos.values())
+
+
+def _agrupar_df(df):
+    """Igual que `_agrupar` para un DataFrame (FEATURE_ORDER, ecoscore, timestamp) con groupby."""
+    filas = []
+    for granularidad, frecuencia in FRECUENCIAS.items():
+        grupos = df.groupby(df["timestamp"].dt.floor(frecuencia))
+        resumen = grupos["ecoscore"].agg(["count", "sum", "min", "max"])
+        sumas = grupos[FEATURE_ORDER].sum()
+        for inicio, n, suma, minimo, maximo, *sumas_fila in zip(
+            resumen.index, *(resumen[c].tolist() for c in resumen.columns),
+            *(sumas[f].tolist() for f in FEATURE_ORDER),
+        ):
+            filas.append({
+                "granularidad": granularidad,
+                "inicio": inicio_intervalo(inicio, granularidad),
+                "n": n,
+                "suma": suma,
+                "minimo": minimo,
+                "maximo": maximo,
+                **dict(zip(COLUMNAS_SUMA, sumas_fila)),
+            })
+    return filas
+
+
+def acumular(db, registros):
+    """UPSERT de los intervalos tocados por `registros` (requieren `timestamp`)."""
+    _upsert(db, _agrupar(registros))
+
+
+def _upsert(db, filas):
+    if not filas:
+        return
+    tabla = AgregadoEcoscore.__table__
+    stmt = sqlite_insert(tabla)
+    excluido = stmt.excluded
+    actualizar = {
+        "n": tabla.c.n + excluido.n,
+        "suma": tabla.c.suma + excluido.suma,
+        "minimo": func.min(tabla.c.minimo, excluido.minimo),
+        "maximo": func.max(tabla.c.maximo, excluido.maximo),
+        **{c: tabla.c[c] + excluido[c] for c in COLUMNAS_SUMA},
+    }
+    db.execute(
+        stmt.on_conflict_do_update(index_elements=["granularidad", "inicio"], set_=actualizar),
+        filas,
+    )
+
+
+def insertar_predicciones(db, registros):
+    """
+    Insertar un lote en `predicciones` y actualizar sus agregados (sin commit).
+
+    Devuelve los ids asignados, en el mismo orden que `registros`.
+    """
+    stmt = insert(Prediccion).returning(Prediccion.id, sort_by_parameter_order=True)
+    ids = db.execute(stmt, registros).scalars().all()
+    acumular(db, registros)
+    return ids
+
+
+def insertar_predicciones_df(db, df, devolver_ids=False):
+    """
+    `insertar_predicciones` para lotes grandes en DataFrame: agregados con
+    groupby (sin commit). Con `devolver_ids` devuelve los ids asignados en
+    el orden de `df`; si no, None (executemany sin RETURNING).
+    """
+    ids = None
+    if devolver_ids:
+        stmt = insert(Prediccion).returning(Prediccion.id, sort_by_parameter_order=True)
+        ids = db.execute(stmt, df.to_dict("records")).scalars().all()
+    else:
+        db.execute(insert(Prediccion), df.to_dict("records"))
+    _upsert(db, _agrupar_df(df))
+    return ids
+
+
+def reconstruir(db):
+    """
+    Recalcular los agregados desde `predicciones` (un GROUP BY por granularidad).
+
+    Solo se reemplazan los intervalos desde el de la predicción más antigua
+    que sigue en SQLite: los anteriores resumen filas ya movidas al archivo
+    (`database/archivo.py`) y se conservan. Las filas archivadas que caen en
+    los intervalos reemplazados (el de la frontera, o todos si una ingesta
+    trajo fechas viejas) se vuelven a sumar desde el archivo.
+    """
+    minimo = db.query(func.min(Prediccion.timestamp)).scalar()
+    if minimo is None:
+        return
+    limites = {g: inicio_intervalo(minimo, g) for g in FORMATOS}
+
+    sumas = ", ".join(f"SUM({f})" for f in FEATURE_ORDER)
+    columnas = ", ".join(COLUMNAS_SUMA)
+    for granularidad, formato in FORMATOS.items():
+        db.query(AgregadoEcoscore).filter(
+            AgregadoEcoscore.granularidad == granularidad,
+            AgregadoEcoscore.inicio >= limites[granularidad],
+        ).delete(synchronize_session=False)
+        db.execute(
+            text(
+                f"INSERT INTO agregados_ecoscore "
+                f"(granularidad, inicio, n, suma, minimo, maximo, {columnas}) "
+                f"SELECT :granularidad, strftime(:formato, timestamp) AS inicio, "
+                f"COUNT(*), SUM(ecoscore), MIN(ecoscore), MAX(ecoscore), {sumas} "
+                f"FROM predicciones WHERE timestamp IS NOT NULL GROUP BY inicio"
+            ),
+            {"granularidad": granularidad, "formato": formato},
+        )
+
+    # Import diferido: database.archivo importa el escritor, que importa este módulo
+    from database.archivo import leer_archivo
+
+    archivadas = leer_archivo(desde=parsear_fecha(limites["day"]))
+    if not archivadas:
+        return
+    df = pd.DataFrame(archivadas)
+    # Un archivado interrumpido antes del DELETE deja filas en ambos lados
+    vivas = db.execute(
+        select(Prediccion.id).where(Prediccion.id.between(int(df["id"].min()), int(df["id"].max())))
+    ).scalars().all()
+    df = df[~df["id"].isin(vivas)]
+    _upsert(db, [g for g in _agrupar_df(df) if g["inicio"] >= limites[g["granularidad"]]])
+
+
+def inicializar():
+    """Reconstruir una sola vez si hay predicciones pero la tabla de agregados está vacía."""
+    db = SessionLocal()
+    try:
+        vacia = db.query(AgregadoEcoscore.inicio).first() is None
+        if vacia and db.query(Prediccion.id).first() is not None:
+            reconstruir(db)
+            db.commit()
+    finally:
+        db.close()
+
+
+def consultar(db, granularidad, desde=None, hasta=None, limite=1000):
+    """
+    Intervalos de `granularidad` entre `desde` y `hasta` (datetime, inclusive),
+    en orden cronológico. Sin rango se devuelven los `limite` más recientes.
+    """
+    query = db.query(AgregadoEcoscore).filter(AgregadoEcoscore.granularidad == granularidad)
+    if desde is not None:
+        query = query.filter(AgregadoEcoscore.inicio >= inicio_intervalo(desde, granularidad))
+    if hasta is not None:
+        query = query.filter(AgregadoEcoscore.inicio <= hasta.strftime("%Y-%m-%d %H:%M:%S"))
+
+    filas = query.order_by(AgregadoEcoscore.inicio.desc()).limit(limite).all()
+    filas.reverse()
+
+    return [
+        {
+            "inicio": a.inicio,
+            "n": a.n,
+            "ecoscore_medio": a.suma / a.n,
+            "ecoscore_min": a.minimo,
+            "ecoscore_max": a.maximo,
+            "medias": {f: getattr(a, c) / a.n for f, c in zip(FEATURE_ORDER, COLUMNAS_SUMA)},
+        }
+        for a in filas
+    ]
+
+
+def parsear_fecha(valor):
+    """
+    'YYYY-MM-DD' o 'YYYY-MM-DD HH:MM[:SS]' (también con 'T' y zona) -> datetime
+    UTC sin zona, como se guardan los timestamps; None si vacío.
+    """
+    if not valor:
+        return None
+    fecha = datetime.fromisoformat(valor.replace("T", " "))
+    if fecha.tzinfo is not None:
+        fecha = fecha.astimezone(timezone.utc).replace(tzinfo=None)
+    return fecha
+
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        reconstruir(db)
+        db.commit()
+        total = db.query(func.count()).select_from(AgregadoEcoscore).scalar()
+        print(f"Agregados reconstruidos: {total} intervalos")
+    finally:
+        db.close()
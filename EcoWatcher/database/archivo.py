@@ -0,0 +1,274 @@
+"""
+Retención y archivo columnar de predicciones antiguas.
+
+Las filas de `predicciones` más viejas que `RETENCION_DIAS` se mueven a
+archivos comprimidos por mes en `data/archivo/`:
+
+- Parquet (zstd) si pyarrow está instalado (dependencia opcional)
+- si no, .npz comprimido con un arreglo por columna
+
+Primero se escribe el archivo del mes (temporal + os.replace, fusionando con
+lo ya archivado y sin duplicar ids) y solo después se borran las filas de
+SQLite, así una interrupción nunca pierde datos. Los agregados por intervalo
+no se tocan: siguen resumiendo todo el histórico, y opcionalmente se podan
+los de minuto dentro de la ventana archivada (queda solo la versión por
+hora y día).
+
+Las APIs de histórico intercalan el archivo con SQLite por (timestamp, id)
+(`leer_archivo`). Cada mes contiene exactamente las filas con timestamp en
+ese mes y se guarda ordenado por esa clave, así que recorrer los meses en
+orden da el orden global aunque una ingesta haya traído lecturas viejas con
+ids nuevos.
+
+Uso (desde la carpeta EcoWatcher):
+    python -m database.archivo --dias 90 [--podar-minutos] [--vacuum]
+"""
+import os
+import json
+import argparse
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, text
+
+from config import FEATURE_ORDER, ARCHIVO_DIR, RETENCION_DIAS
+from database.db import SessionLocal, engine
+from database.escritor import ahora_utc
+from database.modelodb import Prediccion, AgregadoEcoscore
+
+try:
+    import pyarrow  # noqa: F401
+    FORMATO = "parquet"
+except ImportError:
+    FORMATO = "npz"
+
+COLUMNAS = ["id", *FEATURE_ORDER, "ecoscore", "timestamp"]
+INDICE_PATH = os.path.join(ARCHIVO_DIR, "indice.json")
+TAMANO_BLOQUE = 50_000
+
+
+# ===== ÍNDICE DE ARCHIVOS =====
+def leer_indice():
+    """{mes: {archivo, n, min_id, max_id, desde, hasta}} de los meses archivados."""
+    if not os.path.exists(INDICE_PATH):
+        return {}
+    with open(INDICE_PATH, "r") as f:
+        return json.load(f)
+
+
+def ultimo_id_archivado():
+    """Id de la fila archivada más reciente por (timestamp, id) (0 si no hay archivo); solo lee el índice."""
+    indice = leer_indice()
+    if not indice:
+        return 0
+    info = indice[max(indice)]
+    return info.get("ultimo_id", info["max_id"])
+
+
+def _guardar_indice(indice):
+    temporal = f"{INDICE_PATH}.tmp"
+    with open(temporal, "w") as f:
+        json.dump(indice, f, indent=2, sort_keys=True)
+    os.replace(temporal, INDICE_PATH)
+
+
+# ===== LECTURA / ESCRITURA DE UN MES =====
+def _leer_mes(ruta):
+    if ruta.endswith(".parquet"):
+        return pd.read_parquet(ruta)
+    with np.load(ruta, allow_pickle=False) as datos:
+        df = pd.DataFrame({c: datos[c] for c in COLUMNAS})
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    return df
+
+
+def _escribir_mes(df, mes):
+    nombre = f"predicciones_{mes}.{FORMATO}"
+    ruta = os.path.join(ARCHIVO_DIR, nombre)
+    temporal = ruta + ".tmp"
+    if FORMATO == "parquet":
+        df.to_parquet(temporal, compression="zstd", index=False)
+    else:
+        with open(temporal, "wb") as f:
+            np.savez_compressed(
+                f,
+                **{c: df[c].to_numpy() for c in COLUMNAS if c != "timestamp"},
+                timestamp=df["timestamp"].dt.strftime("%Y-%m-%d %H:%M:%S").to_numpy(dtype=str),
+            )
+    os.replace(temporal, ruta)
+    return nombre
+
+
+def _fusionar_mes(indice, mes, nuevas):
+    """Unir `nuevas` con lo ya archivado para `mes` (sin duplicar ids) y reescribir el archivo."""
+    previo = indice.get(mes)
+    if previo is not None:
+        ruta_previa = os.path.join(ARCHIVO_DIR, previo["archivo"])
+        nuevas = pd.concat([_leer_mes(ruta_previa), nuevas], ignore_index=True)
+    df = nuevas.drop_duplicates("id").sort_values(["timestamp", "id"]).reset_index(drop=True)
+
+    nombre = _escribir_mes(df, mes)
+    if previo is not None and previo["archivo"] != nombre:
+        os.remove(os.path.join(ARCHIVO_DIR, previo["archivo"]))
+
+    indice[mes] = {
+        "archivo": nombre,
+        "n": int(len(df)),
+        "min_id": int(df["id"].min()),
+        "max_id": int(df["id"].max()),
+        "ultimo_id": int(df["id"].iloc[-1]),
+        "desde": df["timestamp"].min().strftime("%Y-%m-%d %H:%M:%S"),
+        "hasta": df["timestamp"].max().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+# ===== RETENCIÓN =====
+def archivar(dias=RETENCION_DIAS, podar_minutos=False, vacuum=False):
+    """Mover a archivo las predicciones con más de `dias` días. Devuelve las filas movidas."""
+    os.makedirs(ARCHIVO_DIR, exist_ok=True)
+    corte = ahora_utc() - timedelta(days=dias)
+    corte_txt = corte.strftime("%Y-%m-%d %H:%M:%S")
+    indice = leer_indice()
+    movidas = 0
+
+    while True:
+        df = pd.read_sql_query(
+            text(
+                f"SELECT {', '.join(COLUMNAS)} FROM predicciones "
+                "WHERE timestamp < :corte ORDER BY id LIMIT :limite"
+            ),
+            engine,
+            params={"corte": corte_txt, "limite": TAMANO_BLOQUE},
+            parse_dates=["timestamp"],
+        )
+        if df.empty:
+            break
+
+        for mes, grupo in df.groupby(df["timestamp"].dt.strftime("%Y-%m")):
+            _fusionar_mes(indice, mes, grupo)
+        _guardar_indice(indice)
+
+        # El archivo ya está en disco: recién ahora se borra de SQLite. El
+        # bloque son las primeras filas por id que cumplen el corte, así que
+        # basta un rango sobre la clave primaria (sin un IN de 50k parámetros)
+        db = SessionLocal()
+        try:
+            db.execute(
+                delete(Prediccion).where(Prediccion.id <= int(df["id"].max()), text("timestamp < :corte")),
+                {"corte": corte_txt},
+            )
+            db.commit()
+        finally:
+            db.close()
+
+        movidas += len(df)
+        print(f"[ARCHIVO] {movidas} filas archivadas (hasta id {int(df['id'].max())})")
+
+    if podar_minutos:
+        db = SessionLocal()
+        try:
+            podados = db.query(AgregadoEcoscore).filter(
+                AgregadoEcoscore.granularidad == "minute",
+                AgregadoEcoscore.inicio < corte_txt,
+            ).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+        print(f"[ARCHIVO] {podados} agregados por minuto podados (quedan hora y día)")
+
+    if vacuum:
+        with engine.connect() as conexion:
+            conexion.exec_driver_sql("VACUUM")
+
+    return movidas
+
+
+# ===== CONSULTA TRANSPARENTE =====
+def leer_archivo(antes=None, despues=None, desde=None, hasta=None, limite=None,
+                 ascendente=False):
+    """
+    Filas archivadas (dicts con id, variables, ecoscore y timestamp datetime)
+    en orden (timestamp, id) descendente, o ascendente con `ascendente`.
+
+    `antes` y `despues` son claves (timestamp "YYYY-MM-DD HH:MM:SS", id)
+    exclusivas, las mismas de los cursores de /api/historico. Solo se abren
+    los meses cuyo rango de fechas puede contener filas.
+    """
+    indice = leer_indice()
+    filas = []
+    for mes in sorted(indice, reverse=not ascendente):
+        info = indice[mes]
+        if antes is not None and info["desde"] > antes[0]:
+            continue
+        if despues is not None and info["hasta"] < despues[0]:
+            continue
+        if desde is not None and info["hasta"] < desde.strftime("%Y-%m-%d %H:%M:%S"):
+            continue
+        if hasta is not None and info["desde"] > hasta.strftime("%Y-%m-%d %H:%M:%S"):
+            continue
+
+        df = _leer_mes(os.path.join(ARCHIVO_DIR, info["archivo"]))
+        if antes is not None:
+            df = df[_antes_de(df, antes)]
+        if despues is not None:
+            df = df[~_antes_de(df, despues) & (df["id"] != despues[1])]
+        if desde is not None:
+            df = df[df["timestamp"] >= desde]
+        if hasta is not None:
+            df = df[df["timestamp"] <= hasta]
+        df = df.sort_values(["timestamp", "id"], ascending=ascendente)
+        if limite is not None:
+            df = df.head(limite - len(filas))
+
+        filas.extend(
+            dict(fila, timestamp=fila["timestamp"].to_pydatetime())
+            for fila in df.to_dict("records")
+        )
+        if limite is not None and len(filas) >= limite:
+            break
+    return filas
+
+
+def _antes_de(df, clave):
+    """Máscara de las filas con (timestamp, id) < `clave`."""
+    timestamp = pd.Timestamp(clave[0])
+    return (df["timestamp"] < timestamp) | ((df["timestamp"] == timestamp) & (df["id"] < clave[1]))
+
+
+def meses_archivados(desde=None, hasta=None):
+    """
+    DataFrame por mes archivado (orden cronológico, filas por (timestamp, id)),
+    filtrado por rango de fechas. Se abre un solo mes a la vez.
+    """
+    indice = leer_indice()
+    for mes in sorted(indice):
+        info = indice[mes]
+        if desde is not None and info["hasta"] < desde.strftime("%Y-%m-%d %H:%M:%S"):
+            continue
+        if hasta is not None and info["desde"] > hasta.strftime("%Y-%m-%d %H:%M:%S"):
+            continue
+
+        df = _leer_mes(os.path.join(ARCHIVO_DIR, info["archivo"]))
+        if desde is not None:
+            df = df[df["timestamp"] >= desde]
+        if hasta is not None:
+            df = df[df["timestamp"] <= hasta]
+        if not df.empty:
+            yield df.sort_values(["timestamp", "id"])
+
+
+# ===== MAIN =====
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archivar predicciones antiguas.")
+    parser.add_argument("--dias", type=int, default=RETENCION_DIAS, help="días que se conservan en SQLite")
+    parser.add_argument(
+        "--podar-minutos",
+        action="store_true",
+        help="borrar también los agregados por minuto de la ventana archivada",
+    )
+    parser.add_argument("--vacuum", action="store_true", help="compactar EcoWatcher.db al terminar")
+    args = parser.parse_args()
+
+    total = archivar(args.dias, args.podar_minutos, args.vacuum)
+    print(f"Total archivado: {total} filas (formato {FORMATO})")
@@ -1,18 +1,21 @@
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
 
+from database.sqlite import crear_motor
+
 # ===== RUTA =====
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
 # ===== ARCHIVO DE BASE DE DATOS =====
-DB_PATH = os.path.join(BASE_DIR, "data", "EcoWatcher.db")
+DB_PATH = os.getenv("ECOWATCHER_DB", os.path.join(BASE_DIR, "data", "EcoWatcher.db"))
 
-# ===== MOTOR DE BASE DE DATOS =====
-engine = create_engine(f"sqlite:///{DB_PATH}", echo=False, future=True)
+# ===== MOTORES DE BASE DE DATOS (WAL, escritura y lectura separadas) =====
+engine = crear_motor(DB_PATH)
+engine_lectura = crear_motor(DB_PATH, lectura=True)
 
-# ===== SESIÓN =====
+# ===== SESIONES =====
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLectura = sessionmaker(autocommit=False, autoflush=False, bind=engine_lectura)
 
 # ===== BASE DE MODELOS =====
 Base = declarative_base()
@@ -25,3 +28,8 @@ def init_db():
     from . import modelodb  # importar modelos para que SQLAlchemy los registre
 
     Base.metadata.create_all(bind=engine)
+
+    # create_all no agrega índices nuevos a tablas que ya existían
+    for tabla in Base.metadata.sorted_tables:
+        for indice in tabla.indexes:
+            indice.create(bind=engine, checkfirst=True)
@@ -0,0 +1,260 @@
+"""
+Escritura diferida (write-behind) de predicciones.
+
+La web y el simulador encolan cada registro y vuelven de inmediato; un único
+hilo los agrupa y los guarda con un INSERT masivo (y la actualización de
+sus agregados) en una sola transacción cada `max_lote` filas o cada `intervalo_ms`, lo que ocurra primero. Si la
+cola se llena, `encolar` bloquea al productor (contrapresión) en lugar de
+crecer sin límite. `detener` guarda lo pendiente antes de salir.
+
+Un lote que falla se reintenta con espera exponencial; si agota los
+intentos sus filas pasan a una lista de descartadas acotada (visible en
+/api/metricas) en lugar de perderse en silencio, y `reprocesar_descartadas`
+las vuelve a intentar.
+"""
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from config import (
+    ESCRITOR_MAX_LOTE, ESCRITOR_INTERVALO_MS, ESCRITOR_MAX_COLA,
+    ESCRITOR_REINTENTOS, ESCRITOR_ESPERA_MS, ESCRITOR_MAX_DESCARTADAS,
+)
+from database.db import SessionLocal
+from database.sqlite import con_reintentos
+from database.agregados import insertar_predicciones
+
+logger = logging.getLogger(__name__)
+
+
+def ahora_utc():
+    """Marca de tiempo con el mismo formato que CURRENT_TIMESTAMP de SQLite (UTC, sin zona)."""
+    return datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+
+class EscritorPredicciones:
+    """
+    Cola acotada de filas de `predicciones` con un hilo que las vuelca por lotes.
+
+    Args:
+        max_lote: filas a partir de las cuales el lote se guarda de inmediato
+        intervalo_ms: tiempo máximo que una fila espera en la cola
+        max_cola: filas encoladas como máximo antes de bloquear a los productores
+        reintentos: intentos por lote antes de pasarlo a descartadas
+        espera_ms: espera antes del primer reintento (se duplica en cada uno)
+        max_descartadas: filas descartadas que se retienen (las más viejas se pierden)
+    """
+
+    def __init__(self, max_lote=500, intervalo_ms=200.0, max_cola=10000, reintentos=3,
+                 espera_ms=200.0, max_descartadas=10000):
+        self.max_lote = max_lote
+        self.intervalo = intervalo_ms / 1000.0
+        self.reintentos = max(1, reintentos)
+        self.espera = espera_ms / 1000.0
+        self._cola = queue.Queue(maxsize=max_cola)
+        self._hilo = None
+        self._al_guardar = []
+        self._descartadas = deque(maxlen=max_descartadas)
+
+        # ===== MÉTRICAS =====
+        self._lock = threading.Lock()
+        self._lotes = 0
+        self._filas = 0
+        self._errores = 0
+        self._reintentos = 0
+        self._filas_descartadas = 0
+        self._ultimo_error = None
+        self._bloqueos = 0
+        self._max_profundidad = 0
+        self._ultimo_lote_ms = None
+
+    # ===== CICLO DE VIDA =====
+    def iniciar(self):
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._hilo = threading.Thread(
+            target=self._bucle, name="escritor-predicciones", daemon=True
+        )
+        self._hilo.start()
+
+    def detener(self, timeout=None):
+        """Guardar lo encolado y detener el hilo."""
+        if self._hilo is None:
+            return
+        self._cola.put(None)
+        self._hilo.join(timeout)
+        self._hilo = None
+
+    @property
+    def activo(self):
+        return self._hilo is not None and self._hilo.is_alive()
+
+    def al_guardar(self, funcion):
+        """Registrar `funcion(lote, ids)`, llamada después de cada commit exitoso."""
+        self._al_guardar.append(funcion)
+
+    # ===== API PÚBLICA =====
+    def encolar(self, registro, timeout=None):
+        """
+        Encolar un dict con las columnas de `Prediccion`.
+
+        Si no trae `timestamp` se toma el momento de encolar, no el del volcado.
+        Sin hilo activo la fila se guarda de forma síncrona.
+        """
+        registro.setdefault("timestamp", ahora_utc())
+        if not self.activo:
+            self._guardar([registro])
+            return
+
+        try:
+            self._cola.put_nowait(registro)
+        except queue.Full:
+            with self._lock:
+                self._bloqueos += 1
+            self._cola.put(registro, timeout=timeout)
+
+        profundidad = self._cola.qsize()
+        with self._lock:
+            if profundidad > self._max_profundidad:
+                self._max_profundidad = profundidad
+
+    def vaciar(self):
+        """Bloquear hasta que todo lo encolado hasta ahora esté guardado."""
+        if self.activo:
+            self._cola.join()
+
+    def reprocesar_descartadas(self):
+        """Volver a intentar guardar las filas descartadas. Devuelve cuántas se guardaron."""
+        with self._lock:
+            lote = list(self._descartadas)
+            self._descartadas.clear()
+        if not lote:
+            return 0
+        return len(lote) if self._guardar(lote) else 0
+
+    def metricas(self):
+        with self._lock:
+            return {
+                "activo": self.activo,
+                "max_lote": self.max_lote,
+                "intervalo_ms": self.intervalo * 1000.0,
+                "profundidad_cola": self._cola.qsize(),
+                "max_profundidad_cola": self._max_profundidad,
+                "lotes": self._lotes,
+                "filas": self._filas,
+                "filas_por_lote": self._filas / self._lotes if self._lotes else 0.0,
+                "bloqueos": self._bloqueos,
+                "errores": self._errores,
+                "reintentos": self._reintentos,
+                "descartadas": len(self._descartadas),
+                "filas_descartadas_total": self._filas_descartadas,
+                "ultimo_error": self._ultimo_error,
+                "ultimo_lote_ms": self._ultimo_lote_ms,
+            }
+
+    # ===== HILO DE TRABAJO =====
+    def _bucle(self):
+        detener = False
+        while not detener:
+            item = self._cola.get()
+            if item is None:
+                self._cola.task_done()
+                break
+
+            lote = [item]
+            limite = time.perf_counter() + self.intervalo
+
+            while len(lote) < self.max_lote:
+                restante = limite - time.perf_counter()
+                if restante <= 0:
+                    break
+                try:
+                    item = self._cola.get(timeout=restante)
+                except queue.Empty:
+                    break
+                if item is None:
+                    detener = True
+                    self._cola.task_done()
+                    break
+                lote.append(item)
+
+            self._guardar(lote)
+            for _ in lote:
+                self._cola.task_done()
+
+        # Lo que se haya encolado detrás del centinela
+        resto = []
+        while True:
+            try:
+                item = self._cola.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                resto.append(item)
+            else:
+                self._cola.task_done()
+        if resto:
+            self._guardar(resto)
+            for _ in resto:
+                self._cola.task_done()
+
+    def _guardar(self, lote):
+        """Guardar `lote` con reintentos. Devuelve False si terminó en descartadas."""
+        def insertar():
+            db = SessionLocal()
+            try:
+                ids = insertar_predicciones(db, lote)
+                db.commit()
+                return ids
+            finally:
+                db.close()
+
+        inicio = time.perf_counter()
+        espera = self.espera
+        for intento in range(1, self.reintentos + 1):
+            try:
+                ids = con_reintentos(insertar)  # 'database is locked' ya se reintenta aquí
+                break
+            except Exception as e:
+                with self._lock:
+                    self._errores += 1
+                    self._ultimo_error = f"{type(e).__name__}: {e}"
+                if intento == self.reintentos:
+                    with self._lock:
+                        self._descartadas.extend(lote)
+                        self._filas_descartadas += len(lote)
+                    logger.error(
+                        "Error guardando %d predicciones tras %d intentos; pasan a descartadas: %s",
+                        len(lote), intento, e,
+                    )
+                    return False
+                with self._lock:
+                    self._reintentos += 1
+                logger.warning(
+                    "Error guardando %d predicciones (intento %d/%d), reintento en %.2f s: %s",
+                    len(lote), intento, self.reintentos, espera, e,
+                )
+                time.sleep(espera)
+                espera *= 2
+
+        with self._lock:
+            self._lotes += 1
+            self._filas += len(lote)
+            self._ultimo_lote_ms = (time.perf_counter() - inicio) * 1000.0
+
+        for funcion in self._al_guardar:
+            try:
+                funcion(lote, ids)
+            except Exception:
+                logger.exception("Error en aviso de guardado")
+        return True
+
+
+# ===== INSTANCIA COMPARTIDA =====
+escritor = EscritorPredicciones(
+    ESCRITOR_MAX_LOTE, ESCRITOR_INTERVALO_MS, ESCRITOR_MAX_COLA,
+    ESCRITOR_REINTENTOS, ESCRITOR_ESPERA_MS, ESCRITOR_MAX_DESCARTADAS,
+)
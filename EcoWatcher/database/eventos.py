@@ -0,0 +1,116 @@
+"""
+Canal de eventos de predicciones nuevas para /api/stream (Server-Sent Events).
+
+El buffer de recientes avisa cada fila confirmada junto con el ecoscore de la
+anterior; aquí se arma el evento una sola vez (con categoría y tendencia)
+y se entrega a todos los suscriptores. El costo crece con las escrituras, no
+con la cantidad de dashboards abiertos.
+
+Cada suscriptor tiene una cola acotada: si un cliente lento acumula
+SSE_MAX_PENDIENTES eventos se lo marca como desbordado y su stream se corta;
+el navegador (EventSource) se reconecta solo y recibe el estado actual.
+"""
+import queue
+import asyncio
+import threading
+
+from config import SSE_MAX_PENDIENTES
+from utils.categorias import categoria_ecoscore, tendencia_ecoscore
+from utils.json_rapido import dumps
+
+
+def evento_prediccion(fila, anterior):
+    """(id, ecoscore, timestamp) + ecoscore anterior -> dict del evento (con categoría y tendencia)."""
+    id_, ecoscore, timestamp = fila
+    return {
+        "id": id_,
+        "ecoscore": ecoscore,
+        "timestamp": timestamp,
+        "categoria": categoria_ecoscore(ecoscore),
+        "tendencia": tendencia_ecoscore(ecoscore, anterior),
+    }
+
+
+def formato_sse(evento, tipo="prediccion"):
+    """Evento -> bytes en formato text/event-stream."""
+    return b"event: " + tipo.encode() + b"\ndata: " + dumps(evento) + b"\n\n"
+
+
+COMENTARIO_SSE = b": ping\n\n"
+
+
+class Suscripcion:
+    """Cola acotada de eventos de un cliente."""
+
+    def __init__(self, max_pendientes=SSE_MAX_PENDIENTES):
+        self.cola = queue.Queue(maxsize=max_pendientes)
+        self.desbordada = False
+
+    def entregar(self, evento):
+        try:
+            self.cola.put_nowait(evento)
+        except queue.Full:
+            self.desbordada = True
+
+
+class SuscripcionAsync:
+    """Igual que `Suscripcion` para el despliegue ASGI: entrega en el event loop."""
+
+    def __init__(self, loop, max_pendientes=SSE_MAX_PENDIENTES):
+        self.loop = loop
+        self.cola = asyncio.Queue(maxsize=max_pendientes)
+        self.desbordada = False
+
+    def entregar(self, evento):
+        self.loop.call_soon_threadsafe(self._poner, evento)
+
+    def _poner(self, evento):
+        try:
+            self.cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            self.desbordada = True
+
+
+class CanalPredicciones:
+    """Difusión de eventos de predicción a los suscriptores activos."""
+
+    def __init__(self):
+        self._suscriptores = set()
+        self._lock = threading.Lock()
+        self._publicados = 0
+        self._desbordes = 0
+
+    def suscribir(self, entregar):
+        """Registrar `entregar(evento)`; se llama desde el hilo que escribe, no debe bloquear."""
+        with self._lock:
+            self._suscriptores.add(entregar)
+
+    def cancelar(self, entregar):
+        with self._lock:
+            self._suscriptores.discard(entregar)
+
+    def publicar(self, nuevas):
+        """Callback de `recientes.al_agregar`: [(fila, ecoscore_anterior), ...]."""
+        eventos = [evento_prediccion(fila, anterior) for fila, anterior in nuevas]
+        with self._lock:
+            suscriptores = list(self._suscriptores)
+            self._publicados += len(eventos)
+        for entregar in suscriptores:
+            for evento in eventos:
+                entregar(evento)
+
+    def registrar_desborde(self):
+        with self._lock:
+            self._desbordes += 1
+
+    def metricas(self):
+        with self._lock:
+            return {
+                "suscriptores": len(self._suscriptores),
+                "eventos_publicados": self._publicados,
+                "desbordes": self._desbordes,
+            }
+
+
+# ===== INSTANCIA COMPARTIDA =====
+canal = CanalPredicciones()
@@ -0,0 +1,163 @@
+"""
+Exportación masiva del histórico de predicciones en CSV o NDJSON.
+
+Todo es un generador de bloques de bytes: las filas se leen de SQLite con
+`yield_per` (EXPORTAR_TAM_BLOQUE filas por vez) y cada bloque se codifica y
+entrega antes de leer el siguiente, así la memoria no crece con el tamaño de
+la tabla. Con `gzip` se comprime sobre la marcha con un único compresor.
+
+El histórico sale completo y en orden (timestamp, id): los meses archivados
+(uno a la vez) se intercalan con SQLite por esa clave, así una ingesta de
+lecturas viejas sale en su lugar aunque tenga ids nuevos, y una fila que
+quedó en ambos lados sale una sola vez.
+
+Uso (desde la carpeta EcoWatcher):
+    python -m database.exportar --formato csv [--gzip] [--desde 2025-01-01] [--hasta ...] [--salida archivo]
+"""
+import io
+import csv
+import sys
+import heapq
+import time
+import zlib
+import argparse
+
+from sqlalchemy import select, func
+
+from config import FEATURE_ORDER, EXPORTAR_TAM_BLOQUE
+from database.db import engine_lectura
+from database.modelodb import Prediccion
+from database.archivo import meses_archivados
+from database.agregados import parsear_fecha
+from utils.json_rapido import dumps
+
+FORMATOS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+COLUMNAS = ["id", *FEATURE_ORDER, "ecoscore", "timestamp"]
+
+
+# ===== LECTURA POR BLOQUES =====
+def _clave(fila):
+    # (timestamp, id), el orden de /api/historico
+    return fila[-1], fila[0]
+
+
+def _filas_archivo(desde, hasta):
+    for df in meses_archivados(desde, hasta):
+        df = df.assign(timestamp=df["timestamp"].dt.strftime("%Y-%m-%d %H:%M:%S"))[COLUMNAS]
+        yield from df.itertuples(index=False, name=None)
+
+
+def _filas_sqlite(desde, hasta, tam_bloque):
+    stmt = select(
+        *(getattr(Prediccion, c) for c in COLUMNAS[:-1]),
+        func.strftime("%Y-%m-%d %H:%M:%S", Prediccion.timestamp),
+    )
+    if desde is not None:
+        stmt = stmt.where(Prediccion.timestamp >= desde)
+    if hasta is not None:
+        stmt = stmt.where(Prediccion.timestamp <= hasta)
+    stmt = stmt.order_by(Prediccion.timestamp, Prediccion.id)  # ix_predicciones_timestamp
+
+    with engine_lectura.connect() as conexion:
+        resultado = conexion.execution_options(yield_per=tam_bloque).execute(stmt)
+        for bloque in resultado.partitions():
+            yield from (tuple(fila) for fila in bloque)
+
+
+def bloques_filas(desde=None, hasta=None, incluir_archivo=True, tam_bloque=EXPORTAR_TAM_BLOQUE):
+    """Listas de tuplas en el orden de COLUMNAS, de a `tam_bloque` filas."""
+    fuentes = [_filas_sqlite(desde, hasta, tam_bloque)]
+    if incluir_archivo:
+        fuentes.insert(0, _filas_archivo(desde, hasta))
+
+    bloque = []
+    previa = None
+    for fila in heapq.merge(*fuentes, key=_clave):
+        clave = _clave(fila)
+        # Una interrupción entre archivar y borrar deja la fila en ambos lados
+        if clave == previa:
+            continue
+        previa = clave
+        bloque.append(fila)
+        if len(bloque) == tam_bloque:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
+
+
+# ===== CODIFICACIÓN =====
+def _codificar_csv(bloques):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator="\n")
+    escritor.writerow(COLUMNAS)
+    for bloque in bloques:
+        escritor.writerows(bloque)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _codificar_ndjson(bloques):
+    for bloque in bloques:
+        yield b"".join(dumps(dict(zip(COLUMNAS, fila))) + b"\n" for fila in bloque)
+
+
+def _comprimir(partes):
+    compresor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 = formato gzip
+    for parte in partes:
+        salida = compresor.compress(parte)
+        if salida:
+            yield salida
+    yield compresor.flush()
+
+
+def exportar(formato="csv", desde=None, hasta=None, comprimir=False, incluir_archivo=True):
+    """Generador de bytes con el histórico en `formato` (csv | ndjson), opcionalmente en gzip."""
+    if formato not in FORMATOS:
+        raise ValueError(f"formato debe ser uno de: {', '.join(FORMATOS)}")
+    bloques = bloques_filas(desde, hasta, incluir_archivo)
+    partes = _codificar_csv(bloques) if formato == "csv" else _codificar_ndjson(bloques)
+    return _comprimir(partes) if comprimir else partes
+
+
+def nombre_archivo(formato, comprimir=False):
+    return f"predicciones.{formato}" + (".gz" if comprimir else "")
+
+
+# ===== MAIN =====
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exportar el histórico de predicciones.")
+    parser.add_argument("--formato", choices=list(FORMATOS), default="csv")
+    parser.add_argument("--gzip", action="store_true", help="comprimir la salida")
+    parser.add_argument("--desde", help="fecha ISO (UTC), inclusive")
+    parser.add_argument("--hasta", help="fecha ISO (UTC), inclusive")
+    parser.add_argument("--sin-archivo", action="store_true", help="solo lo que queda en SQLite")
+    parser.add_argument("--salida", help="archivo de salida (por defecto stdout)")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    partes = exportar(
+        args.formato,
+        parsear_fecha(args.desde),
+        parsear_fecha(args.hasta),
+        args.gzip,
+        not args.sin_archivo,
+    )
+    destino = open(args.salida, "wb") if args.salida else sys.stdout.buffer
+    total = 0
+    try:
+        for parte in partes:
+            destino.write(parte)
+            total += len(parte)
+    finally:
+        if args.salida:
+            destino.close()
+
+    segundos = time.perf_counter() - inicio
+    print(f"[EXPORTAR] {total / 2**20:.1f} MB escritos en {segundos:.1f} s", file=sys.stderr)
@@ -0,0 +1,101 @@
+"""
+Ingesta masiva de lecturas crudas desde CSV (backfill del histórico).
+
+El CSV se lee por bloques de INGESTA_TAM_BLOQUE filas. Cada bloque:
+
+1. limpia las columnas numéricas como `clean_numeric_columns` (coma decimal,
+   texto -> NaN) y descarta filas incompletas o no finitas
+2. normaliza y predice el bloque entero como matriz con el pipeline vigente
+3. inserta todas sus filas y actualiza los agregados (groupby por intervalo)
+   en una sola transacción
+
+Si el CSV trae columna de tiempo se respeta (ISO; con zona se pasa a UTC);
+si no, todas las filas quedan con la hora de la ingesta.
+
+Uso (desde la carpeta EcoWatcher):
+    python -m database.ingesta data/bogota_sin_procesar.csv [--columna-tiempo timestamp] [--tam-bloque 50000]
+"""
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from config import FEATURE_ORDER, INGESTA_TAM_BLOQUE
+from database.db import SessionLocal, init_db
+from database.sqlite import con_reintentos
+from database.escritor import ahora_utc
+from database.agregados import insertar_predicciones_df
+from inferencia.registro import registro as registro_modelos
+from preprocesamiento_datos.preprocesador_datos import clean_numeric_columns
+
+
+def preparar_bloque(df, columna_tiempo="timestamp"):
+    """
+    Limpiar un bloque crudo. Devuelve (DataFrame con FEATURE_ORDER y
+    timestamp, filas descartadas).
+    """
+    df = clean_numeric_columns(df, FEATURE_ORDER)
+
+    if columna_tiempo in df.columns:
+        tiempo = pd.to_datetime(df[columna_tiempo], errors="coerce", utc=True)
+        tiempo = tiempo.dt.tz_localize(None).dt.floor("s")
+    else:
+        tiempo = pd.Series(pd.Timestamp(ahora_utc()), index=df.index)
+
+    limpio = df[FEATURE_ORDER].astype(float)
+    limpio["timestamp"] = tiempo
+    validas = np.isfinite(limpio[FEATURE_ORDER].to_numpy()).all(axis=1) & tiempo.notna().to_numpy()
+    return limpio[validas], int((~validas).sum())
+
+
+def ingestar_bloque(df):
+    """Predecir e insertar un bloque ya limpio (una transacción). Devuelve las filas insertadas."""
+    if df.empty:
+        return 0
+
+    X = df[FEATURE_ORDER].to_numpy()
+    registros = df.assign(ecoscore=np.round(registro_modelos.pipeline.predict_batch(X), 3))
+
+    def guardar():
+        db = SessionLocal()
+        try:
+            insertar_predicciones_df(db, registros)
+            db.commit()
+        finally:
+            db.close()
+
+    con_reintentos(guardar)
+    return len(registros)
+
+
+def ingestar(ruta, columna_tiempo="timestamp", tam_bloque=INGESTA_TAM_BLOQUE):
+    """Ingestar un CSV completo. Devuelve (insertadas, descartadas, segundos)."""
+    init_db()
+    inicio = time.perf_counter()
+    insertadas = descartadas = 0
+
+    for bloque in pd.read_csv(ruta, chunksize=tam_bloque, dtype=str):
+        limpio, n_descartadas = preparar_bloque(bloque, columna_tiempo)
+        insertadas += ingestar_bloque(limpio)
+        descartadas += n_descartadas
+
+        segundos = time.perf_counter() - inicio
+        print(f"[INGESTA] {insertadas} filas insertadas ({insertadas / segundos:,.0f} filas/s)")
+
+    return insertadas, descartadas, time.perf_counter() - inicio
+
+
+# ===== MAIN =====
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingestar lecturas crudas desde un CSV.")
+    parser.add_argument("ruta", help="CSV con las 7 variables (y opcionalmente timestamp)")
+    parser.add_argument("--columna-tiempo", default="timestamp", help="columna con la fecha de cada lectura")
+    parser.add_argument("--tam-bloque", type=int, default=INGESTA_TAM_BLOQUE, help="filas por bloque y transacción")
+    args = parser.parse_args()
+
+    insertadas, descartadas, segundos = ingestar(args.ruta, args.columna_tiempo, args.tam_bloque)
+    print(
+        f"Total: {insertadas} filas insertadas, {descartadas} descartadas, "
+        f"{segundos:.1f} s ({insertadas / max(segundos, 1e-9):,.0f} filas/s)"
+    )
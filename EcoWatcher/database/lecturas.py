@@ -0,0 +1,173 @@
+"""
+Camino de lectura liviano para las APIs de histórico.
+
+Consultas Core sobre el motor de lectura que devuelven tuplas
+(id, ecoscore, timestamp) sin crear sesiones ni objetos ORM. El timestamp
+sale ya formateado desde SQLite (`strftime` en la propia consulta), así no
+se llama a `datetime.strftime` fila por fila en Python.
+
+El orden del histórico es (timestamp, id), no el id: una ingesta de
+`database/ingesta.py` agrega lecturas viejas con ids nuevos. Los cursores de
+paginación (`before`, `since`) llevan esa misma clave, y las filas de SQLite
+y las del archivo (`leer_archivo`) se intercalan por ella.
+
+La consulta se construye aparte (`consulta_historico`) para que el
+despliegue ASGI (`asgi.py`) ejecute exactamente la misma sentencia con el
+driver asíncrono. La última predicción sale del buffer de
+`database/recientes.py`, no de una consulta.
+"""
+from datetime import datetime
+
+from sqlalchemy import select, func, literal, tuple_
+
+from config import HISTORICO_MAX_LIMIT
+from database.db import engine_lectura
+from database.modelodb import Prediccion
+from database.archivo import leer_archivo
+from database.agregados import parsear_fecha
+
+FORMATO_TIMESTAMP = "%Y-%m-%d %H:%M:%S"
+ERROR_PARAMETROS_HISTORICO = (
+    "Parámetros inválidos; fechas en formato ISO (YYYY-MM-DD[ HH:MM:SS]) "
+    "y cursores before/since tal como los devuelve la API"
+)
+
+COLUMNAS = (
+    Prediccion.id,
+    Prediccion.ecoscore,
+    func.strftime(FORMATO_TIMESTAMP, Prediccion.timestamp).label("timestamp"),
+)
+CLAVE = tuple_(Prediccion.timestamp, Prediccion.id)
+
+
+# ===== CLAVE DE ORDEN Y CURSORES =====
+def clave(fila):
+    """(timestamp "YYYY-MM-DD HH:MM:SS", id) de un dict de respuesta."""
+    return fila["timestamp"], fila["id"]
+
+
+def formato_cursor(clave_fila):
+    """(timestamp, id) -> cursor de la API, p. ej. "2026-01-31T23:59:00_1234"."""
+    timestamp, id_ = clave_fila
+    return f"{timestamp.replace(' ', 'T')}_{id_}"
+
+
+def parsear_cursor(texto):
+    """Cursor de la API -> (timestamp, id). ValueError si es inválido."""
+    timestamp, _, id_ = texto.rpartition("_")
+    fecha = datetime.strptime(timestamp.replace("T", " "), FORMATO_TIMESTAMP)
+    return fecha.strftime(FORMATO_TIMESTAMP), int(id_)
+
+
+def _valor_clave(clave_fila):
+    # Mismo tipo que la columna: el timestamp se compara con su texto almacenado
+    timestamp, id_ = clave_fila
+    return tuple_(
+        literal(datetime.strptime(timestamp, FORMATO_TIMESTAMP), Prediccion.timestamp.type),
+        literal(id_),
+    )
+
+
+# ===== CONSULTAS =====
+def consulta_historico(limite, antes=None, despues=None, desde=None, hasta=None):
+    """
+    SELECT de (id, ecoscore, timestamp) con los filtros de /api/historico:
+    descendente por (timestamp, id), o ascendente desde la clave `despues`.
+    """
+    stmt = select(*COLUMNAS)
+    if antes is not None:
+        stmt = stmt.where(CLAVE < _valor_clave(antes))
+    if despues is not None:
+        stmt = stmt.where(CLAVE > _valor_clave(despues))
+    if desde is not None:
+        stmt = stmt.where(Prediccion.timestamp >= desde)
+    if hasta is not None:
+        stmt = stmt.where(Prediccion.timestamp <= hasta)
+
+    if despues is not None:
+        orden = (Prediccion.timestamp.asc(), Prediccion.id.asc())
+    else:
+        orden = (Prediccion.timestamp.desc(), Prediccion.id.desc())
+    return stmt.order_by(*orden).limit(limite)
+
+
+def leer_historico(limite, antes=None, despues=None, desde=None, hasta=None, engine=engine_lectura):
+    """Filas (id, ecoscore, timestamp) de `predicciones` según `consulta_historico`."""
+    with engine.connect() as conexion:
+        return conexion.execute(consulta_historico(limite, antes, despues, desde, hasta)).all()
+
+
+# ===== RESPUESTAS =====
+def como_dicts(filas):
+    """Tuplas (id, ecoscore, timestamp) -> dicts de la respuesta JSON."""
+    return [{"id": i, "ecoscore": e, "timestamp": t} for i, e, t in filas]
+
+
+def fila_archivada(r):
+    """Fila de `leer_archivo` (timestamp datetime) -> dict de la respuesta JSON."""
+    return {"id": r["id"], "ecoscore": r["ecoscore"], "timestamp": r["timestamp"].strftime(FORMATO_TIMESTAMP)}
+
+
+def parametros_historico(args):
+    """
+    (limit, antes, despues, desde, hasta) desde los query params (cualquier
+    mapeo con `.get`); `antes` y `despues` son claves (timestamp, id) de los
+    cursores `before` y `since`. ValueError si alguno es inválido.
+    """
+    limit = max(1, min(int(args.get("limit", 20)), HISTORICO_MAX_LIMIT))
+    antes = args.get("before")
+    despues = args.get("since")
+    return (
+        limit,
+        parsear_cursor(antes) if antes else None,
+        parsear_cursor(despues) if despues else None,
+        parsear_fecha(args.get("from")),
+        parsear_fecha(args.get("to")),
+    )
+
+
+def respuesta_historico(filas, limit, antes=None, despues=None, desde=None, hasta=None):
+    """
+    Cuerpo de /api/historico a partir de las filas de SQLite, intercaladas
+    por (timestamp, id) con las del archivo que caen en la misma página.
+    """
+    data = como_dicts(filas)
+    ascendente = despues is not None
+
+    # Si SQLite llenó la página, del archivo solo pueden entrar filas entre el
+    # cursor y la última fila de la página (el índice descarta los demás meses)
+    borde = clave(data[-1]) if len(data) == limit else None
+    if ascendente:
+        archivadas = leer_archivo(
+            antes=borde or antes, despues=despues, desde=desde, hasta=hasta, limite=limit, ascendente=True,
+        )
+    else:
+        archivadas = leer_archivo(antes=antes, despues=borde, desde=desde, hasta=hasta, limite=limit)
+
+    if archivadas:
+        # Un archivado interrumpido antes del DELETE deja filas en ambos lados
+        ids = {f["id"] for f in data}
+        data += [fila_archivada(r) for r in archivadas if r["id"] not in ids]
+        data.sort(key=clave, reverse=not ascendente)
+        del data[limit:]
+    if ascendente:
+        data.reverse()
+
+    return {
+        "historico": data,
+        "next_before": formato_cursor(clave(data[-1])) if len(data) == limit else None,
+        "newest": formato_cursor(clave(data[0])) if data else (formato_cursor(despues) if despues else None),
+    }
+
+
+def respuesta_ultimo(fila):
+    """
+    Cuerpo de /api/ultimo: la fila con mayor (timestamp, id) entre la última
+    de SQLite y el archivo (solo se abre un mes si el índice la supera).
+    """
+    archivadas = leer_archivo(despues=(fila[2], fila[0]) if fila else None, limite=1)
+    if archivadas:
+        return fila_archivada(archivadas[0])
+    if fila:
+        return como_dicts([fila])[0]
+    return {"status": "sin_datos"}
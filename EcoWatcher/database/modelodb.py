@@ -1,7 +1,16 @@
-from sqlalchemy import Column, Integer, Float, DateTime
+from sqlalchemy import Column, Integer, Float, DateTime, String
+from sqlalchemy.dialects.sqlite import DATETIME
 from sqlalchemy.sql import func
 from .db import Base
 
+# Mismo texto que CURRENT_TIMESTAMP ("YYYY-MM-DD HH:MM:SS"): las filas con valor
+# por defecto y las que traen timestamp desde Python se comparan igual en los
+# filtros por rango sobre el índice.
+TIMESTAMP_SQLITE = DATETIME(
+    timezone=True,
+    storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d",
+)
+
 
 class Prediccion(Base):
     __tablename__ = "predicciones"
@@ -21,4 +30,54 @@ class Prediccion(Base):
     ecoscore = Column(Float, nullable=False)
 
     # ===== CUÁNDO SE PRODUJO LA PREDICCIÓN =====
+    timestamp = Column(TIMESTAMP_SQLITE, server_default=func.now(), index=True)
+
+
+class ComparacionSombra(Base):
+    __tablename__ = "comparaciones_sombra"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # ===== ORIGEN =====
+    modelo = Column(String, nullable=False, index=True)
+    fuente = Column(String, nullable=False)
+    n_filas = Column(Integer, nullable=False)
+
+    # ===== SCORES (promedio del lote) =====
+    ecoscore_vivo = Column(Float, nullable=False)
+    ecoscore_sombra = Column(Float, nullable=False)
+
+    # ===== DIFERENCIAS (sombra - vivo) =====
+    delta_medio = Column(Float, nullable=False)
+    delta_abs_medio = Column(Float, nullable=False)
+    delta_abs_max = Column(Float, nullable=False)
+
+    # ===== LATENCIA DEL MODELO SOMBRA =====
+    latencia_ms = Column(Float, nullable=False)
+
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class AgregadoEcoscore(Base):
+    """Resumen incremental de `predicciones` por intervalo de tiempo (minuto, hora o día)."""
+
+    __tablename__ = "agregados_ecoscore"
+
+    # ===== INTERVALO =====
+    granularidad = Column(String(8), primary_key=True)  # "minute" | "hour" | "day"
+    inicio = Column(String(19), primary_key=True)  # "YYYY-MM-DD HH:MM:SS" (UTC)
+
+    # ===== ECOSCORE =====
+    n = Column(Integer, nullable=False)
+    suma = Column(Float, nullable=False)
+    minimo = Column(Float, nullable=False)
+    maximo = Column(Float, nullable=False)
+
+    # ===== SUMAS POR VARIABLE (media = suma / n) =====
+    suma_ha_verdes_km2 = Column(Float, nullable=False)
+    suma_cobertura_arbolado_pct = Column(Float, nullable=False)
+    suma_pm25 = Column(Float, nullable=False)
+    suma_pm10 = Column(Float, nullable=False)
+    suma_residuos_no_gestionados = Column(Float, nullable=False)
+    suma_porcentaje_reciclaje = Column(Float, nullable=False)
+    suma_porcentaje_transporte_limpio = Column(Float, nullable=False)
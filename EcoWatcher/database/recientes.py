@@ -0,0 +1,207 @@
+"""
+Buffer en memoria de las predicciones más recientes.
+
+Guarda las últimas RECIENTES_CAPACIDAD filas (id, ecoscore, timestamp) en
+orden (timestamp, id), el mismo de `database/lecturas.py`. Se siembra desde
+la base al arrancar y se completa con cada escritura confirmada (el
+escritor diferido y /api/predict?guardar=1 avisan después del commit), así
+/api/ultimo y /api/historico con límites pequeños no consultan SQLite.
+
+Si otro proceso escribe en la base (otro worker, la ingesta, el archivo) el
+archivo -wal cambia sin pasar por este buffer: cada lectura compara su
+tamaño y fecha (un `stat`, no una consulta) y vuelve a sembrar si difieren.
+
+Cada fila nueva, propia o detectada al volver a sembrar, se avisa a los
+suscriptores de `al_agregar` (el canal SSE de `database/eventos.py`). Solo
+cuentan como nuevas las posteriores a la última conocida: una ingesta de
+lecturas viejas cambia la ventana pero no se avisa como predicciones nuevas.
+"""
+import os
+import bisect
+import threading
+
+from config import RECIENTES_CAPACIDAD
+from database.db import DB_PATH
+from database.lecturas import leer_historico, FORMATO_TIMESTAMP
+from database.archivo import leer_indice
+
+
+class BufferRecientes:
+    """
+    Ventana acotada y thread-safe de las últimas `capacidad` predicciones.
+
+    Mientras la tabla tenga menos filas que `capacidad` y no haya nada
+    archivado el buffer contiene todo el histórico (`completo`) y cualquier
+    consulta sin filtros de fecha se responde desde memoria; después solo las
+    que caen dentro de la ventana.
+    """
+
+    def __init__(self, capacidad, db_path):
+        self.capacidad = capacidad
+        self._rutas = (f"{db_path}-wal", db_path)
+        self._claves = []  # (timestamp, id) de cada fila, ordenadas
+        self._filas = []
+        self._completo = False
+        self._firma = None
+        self._lock = threading.Lock()
+        self._al_agregar = []
+
+        # ===== MÉTRICAS =====
+        self._aciertos = 0
+        self._fallos = 0
+        self._siembras = 0
+
+    def al_agregar(self, funcion):
+        """Registrar `funcion(nuevas)`, con `nuevas` = [(fila, ecoscore_anterior), ...] en orden (timestamp, id)."""
+        self._al_agregar.append(funcion)
+
+    def _avisar(self, nuevas):
+        if not nuevas:
+            return
+        for funcion in self._al_agregar:
+            try:
+                funcion(nuevas)
+            except Exception as e:
+                print(f"[RECIENTES] Error en aviso de filas nuevas: {e}")
+
+    # ===== CARGA =====
+    def _firma_disco(self):
+        for ruta in self._rutas:
+            try:
+                st = os.stat(ruta)
+                return (ruta, st.st_mtime_ns, st.st_size)
+            except FileNotFoundError:
+                continue
+        return None
+
+    def sembrar(self):
+        """Recargar la ventana desde la base (las `capacidad` filas más recientes)."""
+        firma = self._firma_disco()
+        filas = leer_historico(self.capacidad)
+        filas = [tuple(f) for f in reversed(filas)]
+        claves = [_clave(f) for f in filas]
+        completo = len(filas) < self.capacidad and not leer_indice()
+        with self._lock:
+            nuevas = []
+            if self._firma is not None:
+                # Filas que escribió otro proceso después de la última conocida
+                ultima = self._claves[-1] if self._claves else None
+                anterior = self._filas[-1][1] if self._filas else None
+                for clave, fila in zip(claves, filas):
+                    if ultima is None or clave > ultima:
+                        nuevas.append((fila, anterior))
+                        anterior = fila[1]
+
+            self._filas = filas
+            self._claves = claves
+            self._completo = completo
+            self._firma = firma
+            self._siembras += 1
+        self._avisar(nuevas)
+
+    def revisar(self):
+        """Volver a sembrar si la base cambió por fuera de este proceso."""
+        if self._firma is None or self._firma_disco() != self._firma:
+            self.sembrar()
+
+    def agregar(self, registros, ids):
+        """Sumar filas recién confirmadas (dicts con ecoscore y timestamp datetime, y sus ids)."""
+        nuevas = [
+            (id_, r["ecoscore"], r["timestamp"].strftime(FORMATO_TIMESTAMP))
+            for id_, r in zip(ids, registros)
+        ]
+        if not nuevas:
+            return
+        avisos = []
+        with self._lock:
+            if self._firma is None:
+                return  # sin sembrar: la primera lectura cargará todo desde la base
+            for fila in nuevas:
+                clave = _clave(fila)
+                if not self._claves or clave > self._claves[-1]:
+                    i = len(self._claves)
+                    self._claves.append(clave)
+                    self._filas.append(fila)
+                else:
+                    # Commits concurrentes pueden llegar fuera de orden
+                    i = bisect.bisect_left(self._claves, clave)
+                    if i < len(self._claves) and self._claves[i] == clave:
+                        continue  # ya la trajo una siembra: no duplicar ni volver a avisar
+                    if i == 0 and not self._completo:
+                        continue  # anterior a la ventana: no es de las recientes
+                    self._claves.insert(i, clave)
+                    self._filas.insert(i, fila)
+                avisos.append((fila, self._filas[i - 1][1] if i > 0 else None))
+
+            sobrante = len(self._filas) - self.capacidad
+            if sobrante > 0:
+                del self._claves[:sobrante]
+                del self._filas[:sobrante]
+                self._completo = False
+            # Este cambio del -wal es propio; no hace falta volver a sembrar
+            self._firma = self._firma_disco()
+        self._avisar(avisos)
+
+    # ===== CONSULTAS =====
+    def ultimo(self):
+        """Última fila (id, ecoscore, timestamp) o None si la tabla está vacía."""
+        self.revisar()
+        with self._lock:
+            self._aciertos += 1
+            return self._filas[-1] if self._filas else None
+
+    def ultimo_y_anterior(self):
+        """(última fila, ecoscore de la anterior o None), o None si la tabla está vacía."""
+        self.revisar()
+        with self._lock:
+            if not self._filas:
+                return None
+            return self._filas[-1], self._filas[-2][1] if len(self._filas) > 1 else None
+
+    def historico(self, limite, antes=None, despues=None):
+        """
+        Mismas filas que `leer_historico` sin filtros de fecha (claves
+        (timestamp, id) `antes` / `despues`), o None si la ventana no alcanza a
+        cubrir la consulta (hay que ir a la base).
+        """
+        self.revisar()
+        with self._lock:
+            claves = self._claves
+            fin = bisect.bisect_left(claves, antes) if antes is not None else len(claves)
+
+            if despues is not None:
+                # Todas las filas posteriores a `despues` deben estar en la ventana
+                if self._completo or (claves and despues >= claves[0]):
+                    inicio = bisect.bisect_right(claves, despues)
+                    self._aciertos += 1
+                    return self._filas[inicio:min(fin, inicio + limite)]
+            else:
+                inicio = max(0, fin - limite)
+                if fin - inicio == limite or self._completo:
+                    self._aciertos += 1
+                    return self._filas[inicio:fin][::-1]
+
+            self._fallos += 1
+            return None
+
+    def metricas(self):
+        with self._lock:
+            consultas = self._aciertos + self._fallos
+            return {
+                "capacidad": self.capacidad,
+                "filas": len(self._filas),
+                "completo": self._completo,
+                "aciertos": self._aciertos,
+                "fallos": self._fallos,
+                "tasa_aciertos": self._aciertos / consultas if consultas else None,
+                "siembras": self._siembras,
+            }
+
+
+def _clave(fila):
+    # (id, ecoscore, timestamp) -> (timestamp, id), el orden de `leer_historico`
+    return fila[2], fila[0]
+
+
+# ===== INSTANCIA COMPARTIDA =====
+recientes = BufferRecientes(RECIENTES_CAPACIDAD, DB_PATH)
@@ -0,0 +1,115 @@
+"""
+Configuración de almacenamiento SQLite.
+
+Crea los motores de EcoWatcher.db y usuarios.db con pragmas aplicados en cada
+conexión nueva:
+
+- journal_mode=WAL: los lectores no bloquean al escritor ni al revés
+- synchronous=NORMAL: en WAL no se pierde consistencia y se evita un fsync por commit
+- busy_timeout: esperar al lock en lugar de fallar al instante
+- mmap_size / cache_size: lecturas servidas desde memoria
+
+Lecturas y escrituras usan motores (y pools) separados: SQLite admite un solo
+escritor, así que el pool de escritura es pequeño y las escrituras se
+serializan casi por completo dentro del propio proceso; el de lectura admite
+varias conexiones con `query_only` activado. El despliegue ASGI usa un
+tercer motor de lectura asíncrono (aiosqlite) con los mismos pragmas.
+"""
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+
+from config import (
+    SQLITE_BUSY_TIMEOUT_MS, SQLITE_SYNCHRONOUS, SQLITE_MMAP_MB, SQLITE_CACHE_MB,
+    SQLITE_POOL_LECTURA, SQLITE_REINTENTOS,
+)
+
+
+def _aplicar_pragmas(lectura):
+    def al_conectar(conexion, _registro):
+        cursor = conexion.cursor()
+        if not lectura:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA mmap_size={int(SQLITE_MMAP_MB) * 1024 * 1024}")
+        cursor.execute(f"PRAGMA cache_size=-{int(SQLITE_CACHE_MB) * 1024}")  # negativo = KiB
+        if lectura:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+    return al_conectar
+
+
+def crear_motor(db_path, lectura=False):
+    """
+    Motor SQLAlchemy para `db_path` con los pragmas de EcoWatcher.
+
+    Args:
+        lectura: motor de solo lectura (pool amplio, query_only) en lugar del
+            de escritura (pool pequeño)
+    """
+    if lectura:
+        pool = {"pool_size": SQLITE_POOL_LECTURA, "max_overflow": SQLITE_POOL_LECTURA * 2}
+    else:
+        # Una conexión habitual; el desborde cubre sesiones anidadas (p. ej. CRUD de usuarios)
+        pool = {"pool_size": 1, "max_overflow": 4, "pool_timeout": 30}
+
+    engine = create_engine(
+        f"sqlite:///{db_path}",
+        echo=False,
+        future=True,
+        connect_args={
+            "check_same_thread": False,
+            "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000.0,
+        },
+        **pool,
+    )
+    event.listen(engine, "connect", _aplicar_pragmas(lectura))
+    return engine
+
+
+def crear_motor_async(db_path):
+    """
+    Motor asíncrono de solo lectura (aiosqlite) con los mismos pragmas.
+
+    Dependencia opcional: solo lo usa el despliegue ASGI (`asgi.py`) y
+    requiere `aiosqlite` y `sqlalchemy[asyncio]`.
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{db_path}",
+        echo=False,
+        connect_args={"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000.0},
+        pool_size=SQLITE_POOL_LECTURA,
+        max_overflow=SQLITE_POOL_LECTURA * 2,
+    )
+    event.listen(engine.sync_engine, "connect", _aplicar_pragmas(lectura=True))
+    return engine
+
+
+def es_bloqueo(error):
+    """True si el OperationalError es un 'database is locked' / 'busy'."""
+    texto = str(getattr(error, "orig", error)).lower()
+    return "database is locked" in texto or "database is busy" in texto
+
+
+def con_reintentos(operacion, intentos=SQLITE_REINTENTOS, espera_inicial=0.05):
+    """
+    Ejecutar `operacion()` reintentando con espera exponencial si SQLite
+    responde 'database is locked' después de agotar el busy_timeout.
+
+    `operacion` debe abrir y cerrar su propia sesión para que cada intento
+    empiece una transacción limpia.
+    """
+    espera = espera_inicial
+    for intento in range(intentos):
+        try:
+            return operacion()
+        except OperationalError as e:
+            if not es_bloqueo(e) or intento == intentos - 1:
+                raise
+            print(f"[SQLITE] Base bloqueada, reintento {intento + 1}/{intentos - 1} en {espera:.2f} s")
+            time.sleep(espera)
+            espera *= 2
@@ -1,15 +1,16 @@
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
 
+from database.sqlite import crear_motor
+
 # ===== RUTA =====
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
 # ===== ARCHIVO DE BASE DE DATOS =====
 DB_PATH = os.path.join(BASE_DIR, "data", "usuarios.db")
 
-# ===== MOTOR DE BASE DE DATOS =====
-engine = create_engine(f"sqlite:///{DB_PATH}", echo=False, future=True)
+# ===== MOTOR DE BASE DE DATOS (WAL, busy_timeout) =====
+engine = crear_motor(DB_PATH)
 
 # ===== SESIÓN =====
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -0,0 +1 @@
+# Archivo vacío para marcar inferencia como paquete
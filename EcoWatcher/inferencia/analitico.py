@@ -0,0 +1,106 @@
+"""
+Motor analítico del ecoscore (modo degradado).
+
+El ecoscore objetivo de `preprocesador_datos.compute_ecoscore_0_500` es una
+suma ponderada de las variables normalizadas con `ECO_WEIGHTS`, invirtiendo
+las variables donde más es peor. Reescrita como ``X @ coef + intercepto`` se
+evalúa con un solo producto punto, sin recorrer árboles.
+
+Se usa cuando se pide explícitamente (`motor=analitico`) o cuando el
+despachador está saturado. El residuo frente al bosque se acumula en cada
+predicción del bosque para saber cuándo el modo degradado es aceptable.
+"""
+import threading
+
+import numpy as np
+
+from config import FEATURE_ORDER, ANALITICO_TOLERANCIA
+from preprocesamiento_datos.preprocesador_datos import ECO_WEIGHTS, NEGATIVE_FEATURES
+
+ESCALA = 500.0
+
+
+class MotorAnalitico:
+    """
+    Ecoscore lineal cerrado sobre la matriz ya normalizada (N×F).
+
+    Args:
+        pesos: dict variable -> peso (ECO_WEIGHTS)
+        negativas: variables que se invierten (1 - x)
+        feature_order: orden de las columnas de X
+        tolerancia: residuo absoluto medio máximo para considerar aceptable el modo degradado
+    """
+
+    def __init__(self, pesos, negativas, feature_order, tolerancia=15.0):
+        self.feature_order = list(feature_order)
+        self.tolerancia = tolerancia
+
+        # w·(1 - x) = w - w·x  ->  coeficiente -w y w al intercepto
+        signos = np.array([-1.0 if f in negativas else 1.0 for f in self.feature_order])
+        pesos_vec = np.array([pesos.get(f, 0.0) for f in self.feature_order])
+        self.coef = ESCALA * signos * pesos_vec
+        self.intercepto = ESCALA * float(pesos_vec[signos < 0].sum())
+
+        # ===== RESIDUO FRENTE AL BOSQUE =====
+        self._lock = threading.Lock()
+        self._n = 0
+        self._suma = 0.0
+        self._suma_abs = 0.0
+        self._suma_cuad = 0.0
+        self._max_abs = 0.0
+
+        # ===== USO =====
+        self._usos_pedidos = 0
+        self._usos_sobrecarga = 0
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        return np.clip(X @ self.coef + self.intercepto, 0.0, ESCALA)
+
+    def contar_uso(self, sobrecarga=False):
+        """Contar una predicción servida por este motor (pedida o por sobrecarga)."""
+        with self._lock:
+            if sobrecarga:
+                self._usos_sobrecarga += 1
+            else:
+                self._usos_pedidos += 1
+
+    # ===== RESIDUO =====
+    def registrar_residuo(self, X, scores_bosque):
+        """
+        Acumular (analítico - bosque) para las filas que ya evaluó el bosque.
+        Las filas con NaN/inf se descartan para no contaminar las métricas.
+        """
+        delta = self.predict(X) - np.asarray(scores_bosque, dtype=float).ravel()
+        delta = delta[np.isfinite(delta)]
+        if not len(delta):
+            return
+        abs_delta = np.abs(delta)
+        with self._lock:
+            self._n += len(delta)
+            self._suma += float(delta.sum())
+            self._suma_abs += float(abs_delta.sum())
+            self._suma_cuad += float((delta * delta).sum())
+            self._max_abs = max(self._max_abs, float(abs_delta.max()))
+
+    def metricas(self):
+        with self._lock:
+            n = self._n
+            abs_medio = self._suma_abs / n if n else None
+            return {
+                "usos_pedidos": self._usos_pedidos,
+                "usos_sobrecarga": self._usos_sobrecarga,
+                "filas_comparadas": n,
+                "residuo_medio": self._suma / n if n else None,
+                "residuo_abs_medio": abs_medio,
+                "residuo_rmse": float(np.sqrt(self._suma_cuad / n)) if n else None,
+                "residuo_abs_max": self._max_abs if n else None,
+                "tolerancia": self.tolerancia,
+                "aceptable": abs_medio <= self.tolerancia if n else None,
+            }
+
+
+# ===== INSTANCIA COMPARTIDA =====
+motor_analitico = MotorAnalitico(ECO_WEIGHTS, NEGATIVE_FEATURES, FEATURE_ORDER, ANALITICO_TOLERANCIA)
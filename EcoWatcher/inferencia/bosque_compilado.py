@@ -0,0 +1,316 @@
+"""
+Motor de inferencia compilado para el RandomForest del ecoscore.
+
+Convierte los árboles entrenados por modelo/entrenador_de_modelo.py en
+arreglos NumPy contiguos (feature, threshold, left, right, value) y los
+recorre de forma vectorizada, sin la validación de entrada ni el despacho
+por estimador de sklearn.
+
+El recorrido gana en lotes chicos (la latencia de cada petición), pero en
+lotes de miles de filas el código compilado de sklearn es más rápido: con
+`usar_estimador` los lotes grandes se delegan al RandomForest original, que
+se deserializa recién con el primer lote que llega al umbral (los procesos
+que solo ven peticiones chicas nunca lo cargan).
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+import numpy as np
+from joblib import dump, load
+
+
+# ===== CONSTANTES =====
+TREE_LEAF = -1  # marcador de hoja en sklearn (children_left == -1)
+TAMANO_BLOQUE = 256  # filas por pasada; mantiene los intermedios en caché
+
+
+def hash_archivo(path):
+    """SHA-256 de un archivo (identifica el .pkl del que se compiló el bosque)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def guardar_atomico(datos, path):
+    """
+    joblib.dump sin comprimir a un temporal propio de este escritor y
+    os.replace sobre `path` (dos procesos no comparten el mismo .tmp).
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            dump(datos, f)
+        os.replace(temporal, path)
+    except BaseException:
+        try:
+            os.remove(temporal)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+@contextmanager
+def bloqueo_construccion(path):
+    """
+    Bloqueo exclusivo entre procesos sobre `path`.lock mientras se reconstruye
+    el artefacto: los workers que arrancan a la vez esperan al primero y
+    después cargan lo que él escribió en lugar de compilar cada uno.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(path.name + ".lock"), "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class BosqueCompilado:
+    """
+    Bosque de árboles de regresión aplanado en arreglos contiguos.
+
+    Todos los nodos de todos los árboles viven en los mismos arreglos; las
+    hojas apuntan a sí mismas, de modo que el recorrido avanza `profundidad`
+    pasos sin ramas y termina con cada árbol detenido en su hoja.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, raices, profundidad,
+                 n_features, origen=None, hijos=None, umbral32=None):
+        self.feature = np.ascontiguousarray(feature, dtype=np.intp)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.left = np.ascontiguousarray(left, dtype=np.intp)
+        self.right = np.ascontiguousarray(right, dtype=np.intp)
+        self.value = np.ascontiguousarray(value, dtype=np.float64)
+        self.raices = np.ascontiguousarray(raices, dtype=np.intp)
+        self.profundidad = int(profundidad)
+        self.n_features_in_ = int(n_features)
+        self.origen = origen
+        self.estimador = None
+        self.umbral_estimador = None
+        self._lock_estimador = threading.Lock()
+
+        # Hijos intercalados [derecho, izquierdo]: el salto es hijos[2 * nodo + (x <= umbral)]
+        if hijos is None:
+            hijos = np.stack([self.right, self.left], axis=1).ravel()
+        self._hijos = np.ascontiguousarray(hijos, dtype=np.intp)
+
+        # sklearn compara x (float32) contra el umbral en float64; redondear el
+        # umbral hacia abajo a float32 da exactamente la misma decisión.
+        if umbral32 is None:
+            umbral32 = self.threshold.astype(np.float32)
+            excede = umbral32.astype(np.float64) > self.threshold
+            umbral32[excede] = np.nextafter(umbral32[excede], np.float32(-np.inf))
+        self._umbral32 = np.ascontiguousarray(umbral32, dtype=np.float32)
+
+    @property
+    def n_arboles(self):
+        return len(self.raices)
+
+    @property
+    def n_nodos(self):
+        return len(self.feature)
+
+    def usar_estimador(self, estimador, umbral):
+        """
+        Delegar en `estimador` (el RandomForest de sklearn, o la ruta de su
+        .pkl para cargarlo con el primer lote grande) los lotes de `umbral`
+        filas o más.
+        """
+        self.estimador = estimador
+        self.umbral_estimador = umbral
+
+    def _estimador_cargado(self):
+        if isinstance(self.estimador, (str, os.PathLike)):
+            with self._lock_estimador:
+                path = self.estimador
+                if isinstance(path, (str, os.PathLike)):
+                    # Si el .pkl ya no es el que se compiló (reentrenamiento en
+                    # curso) se sigue con el bosque: mismas predicciones
+                    if self.origen is not None and hash_archivo(path) != self.origen:
+                        self.estimador = None
+                    else:
+                        self.estimador = load(path)
+        return self.estimador
+
+    # ===== COMPILACIÓN =====
+    @classmethod
+    def desde_sklearn(cls, modelo, origen=None):
+        """Compilar un RandomForestRegressor (o DecisionTreeRegressor) entrenado."""
+        estimadores = getattr(modelo, "estimators_", [modelo])
+
+        features, thresholds, lefts, rights, values, raices = [], [], [], [], [], []
+        desplazamiento = 0
+        profundidad = 0
+
+        for est in estimadores:
+            arbol = est.tree_
+            n = arbol.node_count
+            idx = np.arange(n) + desplazamiento
+            hoja = arbol.children_left == TREE_LEAF
+
+            features.append(np.where(hoja, 0, arbol.feature))
+            thresholds.append(np.where(hoja, 0.0, arbol.threshold))
+            lefts.append(np.where(hoja, idx, arbol.children_left + desplazamiento))
+            rights.append(np.where(hoja, idx, arbol.children_right + desplazamiento))
+            values.append(arbol.value[:, 0, 0])
+            raices.append(desplazamiento)
+
+            desplazamiento += n
+            profundidad = max(profundidad, arbol.max_depth)
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            raices=np.array(raices),
+            profundidad=profundidad,
+            n_features=modelo.n_features_in_,
+            origen=origen,
+        )
+
+    # ===== PERSISTENCIA =====
+    def a_dict(self):
+        """Arreglos y metadatos del bosque, con los dtypes de ejecución."""
+        return {
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "left": self.left,
+            "right": self.right,
+            "value": self.value,
+            "raices": self.raices,
+            "hijos": self._hijos,
+            "umbral32": self._umbral32,
+            "profundidad": self.profundidad,
+            "n_features": self.n_features_in_,
+            "origen": self.origen,
+        }
+
+    @classmethod
+    def desde_dict(cls, datos):
+        return cls(
+            feature=datos["feature"],
+            threshold=datos["threshold"],
+            left=datos["left"],
+            right=datos["right"],
+            value=datos["value"],
+            raices=datos["raices"],
+            profundidad=datos["profundidad"],
+            n_features=datos["n_features"],
+            origen=datos["origen"],
+            hijos=datos["hijos"],
+            umbral32=datos["umbral32"],
+        )
+
+    def guardar(self, path):
+        """
+        Guardar el bosque sin comprimir y con los dtypes de ejecución, para que
+        `cargar(..., mmap_mode="r")` mapee los arreglos sin copiarlos.
+
+        Se escribe en un temporal y se reemplaza atómicamente: los procesos que
+        tengan mapeado el archivo anterior siguen leyendo su propia copia.
+        """
+        guardar_atomico(self.a_dict(), path)
+
+    @classmethod
+    def cargar(cls, path, mmap_mode=None):
+        """
+        Cargar un bosque guardado con `guardar` (no requiere sklearn).
+
+        Con mmap_mode="r" los arreglos quedan mapeados en memoria y los
+        workers de un mismo servidor comparten las páginas.
+        """
+        return cls.desde_dict(load(path, mmap_mode=mmap_mode))
+
+    # ===== INFERENCIA =====
+    def _recorrer(self, X):
+        n, n_features = X.shape
+        X_plano = X.ravel()
+        base = np.repeat(np.arange(n) * n_features, self.n_arboles)
+        nodos = np.tile(self.raices, n)
+
+        for _ in range(self.profundidad):
+            x = X_plano.take(base + self.feature.take(nodos))
+            nodos = self._hijos.take(2 * nodos + (x <= self._umbral32.take(nodos)))
+
+        return self.value.take(nodos).reshape(n, self.n_arboles).mean(axis=1)
+
+    def predict(self, X):
+        """
+        Predecir el ecoscore para una matriz N×n_features ya normalizada.
+
+        Misma interfaz que RandomForestRegressor.predict; las entradas se
+        comparan en float32 igual que en sklearn.
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"Se esperaban {self.n_features_in_} features, llegaron {X.shape[1]}"
+            )
+
+        if self.estimador is not None and X.shape[0] >= self.umbral_estimador:
+            estimador = self._estimador_cargado()
+            if estimador is not None:
+                return estimador.predict(X)
+        if X.shape[0] <= TAMANO_BLOQUE:
+            return self._recorrer(X)
+
+        salida = np.empty(X.shape[0], dtype=np.float64)
+        for inicio in range(0, X.shape[0], TAMANO_BLOQUE):
+            fin = inicio + TAMANO_BLOQUE
+            salida[inicio:fin] = self._recorrer(X[inicio:fin])
+        return salida
+
+
+def compilar_modelo(model_path, compiled_path):
+    """Compilar el .pkl entrenado y guardar el artefacto compilado."""
+    bosque = BosqueCompilado.desde_sklearn(load(model_path), origen=hash_archivo(model_path))
+    bosque.guardar(compiled_path)
+    return bosque
+
+
+def cargar_modelo(model_path, compiled_path, mmap_mode=None, umbral_sklearn=None):
+    """
+    Cargar el bosque compilado, recompilándolo si falta o si el .pkl
+    cambió desde la última compilación. Con `umbral_sklearn` los lotes de
+    ese tamaño o más usan el .pkl, cargado recién cuando llega el primero.
+    """
+    compiled_path = Path(compiled_path)
+    bosque = _cargar_vigente(model_path, compiled_path, mmap_mode)
+    if bosque is None:
+        with bloqueo_construccion(compiled_path):
+            # Otro proceso pudo compilarlo mientras se esperaba el bloqueo
+            bosque = _cargar_vigente(model_path, compiled_path, mmap_mode)
+            if bosque is None:
+                compilar_modelo(model_path, compiled_path)
+                bosque = BosqueCompilado.cargar(compiled_path, mmap_mode=mmap_mode)
+    if umbral_sklearn:
+        bosque.usar_estimador(model_path, umbral_sklearn)
+    return bosque
+
+
+def _cargar_vigente(model_path, compiled_path, mmap_mode):
+    if compiled_path.exists():
+        bosque = BosqueCompilado.cargar(compiled_path, mmap_mode=mmap_mode)
+        if bosque.origen == hash_archivo(model_path):
+            return bosque
+    return None
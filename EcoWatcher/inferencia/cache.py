@@ -0,0 +1,109 @@
+"""
+Caché LRU/TTL de predicciones.
+
+La clave es el vector normalizado redondeado a `decimales`, de modo que
+entradas idénticas o casi idénticas comparten resultado. La caché se vacía
+sola cuando cambia la versión del modelo del registro.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from config import CACHE_PREDICCIONES_MAX, CACHE_PREDICCIONES_TTL_S, CACHE_PREDICCIONES_DECIMALES
+
+
+class CachePredicciones:
+    """
+    Caché acotada en tamaño (LRU) y opcionalmente en tiempo (TTL).
+
+    Args:
+        max_entradas: entradas máximas antes de expulsar la menos usada
+        ttl_s: segundos de vida de cada entrada (0 = sin expiración)
+        decimales: precisión a la que se cuantiza el vector normalizado
+    """
+
+    def __init__(self, max_entradas=4096, ttl_s=0, decimales=4):
+        self.max_entradas = max_entradas
+        self.ttl_s = ttl_s
+        self.decimales = decimales
+        self._escala = 10.0 ** decimales
+        self._entradas = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+        # ===== MÉTRICAS =====
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+        self.expiraciones = 0
+        self.invalidaciones = 0
+
+    def _clave(self, x_norm):
+        return np.rint(np.asarray(x_norm, dtype=float) * self._escala).astype(np.int64).tobytes()
+
+    def _validar_version(self, version):
+        # Llamar con el lock tomado
+        if version != self._version:
+            if self._entradas:
+                self.invalidaciones += 1
+            self._entradas.clear()
+            self._version = version
+
+    def obtener(self, x_norm, version):
+        """Score cacheado para el vector normalizado, o None."""
+        clave = self._clave(x_norm)
+        with self._lock:
+            self._validar_version(version)
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+
+            score, creada = entrada
+            if self.ttl_s and time.monotonic() - creada > self.ttl_s:
+                del self._entradas[clave]
+                self.expiraciones += 1
+                self.fallos += 1
+                return None
+
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return score
+
+    def guardar(self, x_norm, version, score):
+        clave = self._clave(x_norm)
+        with self._lock:
+            self._validar_version(version)
+            self._entradas[clave] = (score, time.monotonic())
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+                self.expulsiones += 1
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def metricas(self):
+        consultas = self.aciertos + self.fallos
+        return {
+            "entradas": len(self._entradas),
+            "max_entradas": self.max_entradas,
+            "ttl_s": self.ttl_s,
+            "decimales": self.decimales,
+            "version_modelo": self._version,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+            "expulsiones": self.expulsiones,
+            "expiraciones": self.expiraciones,
+            "invalidaciones": self.invalidaciones,
+        }
+
+
+# ===== INSTANCIA COMPARTIDA =====
+cache_predicciones = CachePredicciones(
+    CACHE_PREDICCIONES_MAX, CACHE_PREDICCIONES_TTL_S, CACHE_PREDICCIONES_DECIMALES
+)
@@ -0,0 +1,225 @@
+"""
+Despachador de inferencia con micro-lotes.
+
+Las peticiones concurrentes se encolan; un único hilo las agrupa durante una
+ventana corta (o hasta `max_filas`), hace una sola llamada a `predict` y
+entrega a cada llamante su parte del resultado a través de un Future.
+
+Un error al armar o predecir un lote se entrega a todos sus Futures y el
+hilo sigue con el siguiente; si aun así el hilo muere, la próxima petición
+lo vuelve a iniciar.
+"""
+import logging
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class DespachadorInferencia:
+    """
+    Agrupa predicciones concurrentes en un solo `model.predict`.
+
+    Args:
+        obtener_modelo: callable que devuelve el modelo vigente (se consulta
+            en cada lote, así un cambio de modelo aplica al siguiente lote)
+        ventana_ms: tiempo máximo que un lote espera a más peticiones
+        max_filas: filas a partir de las cuales el lote se cierra de inmediato
+        max_cola: peticiones encoladas como máximo (put bloquea al llenarse)
+    """
+
+    def __init__(self, obtener_modelo, ventana_ms=2.0, max_filas=256, max_cola=10000):
+        self._obtener_modelo = obtener_modelo
+        self.ventana = ventana_ms / 1000.0
+        self.max_filas = max_filas
+        self._cola = queue.Queue(maxsize=max_cola)
+        self._hilo = None
+        self._lock_hilo = threading.Lock()
+        self._reinicios = 0
+
+        # ===== MÉTRICAS =====
+        self._lock = threading.Lock()
+        self._lotes = 0
+        self._filas = 0
+        self._peticiones = 0
+        self._max_lote = 0
+        self._max_profundidad = 0
+        self._histograma = Counter()
+        self._latencias = deque(maxlen=4096)
+
+    # ===== CICLO DE VIDA =====
+    def iniciar(self):
+        with self._lock_hilo:
+            if self._hilo is not None and self._hilo.is_alive():
+                return
+            self._hilo = threading.Thread(
+                target=self._bucle, name="despachador-inferencia", daemon=True
+            )
+            self._hilo.start()
+
+    def _revivir(self):
+        # Iniciado y no detenido, pero el hilo murió: volver a levantarlo
+        hilo = self._hilo
+        if hilo is not None and not hilo.is_alive():
+            logger.error("El hilo del despachador de inferencia murió; reiniciando")
+            with self._lock:
+                self._reinicios += 1
+            self.iniciar()
+
+    def detener(self, timeout=None):
+        """Procesar lo encolado y detener el hilo."""
+        if self._hilo is None:
+            return
+        self._cola.put(None)
+        self._hilo.join(timeout)
+        self._hilo = None
+
+    @property
+    def activo(self):
+        return self._hilo is not None and self._hilo.is_alive()
+
+    @property
+    def profundidad_cola(self):
+        """Peticiones esperando lote en este momento."""
+        return self._cola.qsize()
+
+    # ===== API PÚBLICA =====
+    def enviar(self, X):
+        """
+        Encolar una matriz ya normalizada y devolver un Future con sus scores.
+
+        Una matriz que no es N×n_features del modelo vigente se rechaza aquí
+        con ValueError, antes de mezclarse con las demás en un lote.
+        """
+        X = self._validar(X)
+        self._revivir()
+
+        futuro = Future()
+        self._cola.put((X, futuro, time.perf_counter()))
+
+        profundidad = self._cola.qsize()
+        with self._lock:
+            if profundidad > self._max_profundidad:
+                self._max_profundidad = profundidad
+        return futuro
+
+    def _validar(self, X):
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.ndim != 2:
+            raise ValueError(f"Se esperaba una matriz N×features, llegó forma {X.shape}")
+        n_features = getattr(self._obtener_modelo(), "n_features_in_", None)
+        if n_features is not None and X.shape[1] != n_features:
+            raise ValueError(f"Se esperaban {n_features} features, llegaron {X.shape[1]}")
+        return X
+
+    def predecir(self, X, timeout=None):
+        """
+        Predecir de forma bloqueante.
+
+        Lotes que ya alcanzan `max_filas` (o si el hilo no está activo) se
+        evalúan directamente en el hilo llamante para no frenar la cola.
+        """
+        X = self._validar(X)
+        self._revivir()
+        if len(X) >= self.max_filas or not self.activo:
+            return self._obtener_modelo().predict(X)
+        return self.enviar(X).result(timeout)
+
+    def metricas(self):
+        """Profundidad de cola, tamaños de lote y latencia de extremo a extremo."""
+        with self._lock:
+            latencias = np.array(self._latencias) * 1000.0
+            return {
+                "ventana_ms": self.ventana * 1000.0,
+                "max_filas": self.max_filas,
+                "profundidad_cola": self._cola.qsize(),
+                "max_profundidad_cola": self._max_profundidad,
+                "peticiones": self._peticiones,
+                "lotes": self._lotes,
+                "filas": self._filas,
+                "filas_por_lote": self._filas / self._lotes if self._lotes else 0.0,
+                "peticiones_por_lote": self._peticiones / self._lotes if self._lotes else 0.0,
+                "max_lote": self._max_lote,
+                "reinicios_hilo": self._reinicios,
+                "histograma_lotes": dict(
+                    sorted(self._histograma.items(), key=lambda kv: int(kv[0].split("-")[0]))
+                ),
+                "latencia_p50_ms": float(np.percentile(latencias, 50)) if len(latencias) else None,
+                "latencia_p99_ms": float(np.percentile(latencias, 99)) if len(latencias) else None,
+            }
+
+    # ===== HILO DE TRABAJO =====
+    def _bucle(self):
+        detener = False
+        while not detener:
+            item = self._cola.get()
+            if item is None:
+                break
+
+            pendientes = [item]
+            filas = len(item[0])
+            limite = time.perf_counter() + self.ventana
+
+            while filas < self.max_filas:
+                restante = limite - time.perf_counter()
+                if restante <= 0:
+                    break
+                try:
+                    item = self._cola.get(timeout=restante)
+                except queue.Empty:
+                    break
+                if item is None:
+                    detener = True
+                    break
+                pendientes.append(item)
+                filas += len(item[0])
+
+            try:
+                self._ejecutar(pendientes)
+            except Exception as e:
+                # Nunca dejar llamantes esperando un Future que nadie resolverá
+                logger.exception("Error inesperado en el despachador de inferencia")
+                for _, futuro, _ in pendientes:
+                    if not futuro.done():
+                        futuro.set_exception(e)
+
+    def _ejecutar(self, pendientes):
+        try:
+            if len(pendientes) == 1:
+                X = pendientes[0][0]
+            else:
+                X = np.vstack([p[0] for p in pendientes])
+            y = np.asarray(self._obtener_modelo().predict(X))
+        except Exception as e:
+            for _, futuro, _ in pendientes:
+                futuro.set_exception(e)
+            return
+
+        ahora = time.perf_counter()
+        inicio = 0
+        for X_p, futuro, encolado in pendientes:
+            fin = inicio + len(X_p)
+            futuro.set_result(y[inicio:fin])
+            inicio = fin
+
+        with self._lock:
+            self._lotes += 1
+            self._filas += len(X)
+            self._peticiones += len(pendientes)
+            self._max_lote = max(self._max_lote, len(X))
+            self._histograma[_cubeta(len(X))] += 1
+            self._latencias.extend(ahora - encolado for _, _, encolado in pendientes)
+
+
+def _cubeta(n):
+    """Cubeta potencia de dos para el histograma de tamaños de lote ("1", "2-3", "4-7", ...)."""
+    inferior = 1 << (n.bit_length() - 1)
+    superior = (inferior << 1) - 1
+    return str(inferior) if inferior == superior else f"{inferior}-{superior}"
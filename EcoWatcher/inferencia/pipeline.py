@@ -0,0 +1,179 @@
+"""
+Pipeline del ecoscore en un solo artefacto.
+
+Agrupa el orden de las variables, los parámetros de normalización, el bosque
+compilado y los metadatos de versión en un único .joblib. Se carga una vez
+(con mmap) y convierte valores crudos en ecoscore sin volver a leer el JSON
+de parámetros ni el .pkl, ni buscar metadatos de columna en cada llamada.
+"""
+import hashlib
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+from joblib import load
+
+from inferencia.bosque_compilado import BosqueCompilado, hash_archivo, guardar_atomico, bloqueo_construccion
+from utils.normalizacion import Normalizador
+
+# ===== CONSTANTES =====
+FORMATO = 1
+TAMANO_LOTE = 4096  # filas por bloque en predict_batch
+
+
+def hash_parametros(params):
+    texto = json.dumps(params, sort_keys=True)
+    return hashlib.sha256(texto.encode()).hexdigest()
+
+
+class PipelineEcoScore:
+    """
+    Valores crudos -> normalización -> bosque -> ecoscore.
+
+    Args:
+        feature_order: orden de las columnas de entrada
+        norm_params: contenido de `parametros_normalizados.json`
+        modelo: bosque compilado (o cualquier objeto con `predict`)
+        metadatos: versión del modelo y de los parámetros, fecha de construcción
+    """
+
+    def __init__(self, feature_order, norm_params, modelo, metadatos=None):
+        self.feature_order = list(feature_order)
+        self.norm_params = norm_params
+        self.modelo = modelo
+        self.metadatos = metadatos or {}
+        self.normalizador = Normalizador(norm_params, self.feature_order)
+
+    @property
+    def version(self):
+        origen = self.metadatos.get("modelo")
+        return origen[:12] if origen else None
+
+    # ===== TRANSFORMACIÓN =====
+    def transform(self, X, out=None):
+        """Normalizar una matriz N×F de valores crudos (columnas en `feature_order`)."""
+        return self.normalizador.transform(X, out=out)
+
+    def transform_dict(self, inputs, out=None):
+        """Normalizar un dict variable -> valor crudo como matriz 1×F."""
+        return self.normalizador.transform_dict(inputs, out=out)
+
+    def matriz(self, filas):
+        """Lista de dicts (o matriz) de valores crudos -> matriz N×F en `feature_order`."""
+        if len(filas) and isinstance(filas[0], dict):
+            return np.array([[fila[f] for f in self.feature_order] for fila in filas], dtype=float)
+        return np.asarray(filas, dtype=float).reshape(-1, len(self.feature_order))
+
+    # ===== PREDICCIÓN =====
+    def predict(self, X):
+        """Ecoscore de una matriz N×F (o un vector de F) de valores crudos."""
+        return self.modelo.predict(self.transform(X))
+
+    def predict_batch(self, filas, tam_lote=TAMANO_LOTE):
+        """
+        Ecoscore de muchas filas crudas (lista de dicts o matriz N×F).
+
+        Se procesa por bloques de `tam_lote` reutilizando un único buffer de
+        normalización, así la memoria extra no crece con N.
+        """
+        X = self.matriz(filas)
+        salida = np.empty(len(X), dtype=np.float64)
+        buffer = np.empty((min(tam_lote, len(X)), X.shape[1]), dtype=np.float64)
+        for inicio in range(0, len(X), tam_lote):
+            bloque = X[inicio:inicio + tam_lote]
+            X_norm = self.transform(bloque, out=buffer[:len(bloque)])
+            salida[inicio:inicio + len(bloque)] = self.modelo.predict(X_norm)
+        return salida
+
+    # ===== PERSISTENCIA =====
+    def guardar(self, path):
+        guardar_atomico(
+            {
+                "formato": FORMATO,
+                "feature_order": self.feature_order,
+                "norm_params": self.norm_params,
+                "metadatos": self.metadatos,
+                "bosque": self.modelo.a_dict(),
+            },
+            path,
+        )
+
+    @classmethod
+    def cargar(cls, path, mmap_mode=None):
+        datos = load(path, mmap_mode=mmap_mode)
+        if datos.get("formato") != FORMATO:
+            raise ValueError(f"Formato de pipeline no soportado: {datos.get('formato')}")
+        return cls(
+            datos["feature_order"],
+            datos["norm_params"],
+            BosqueCompilado.desde_dict(datos["bosque"]),
+            datos["metadatos"],
+        )
+
+
+def construir_pipeline(model_path, params_path, feature_order, pipeline_path):
+    """Compilar el .pkl, agrupar los parámetros y guardar el artefacto del pipeline."""
+    with open(params_path, "r") as f:
+        norm_params = json.load(f)
+
+    origen = hash_archivo(model_path)
+    bosque = BosqueCompilado.desde_sklearn(load(model_path), origen=origen)
+    pipeline = PipelineEcoScore(
+        feature_order,
+        norm_params,
+        bosque,
+        {
+            "modelo": origen,
+            "parametros": hash_parametros(norm_params),
+            "construido_en": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+    )
+    pipeline.guardar(pipeline_path)
+    return pipeline
+
+
+def cargar_pipeline(model_path, params_path, feature_order, pipeline_path, mmap_mode=None,
+                    umbral_sklearn=None):
+    """
+    Cargar el artefacto del pipeline, reconstruyéndolo si falta o si cambió
+    el .pkl, el JSON de parámetros o el orden de las variables.
+
+    Con `umbral_sklearn` el bosque delega en el RandomForest del .pkl los
+    lotes de ese tamaño o más, cargado recién con el primero de ellos (ver
+    `BosqueCompilado.usar_estimador`).
+    """
+    pipeline_path = Path(pipeline_path)
+    pipeline = _cargar_vigente(model_path, params_path, feature_order, pipeline_path, mmap_mode)
+    if pipeline is None:
+        with bloqueo_construccion(pipeline_path):
+            # Otro worker pudo reconstruirlo mientras se esperaba el bloqueo
+            pipeline = _cargar_vigente(model_path, params_path, feature_order, pipeline_path, mmap_mode)
+            if pipeline is None:
+                construir_pipeline(model_path, params_path, feature_order, pipeline_path)
+                pipeline = PipelineEcoScore.cargar(pipeline_path, mmap_mode=mmap_mode)
+    if umbral_sklearn:
+        pipeline.modelo.usar_estimador(model_path, umbral_sklearn)
+    return pipeline
+
+
+def _cargar_vigente(model_path, params_path, feature_order, pipeline_path, mmap_mode):
+    if not pipeline_path.exists():
+        return None
+    try:
+        pipeline = PipelineEcoScore.cargar(pipeline_path, mmap_mode=mmap_mode)
+    except (ValueError, KeyError):
+        return None
+    if _vigente(pipeline, model_path, params_path, feature_order):
+        return pipeline
+    return None
+
+
+def _vigente(pipeline, model_path, params_path, feature_order):
+    with open(params_path, "r") as f:
+        params = json.load(f)
+    return (
+        pipeline.feature_order == list(feature_order)
+        and pipeline.metadatos.get("parametros") == hash_parametros(params)
+        and pipeline.metadatos.get("modelo") == hash_archivo(model_path)
+    )
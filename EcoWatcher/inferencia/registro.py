@@ -0,0 +1,153 @@
+"""
+Registro único de modelos cargados.
+
+Es el único dueño del modelo en memoria: la web, el despachador y el
+simulador le piden el pipeline vigente (normalización + bosque compilado)
+en lugar de cargar el suyo. El artefacto se carga con mmap para que los
+workers compartan páginas, y un hilo vigila el .pkl entrenado y el JSON de
+parámetros para publicar un pipeline nuevo sin reiniciar el servidor.
+"""
+import threading
+import time
+from pathlib import Path
+
+from config import (
+    MODEL_PATH, PARAMS_PATH, PIPELINE_PATH, FEATURE_ORDER, MODELO_INTERVALO_REVISION_S,
+    INFERENCIA_UMBRAL_SKLEARN,
+)
+from inferencia.pipeline import cargar_pipeline
+
+
+class RegistroModelos:
+    """
+    Dueño del pipeline vigente con recarga en caliente.
+
+    El intercambio es una sola asignación de referencia: los lotes en curso
+    terminan con el modelo anterior y los siguientes usan el nuevo, sin
+    bloquear a los lectores.
+    """
+
+    def __init__(self, model_path, params_path, pipeline_path, feature_order,
+                 intervalo_revision=5.0, mmap_mode="r"):
+        self.model_path = Path(model_path)
+        self.params_path = Path(params_path)
+        self.pipeline_path = Path(pipeline_path)
+        self.feature_order = list(feature_order)
+        self.intervalo_revision = intervalo_revision
+        self.mmap_mode = mmap_mode
+
+        self._pipeline = None
+        self._mtime = None
+        self._cargado_en = None
+        self._recargas = 0
+        self._lock = threading.Lock()  # serializa cargas, no lecturas
+        self._hilo = None
+        self._detener = threading.Event()
+
+    # ===== ACCESO =====
+    @property
+    def pipeline(self):
+        """Pipeline vigente (se carga en el primer acceso)."""
+        pipeline = self._pipeline
+        if pipeline is None:
+            self.cargar()
+            pipeline = self._pipeline
+        return pipeline
+
+    @property
+    def modelo(self):
+        """Bosque del pipeline vigente (recibe matrices ya normalizadas)."""
+        return self.pipeline.modelo
+
+    @property
+    def version(self):
+        """Versión del modelo vigente: prefijo del hash del .pkl de origen."""
+        return self.pipeline.version
+
+    def info(self):
+        return {
+            "version": self.version,
+            "ruta": str(self.model_path),
+            "pipeline": self.pipeline.metadatos,
+            "cargado_en": self._cargado_en,
+            "recargas": self._recargas,
+            "mmap": self.mmap_mode is not None,
+        }
+
+    # ===== CARGA Y RECARGA =====
+    def cargar(self):
+        """
+        Cargar el pipeline desde disco y publicarlo.
+
+        Devuelve True si el pipeline publicado cambió.
+        """
+        with self._lock:
+            if not self.model_path.exists():
+                raise FileNotFoundError(f"Modelo no encontrado en: {self.model_path}")
+
+            mtime = self._mtimes()
+            nuevo = cargar_pipeline(
+                self.model_path, self.params_path, self.feature_order,
+                self.pipeline_path, mmap_mode=self.mmap_mode,
+                umbral_sklearn=INFERENCIA_UMBRAL_SKLEARN,
+            )
+            self._mtime = mtime
+
+            actual = self._pipeline
+            if actual is not None and actual.metadatos == nuevo.metadatos:
+                return False
+
+            self._pipeline = nuevo
+            self._cargado_en = time.strftime("%Y-%m-%d %H:%M:%S")
+            if actual is not None:
+                self._recargas += 1
+            return True
+
+    def _mtimes(self):
+        return (self.model_path.stat().st_mtime_ns, self.params_path.stat().st_mtime_ns)
+
+    def revisar(self):
+        """Recargar si el .pkl o los parámetros cambiaron desde la última carga."""
+        try:
+            mtime = self._mtimes()
+        except FileNotFoundError:
+            return False
+        if mtime == self._mtime:
+            return False
+
+        try:
+            cambio = self.cargar()
+        except Exception as e:
+            # Se conserva el modelo vigente; se reintentará en la próxima revisión
+            print(f"[REGISTRO] No se pudo recargar el pipeline: {e}")
+            return False
+
+        if cambio:
+            print(f"[REGISTRO] Nuevo modelo publicado: {self.version}")
+        return cambio
+
+    def iniciar_vigilancia(self):
+        """Hilo que revisa el .pkl y los parámetros cada `intervalo_revision` segundos."""
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(
+            target=self._vigilar, name="registro-modelos", daemon=True
+        )
+        self._hilo.start()
+
+    def detener_vigilancia(self):
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join()
+            self._hilo = None
+
+    def _vigilar(self):
+        while not self._detener.wait(self.intervalo_revision):
+            self.revisar()
+
+
+# ===== INSTANCIA COMPARTIDA =====
+registro = RegistroModelos(
+    MODEL_PATH, PARAMS_PATH, PIPELINE_PATH, FEATURE_ORDER, MODELO_INTERVALO_REVISION_S
+)
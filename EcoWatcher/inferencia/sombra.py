@@ -0,0 +1,215 @@
+"""
+Evaluación de modelos sombra fuera del camino de la petición.
+
+Un modelo candidato (p. ej. reentrenado con `entrenador_de_modelo.py
+--candidato`) se registra como sombra: recibe las mismas entradas que el
+modelo vigente, pero se evalúa en un pool de hilos en segundo plano y sus
+diferencias y latencias se guardan en `comparaciones_sombra`. Si el pool
+está saturado el trabajo se descarta; nunca se bloquea al llamante.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import insert, func
+
+from config import SOMBRA_WORKERS, SOMBRA_MAX_PENDIENTES, INFERENCIA_UMBRAL_SKLEARN
+from database.db import SessionLocal, SessionLectura
+from database.sqlite import con_reintentos
+from database.modelodb import ComparacionSombra
+from inferencia.bosque_compilado import BosqueCompilado, cargar_modelo
+
+
+class EvaluadorSombra:
+    """
+    Modelos sombra registrados y pool que los evalúa.
+
+    Args:
+        max_workers: hilos del pool
+        max_pendientes: evaluaciones en curso o en espera antes de descartar
+    """
+
+    def __init__(self, max_workers=2, max_pendientes=64):
+        self.max_workers = max_workers
+        self.max_pendientes = max_pendientes
+        self._modelos = {}
+        self._pool = None
+        self._cupos = threading.BoundedSemaphore(max_pendientes)
+        self._lock = threading.Lock()
+
+        # ===== MÉTRICAS (las actualizan la petición y los hilos del pool) =====
+        self._lock_metricas = threading.Lock()
+        self.enviadas = 0
+        self.descartadas = 0
+        self.errores = 0
+
+    # ===== REGISTRO =====
+    def registrar(self, nombre, modelo):
+        """Registrar un modelo sombra ya cargado (cualquier objeto con `predict`)."""
+        with self._lock:
+            modelos = dict(self._modelos)
+            modelos[nombre] = modelo
+            self._modelos = modelos
+
+    def registrar_desde_archivo(self, path, nombre=None):
+        """
+        Registrar un modelo sombra desde disco: un .pkl de sklearn (se compila
+        junto a él) o un bosque ya compilado (.joblib).
+        """
+        path = Path(path)
+        if path.suffix == ".pkl":
+            modelo = cargar_modelo(
+                path, path.with_suffix(".joblib"), mmap_mode="r", umbral_sklearn=INFERENCIA_UMBRAL_SKLEARN,
+            )
+        else:
+            modelo = BosqueCompilado.cargar(path, mmap_mode="r")
+        self.registrar(nombre or path.stem, modelo)
+        return modelo
+
+    def quitar(self, nombre):
+        with self._lock:
+            modelos = dict(self._modelos)
+            modelos.pop(nombre, None)
+            self._modelos = modelos
+
+    @property
+    def modelos(self):
+        return list(self._modelos)
+
+    # ===== EVALUACIÓN =====
+    def observar(self, X, scores_vivos, fuente):
+        """
+        Encolar la evaluación de los modelos sombra sobre X.
+
+        Devuelve False (sin bloquear) si no hay sombras o si el pool está lleno.
+        """
+        modelos = self._modelos
+        if not modelos:
+            return False
+
+        if not self._cupos.acquire(blocking=False):
+            self._contar("descartadas")
+            return False
+
+        try:
+            self._obtener_pool().submit(
+                self._evaluar,
+                np.asarray(X, dtype=float),
+                np.asarray(scores_vivos, dtype=float).ravel(),
+                fuente,
+                modelos,
+            )
+        except RuntimeError:
+            # pool apagado
+            self._cupos.release()
+            self._contar("descartadas")
+            return False
+
+        self._contar("enviadas")
+        return True
+
+    def _contar(self, metrica):
+        with self._lock_metricas:
+            setattr(self, metrica, getattr(self, metrica) + 1)
+
+    def _obtener_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="sombra"
+                    )
+        return self._pool
+
+    def _evaluar(self, X, vivos, fuente, modelos):
+        try:
+            filas = []
+            for nombre, modelo in modelos.items():
+                inicio = time.perf_counter()
+                y = np.asarray(modelo.predict(X), dtype=float)
+                latencia_ms = (time.perf_counter() - inicio) * 1000.0
+
+                delta = y - vivos
+                filas.append({
+                    "modelo": nombre,
+                    "fuente": fuente,
+                    "n_filas": len(X),
+                    "ecoscore_vivo": float(vivos.mean()),
+                    "ecoscore_sombra": float(y.mean()),
+                    "delta_medio": float(delta.mean()),
+                    "delta_abs_medio": float(np.abs(delta).mean()),
+                    "delta_abs_max": float(np.abs(delta).max()),
+                    "latencia_ms": latencia_ms,
+                })
+
+            def insertar():
+                db = SessionLocal()
+                try:
+                    db.execute(insert(ComparacionSombra), filas)
+                    db.commit()
+                finally:
+                    db.close()
+
+            con_reintentos(insertar)
+        except Exception as e:
+            self._contar("errores")
+            print(f"[SOMBRA] Error evaluando modelos sombra: {e}")
+        finally:
+            self._cupos.release()
+
+    def detener(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    # ===== REPORTES =====
+    def metricas(self):
+        with self._lock_metricas:
+            return {
+                "modelos": self.modelos,
+                "enviadas": self.enviadas,
+                "descartadas": self.descartadas,
+                "errores": self.errores,
+            }
+
+    def resumen(self):
+        """Comparación agregada por modelo sombra a partir de `comparaciones_sombra`."""
+        db = SessionLectura()
+        try:
+            filas = (
+                db.query(
+                    ComparacionSombra.modelo,
+                    func.count(ComparacionSombra.id),
+                    func.sum(ComparacionSombra.n_filas),
+                    func.avg(ComparacionSombra.delta_medio),
+                    func.avg(ComparacionSombra.delta_abs_medio),
+                    func.max(ComparacionSombra.delta_abs_max),
+                    func.avg(ComparacionSombra.latencia_ms),
+                    func.max(ComparacionSombra.latencia_ms),
+                )
+                .group_by(ComparacionSombra.modelo)
+                .all()
+            )
+        finally:
+            db.close()
+
+        return [
+            {
+                "modelo": modelo,
+                "evaluaciones": evaluaciones,
+                "filas": total_filas,
+                "delta_medio": delta_medio,
+                "delta_abs_medio": delta_abs_medio,
+                "delta_abs_max": delta_abs_max,
+                "latencia_media_ms": latencia_media,
+                "latencia_max_ms": latencia_max,
+            }
+            for (modelo, evaluaciones, total_filas, delta_medio, delta_abs_medio,
+                 delta_abs_max, latencia_media, latencia_max) in filas
+        ]
+
+
+# ===== INSTANCIA COMPARTIDA =====
+sombra = EvaluadorSombra(SOMBRA_WORKERS, SOMBRA_MAX_PENDIENTES)
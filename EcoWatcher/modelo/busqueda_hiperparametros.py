@@ -0,0 +1,238 @@
+"""
+Búsqueda de hiperparámetros con validación cruzada k-fold en paralelo.
+
+- Cada (configuración, fold) es una tarea en un pool de procesos.
+- X e y se escriben una vez como .npy y los workers los abren con mmap,
+  en lugar de recibir una copia serializada en cada tarea.
+- Cada resultado de fold se guarda en disco con una clave derivada del hash
+  de los datos y de los parámetros; al re-ejecutar solo se calculan las
+  combinaciones nuevas.
+- El speedup por defecto es una estimación (CPU total / tiempo de pared);
+  con --medir-serial se corren antes las mismas tareas una tras otra en un
+  solo proceso y se compara contra ese tiempo de pared medido.
+
+Uso (desde la carpeta EcoWatcher):
+    python modelo/busqueda_hiperparametros.py --folds 5 --workers 4 [--medir-serial]
+"""
+import os
+import json
+import time
+import hashlib
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import KFold
+from sklearn.metrics import mean_squared_error, r2_score
+
+from entrenador_de_modelo import (
+    BASE_DIR, DATA_PATH, CANDIDATE_MODEL_PATH, cargar_datos, guardar_modelo,
+)
+
+# ===== RUTAS =====
+CACHE_DIR = os.path.join(BASE_DIR, "modelo", "cache_busqueda")
+
+# ===== ESPACIO DE BÚSQUEDA =====
+GRILLA_BUSQUEDA = {
+    "n_estimators": [25, 50, 100, 300],
+    "max_depth": [6, 10, None],
+    "min_samples_leaf": [1, 3],
+    "max_features": [1.0, 0.6],
+}
+
+
+# ===== DATOS COMPARTIDOS =====
+def hash_datos(X, y):
+    h = hashlib.sha256()
+    h.update(np.ascontiguousarray(X).tobytes())
+    h.update(np.ascontiguousarray(y).tobytes())
+    return h.hexdigest()[:16]
+
+
+def publicar_datos(X, y, data_hash):
+    """Escribir X e y como .npy (una vez por versión de los datos) para abrirlos con mmap."""
+    ruta_X = os.path.join(CACHE_DIR, f"datos_{data_hash}_X.npy")
+    ruta_y = os.path.join(CACHE_DIR, f"datos_{data_hash}_y.npy")
+    if not os.path.exists(ruta_X):
+        np.save(ruta_X, np.ascontiguousarray(X, dtype=np.float64))
+    if not os.path.exists(ruta_y):
+        np.save(ruta_y, np.ascontiguousarray(y, dtype=np.float64))
+    return ruta_X, ruta_y
+
+
+# ===== CACHÉ DE FOLDS =====
+def clave_fold(data_hash, params, folds, fold, semilla):
+    texto = json.dumps(
+        {"datos": data_hash, "params": params, "folds": folds, "fold": fold, "semilla": semilla},
+        sort_keys=True,
+    )
+    return hashlib.sha256(texto.encode()).hexdigest()
+
+
+def leer_cache(clave):
+    ruta = os.path.join(CACHE_DIR, f"{clave}.json")
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta, "r") as f:
+        return json.load(f)
+
+
+def escribir_cache(clave, resultado):
+    ruta = os.path.join(CACHE_DIR, f"{clave}.json")
+    temporal = f"{ruta}.tmp"
+    with open(temporal, "w") as f:
+        json.dump(resultado, f)
+    os.replace(temporal, ruta)
+
+
+# ===== TAREA (se ejecuta en el worker) =====
+def evaluar_fold(ruta_X, ruta_y, params, idx_train, idx_test, semilla):
+    # Tiempo de CPU: no se infla cuando hay más workers que núcleos
+    inicio = time.process_time()
+    X = np.load(ruta_X, mmap_mode="r")
+    y = np.load(ruta_y, mmap_mode="r")
+
+    modelo = RandomForestRegressor(random_state=semilla, **params)
+    modelo.fit(X[idx_train], y[idx_train])
+    y_pred = modelo.predict(X[idx_test])
+
+    return {
+        "mse": float(mean_squared_error(y[idx_test], y_pred)),
+        "r2": float(r2_score(y[idx_test], y_pred)),
+        "segundos_cpu": time.process_time() - inicio,
+    }
+
+
+# ===== BÚSQUEDA =====
+def buscar(X, y, folds=5, workers=None, semilla=42, medir_serial=False):
+    """
+    Ejecutar la búsqueda y devolver (resumen por configuración, estadísticas).
+
+    Con `medir_serial` las tareas pendientes se corren primero en este proceso,
+    una tras otra y sin escribir la caché, como referencia del speedup.
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    data_hash = hash_datos(X, y)
+    ruta_X, ruta_y = publicar_datos(X, y, data_hash)
+
+    claves = list(GRILLA_BUSQUEDA)
+    configuraciones = [
+        dict(zip(claves, valores)) for valores in itertools.product(*GRILLA_BUSQUEDA.values())
+    ]
+    particiones = list(KFold(n_splits=folds, shuffle=True, random_state=semilla).split(X))
+
+    resultados = {i: [None] * folds for i in range(len(configuraciones))}
+    pendientes = []
+    for i, params in enumerate(configuraciones):
+        for fold, (idx_train, idx_test) in enumerate(particiones):
+            clave = clave_fold(data_hash, params, folds, fold, semilla)
+            cacheado = leer_cache(clave)
+            if cacheado is not None:
+                resultados[i][fold] = cacheado
+            else:
+                pendientes.append((i, fold, clave, params, idx_train, idx_test))
+
+    total = len(configuraciones) * folds
+    print(f"Datos {data_hash} | {len(configuraciones)} configuraciones × {folds} folds = {total} tareas")
+    print(f"En caché: {total - len(pendientes)} | Por calcular: {len(pendientes)}")
+
+    serial = None
+    if medir_serial and pendientes:
+        inicio = time.perf_counter()
+        for i, fold, clave, params, idx_train, idx_test in pendientes:
+            evaluar_fold(ruta_X, ruta_y, params, idx_train, idx_test, semilla)
+        serial = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    if pendientes:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futuros = {
+                pool.submit(evaluar_fold, ruta_X, ruta_y, params, idx_train, idx_test, semilla):
+                    (i, fold, clave)
+                for i, fold, clave, params, idx_train, idx_test in pendientes
+            }
+            for futuro in as_completed(futuros):
+                i, fold, clave = futuros[futuro]
+                resultado = futuro.result()
+                escribir_cache(clave, resultado)
+                resultados[i][fold] = resultado
+    pared = time.perf_counter() - inicio
+
+    cpu = sum(resultados[i][fold]["segundos_cpu"] for i, fold, *_ in pendientes)
+    estadisticas = {
+        "calculadas": len(pendientes),
+        "en_cache": total - len(pendientes),
+        "segundos_pared": pared,
+        "segundos_cpu": cpu,
+        "segundos_serial": serial,
+        "speedup": serial / pared if serial is not None and pared > 0 else None,
+        "speedup_estimado": cpu / pared if pendientes and pared > 0 else None,
+    }
+
+    resumen = []
+    for i, params in enumerate(configuraciones):
+        mses = np.array([r["mse"] for r in resultados[i]])
+        r2s = np.array([r["r2"] for r in resultados[i]])
+        resumen.append({
+            **params,
+            "mse_medio": float(mses.mean()),
+            "mse_std": float(mses.std()),
+            "r2_medio": float(r2s.mean()),
+        })
+    resumen.sort(key=lambda r: r["mse_medio"])
+    return resumen, estadisticas
+
+
+def imprimir_resumen(resumen, estadisticas, top=10):
+    print(f"\n==== MEJORES {top} CONFIGURACIONES (MSE medio en CV) ====")
+    print(f"{'árboles':>8}{'prof.':>7}{'hoja':>6}{'feat.':>7}{'MSE':>10}{'± std':>9}{'R²':>9}")
+    for r in resumen[:top]:
+        print(
+            f"{r['n_estimators']:>8}{str(r['max_depth']):>7}{r['min_samples_leaf']:>6}"
+            f"{r['max_features']:>7}{r['mse_medio']:>10.3f}{r['mse_std']:>9.3f}{r['r2_medio']:>9.5f}"
+        )
+
+    print("\n==== TIEMPOS ====")
+    print(f"Tareas calculadas: {estadisticas['calculadas']} (en caché: {estadisticas['en_cache']})")
+    print(f"Tiempo de pared:   {estadisticas['segundos_pared']:.2f} s")
+    print(f"Tiempo de CPU:     {estadisticas['segundos_cpu']:.2f} s (suma de las tareas)")
+    if estadisticas["speedup"] is not None:
+        print(f"Tiempo serial:     {estadisticas['segundos_serial']:.2f} s (medido, 1 proceso)")
+        print(f"Speedup:           {estadisticas['speedup']:.2f}x")
+    elif estadisticas["speedup_estimado"] is not None:
+        print(
+            f"Speedup estimado:  {estadisticas['speedup_estimado']:.2f}x "
+            "(CPU / pared; --medir-serial para medirlo)"
+        )
+
+
+# ===== MAIN =====
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Búsqueda de hiperparámetros con CV en paralelo.")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument(
+        "--medir-serial",
+        action="store_true",
+        help="correr antes las tareas en un solo proceso para medir el speedup real",
+    )
+    parser.add_argument(
+        "--guardar-candidato",
+        action="store_true",
+        help="reentrenar la mejor configuración con todos los datos y guardarla como candidato",
+    )
+    args = parser.parse_args()
+
+    X, y, _ = cargar_datos(DATA_PATH)
+    resumen, estadisticas = buscar(
+        X, y, folds=args.folds, workers=args.workers, medir_serial=args.medir_serial,
+    )
+    imprimir_resumen(resumen, estadisticas)
+
+    if args.guardar_candidato:
+        mejor = {k: resumen[0][k] for k in GRILLA_BUSQUEDA}
+        print(f"\nReentrenando la mejor configuración con todos los datos: {mejor}")
+        modelo = RandomForestRegressor(random_state=42, **mejor).fit(X, y)
+        guardar_modelo(modelo, CANDIDATE_MODEL_PATH)
@@ -1,6 +1,11 @@
 import pandas as pd
 import numpy as np
 import os
+import io
+import sys
+import argparse
+import itertools
+import timeit
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error, r2_score
@@ -11,6 +16,23 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 DATA_PATH = os.path.join(BASE_DIR, "data", "bogota_procesado.csv")
 MODEL_PATH = os.path.join(BASE_DIR, "modelo", "modelo_entrenado.pkl")
+PARAMS_PATH = os.path.join(BASE_DIR, "preprocesamiento_datos", "parametros_normalizados.json")
+PIPELINE_PATH = os.path.join(BASE_DIR, "modelo", "pipeline_ecoscore.joblib")
+CANDIDATE_MODEL_PATH = os.path.join(BASE_DIR, "modelo", "modelo_candidato.pkl")
+
+sys.path.insert(0, BASE_DIR)
+from config import FEATURE_ORDER, INFERENCIA_UMBRAL_SKLEARN
+from inferencia.bosque_compilado import BosqueCompilado, guardar_atomico
+from inferencia.pipeline import construir_pipeline
+
+
+# ===== ESPACIO DEL BARRIDO (modo --presupuesto) =====
+GRILLA_PRESUPUESTO = {
+    "n_estimators": [10, 25, 50, 100, 300],
+    "max_depth": [4, 6, 8, 12, None],
+    "min_samples_leaf": [1, 3, 5],
+}
+FILAS_LOTE_LATENCIA = 1000
 
 
 # ===== CARGA DE DATOS =====
@@ -20,15 +42,8 @@ def cargar_datos(path):
 
     df = pd.read_csv(path)
 
-    columnas_entrada = [
-        "ha_verdes_km2_norm",
-        "cobertura_arbolado_pct_norm",
-        "pm25_norm",
-        "pm10_norm",
-        "residuos_no_gestionados_norm",
-        "porcentaje_reciclaje_norm",
-        "porcentaje_transporte_limpio_norm",
-    ]
+    # Mismo orden que usa la inferencia (config.FEATURE_ORDER)
+    columnas_entrada = [f"{f}_norm" for f in FEATURE_ORDER]
 
     columna_objetivo = "ecoscore_0_500"
 
@@ -65,18 +80,174 @@ def entrenar_modelo(X, y):
     return modelo
 
 
+# ===== BARRIDO CON PRESUPUESTO DE LATENCIA =====
+def tamano_modelo_kb(modelo):
+    """Tamaño del modelo serializado con joblib, en KB."""
+    buffer = io.BytesIO()
+    dump(modelo, buffer)
+    return buffer.tell() / 1024
+
+
+def medir_latencia_ms(funcion, repeticiones):
+    """Mejor tiempo por llamada, en milisegundos."""
+    return min(timeit.repeat(funcion, number=repeticiones, repeat=5)) / repeticiones * 1000
+
+
+def evaluar_configuracion(params, X_train, X_test, Y_train, Y_test):
+    """
+    Entrenar una configuración y medir calidad, latencia y tamaño. La latencia
+    se mide como en producción: bosque compilado con los lotes de
+    INFERENCIA_UMBRAL_SKLEARN filas o más delegados en sklearn.
+    """
+    modelo = RandomForestRegressor(random_state=42, **params)
+    modelo.fit(X_train, Y_train)
+    y_pred = modelo.predict(X_test)
+
+    bosque = BosqueCompilado.desde_sklearn(modelo)
+    if INFERENCIA_UMBRAL_SKLEARN:
+        bosque.usar_estimador(modelo, INFERENCIA_UMBRAL_SKLEARN)
+    rng = np.random.default_rng(0)
+    fila = X_test[:1]
+    lote = rng.uniform(0, 1, size=(FILAS_LOTE_LATENCIA, X_test.shape[1]))
+
+    return {
+        **params,
+        "mse": mean_squared_error(Y_test, y_pred),
+        "r2": r2_score(Y_test, y_pred),
+        "latencia_fila_ms": medir_latencia_ms(lambda: bosque.predict(fila), 20),
+        "latencia_lote_ms": medir_latencia_ms(lambda: bosque.predict(lote), 2),
+        "tamano_kb": tamano_modelo_kb(modelo),
+        "modelo": modelo,
+    }
+
+
+def frente_pareto(resultados, criterios=("mse", "latencia_fila_ms", "tamano_kb")):
+    """Marcar las configuraciones no dominadas (menor es mejor en todos los criterios)."""
+    for r in resultados:
+        r["pareto"] = not any(
+            all(o[c] <= r[c] for c in criterios) and any(o[c] < r[c] for c in criterios)
+            for o in resultados
+        )
+    return resultados
+
+
+def barrido_presupuesto(X, y, r2_minimo, latencia_max_ms):
+    """
+    Barrer árboles, profundidad y hojas mínimas; devolver (resultados, elegido).
+
+    El elegido es el modelo más pequeño que cumple el piso de R² y el
+    presupuesto de latencia por fila (None si ninguno lo cumple). Solo se
+    conserva en memoria el mejor modelo válido hasta el momento.
+    """
+    X_train, X_test, Y_train, Y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42
+    )
+
+    claves = list(GRILLA_PRESUPUESTO)
+    combinaciones = list(itertools.product(*GRILLA_PRESUPUESTO.values()))
+    print(f"Evaluando {len(combinaciones)} configuraciones...")
+
+    resultados = []
+    elegido = None
+    for valores in combinaciones:
+        r = evaluar_configuracion(dict(zip(claves, valores)), X_train, X_test, Y_train, Y_test)
+        modelo = r.pop("modelo")
+        valido = r["r2"] >= r2_minimo and r["latencia_fila_ms"] <= latencia_max_ms
+        if valido and (elegido is None or (r["tamano_kb"], r["mse"]) < (elegido["tamano_kb"], elegido["mse"])):
+            r["modelo"] = modelo  # reemplaza (y libera) al elegido anterior
+            if elegido is not None:
+                del elegido["modelo"]
+            elegido = r
+        del modelo
+        resultados.append(r)
+
+    frente_pareto(resultados)
+    return resultados, elegido
+
+
+def imprimir_reporte(resultados, elegido):
+    print("\n==== FRENTE DE PARETO (MSE / latencia por fila / tamaño) ====")
+    print(
+        f"{'':2}{'árboles':>8}{'prof.':>7}{'hoja':>6}{'MSE':>10}{'R²':>9}"
+        f"{'fila ms':>10}{'lote ms':>10}{'KB':>10}"
+    )
+    for r in sorted(resultados, key=lambda r: r["tamano_kb"]):
+        if not r["pareto"] and r is not elegido:
+            continue
+        marca = "→ " if r is elegido else "  "
+        print(
+            f"{marca}{r['n_estimators']:>8}{str(r['max_depth']):>7}{r['min_samples_leaf']:>6}"
+            f"{r['mse']:>10.3f}{r['r2']:>9.5f}{r['latencia_fila_ms']:>10.3f}"
+            f"{r['latencia_lote_ms']:>10.2f}{r['tamano_kb']:>10.1f}"
+        )
+
+
+def guardar_reporte(resultados, path):
+    columnas = [
+        "n_estimators", "max_depth", "min_samples_leaf", "mse", "r2",
+        "latencia_fila_ms", "latencia_lote_ms", "tamano_kb", "pareto",
+    ]
+    pd.DataFrame(resultados)[columnas].to_csv(path, index=False)
+    print(f"\nReporte completo guardado en: {path}")
+
+
 # ===== GUARDAR MODELO =====
 def guardar_modelo(modelo, path):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    dump(modelo, path)
+    # Escritura atómica: el registro de modelos vigila este archivo y no debe
+    # ver nunca un pickle a medio escribir (temporal propio, mkstemp + replace)
+    guardar_atomico(modelo, path)
     print(f"\nModelo guardado en: {path}")
 
 
 # ===== MAIN =====
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Entrenar el modelo de ecoscore.")
+    parser.add_argument(
+        "--candidato",
+        action="store_true",
+        help="guardar como modelo candidato (para evaluarlo en sombra) sin reemplazar el vigente",
+    )
+    parser.add_argument(
+        "--presupuesto",
+        action="store_true",
+        help="barrer configuraciones y elegir el modelo más pequeño que cumpla R² y latencia",
+    )
+    parser.add_argument("--r2-minimo", type=float, default=0.99)
+    parser.add_argument(
+        "--latencia-max-ms", type=float, default=0.5,
+        help="presupuesto de latencia por fila del motor desplegado (compilado + sklearn en lotes grandes)",
+    )
+    parser.add_argument("--reporte", help="ruta CSV con todas las configuraciones evaluadas")
+    args = parser.parse_args()
+
     X, y, columnas = cargar_datos(DATA_PATH)
-    modelo = entrenar_modelo(X, y)
-    guardar_modelo(modelo, MODEL_PATH)
+
+    if args.presupuesto:
+        resultados, elegido = barrido_presupuesto(X, y, args.r2_minimo, args.latencia_max_ms)
+        imprimir_reporte(resultados, elegido)
+        if args.reporte:
+            guardar_reporte(resultados, args.reporte)
+        if elegido is None:
+            print(
+                f"\nNinguna configuración cumple R² >= {args.r2_minimo} "
+                f"y latencia <= {args.latencia_max_ms} ms; no se guarda ningún modelo."
+            )
+            sys.exit(1)
+        modelo = elegido["modelo"]
+        print(
+            f"\nElegido: n_estimators={elegido['n_estimators']}, max_depth={elegido['max_depth']}, "
+            f"min_samples_leaf={elegido['min_samples_leaf']} ({elegido['tamano_kb']:.1f} KB)"
+        )
+    else:
+        modelo = entrenar_modelo(X, y)
+
+    if args.candidato:
+        guardar_modelo(modelo, CANDIDATE_MODEL_PATH)
+        print("Regístralo como sombra con SOMBRA_MODELOS=modelo/modelo_candidato.pkl")
+    else:
+        guardar_modelo(modelo, MODEL_PATH)
+        construir_pipeline(MODEL_PATH, PARAMS_PATH, FEATURE_ORDER, PIPELINE_PATH)
+        print(f"Pipeline guardado en: {PIPELINE_PATH}")
 
     print("\nColumnas usadas en el entrenamiento:")
     for c in columnas:
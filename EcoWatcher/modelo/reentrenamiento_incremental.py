@@ -0,0 +1,174 @@
+"""
+Reentrenamiento incremental desde las predicciones acumuladas en EcoWatcher.db.
+
+Lee en bloques las filas de `predicciones` posteriores a la última marca de
+agua, agrega árboles nuevos al bosque vigente con warm_start (uno o más por
+bloque), descarta los más antiguos si se supera la ventana y publica un
+artefacto versionado. El registro de modelos lo recarga en caliente.
+
+La etiqueta de cada fila es el ecoscore analítico de
+`preprocesador_datos.compute_ecoscore_0_500`, no el ecoscore guardado (que
+es la salida del propio modelo).
+
+Uso (desde la carpeta EcoWatcher):
+    python modelo/reentrenamiento_incremental.py --tam-bloque 5000 --arboles-por-bloque 10
+"""
+import os
+import json
+import shutil
+import argparse
+
+import numpy as np
+import pandas as pd
+from joblib import load
+
+from entrenador_de_modelo import (
+    BASE_DIR, MODEL_PATH, PARAMS_PATH, PIPELINE_PATH, CANDIDATE_MODEL_PATH, guardar_modelo,
+)
+from inferencia.pipeline import construir_pipeline
+from config import FEATURE_ORDER
+from database.db import SessionLectura
+from database.modelodb import Prediccion
+from utils.normalizacion import normalize_matrix
+from preprocesamiento_datos.preprocesador_datos import compute_ecoscore_0_500, ECO_WEIGHTS
+
+# ===== RUTAS =====
+VERSIONES_DIR = os.path.join(BASE_DIR, "modelo", "versiones")
+MARCA_PATH = os.path.join(BASE_DIR, "modelo", "marca_reentrenamiento.json")
+
+
+# ===== MARCA DE AGUA =====
+def leer_marca():
+    if not os.path.exists(MARCA_PATH):
+        return {"ultimo_id": 0, "version": 0}
+    with open(MARCA_PATH, "r") as f:
+        return json.load(f)
+
+
+def guardar_marca(marca):
+    temporal = f"{MARCA_PATH}.tmp"
+    with open(temporal, "w") as f:
+        json.dump(marca, f, indent=2)
+    os.replace(temporal, MARCA_PATH)
+
+
+# ===== LECTURA POR BLOQUES =====
+def leer_bloques(desde_id, tam_bloque):
+    """Generar (ids, X_crudo) por bloques con paginación por id; memoria acotada."""
+    columnas = [getattr(Prediccion, f) for f in FEATURE_ORDER]
+    ultimo = desde_id
+    db = SessionLectura()
+    try:
+        while True:
+            filas = (
+                db.query(Prediccion.id, *columnas)
+                .filter(Prediccion.id > ultimo)
+                .order_by(Prediccion.id)
+                .limit(tam_bloque)
+                .all()
+            )
+            if not filas:
+                return
+            datos = np.array(filas, dtype=float)
+            ultimo = int(datos[-1, 0])
+            yield datos[:, 0].astype(np.int64), datos[:, 1:]
+    finally:
+        db.close()
+
+
+def etiquetas_analiticas(X_norm):
+    """Ecoscore 0-500 según la definición de preprocesamiento (ECO_WEIGHTS)."""
+    df = pd.DataFrame(X_norm, columns=[f"{f}_norm" for f in FEATURE_ORDER])
+    return np.asarray(compute_ecoscore_0_500(df, ECO_WEIGHTS))
+
+
+# ===== ACTUALIZACIÓN DEL BOSQUE =====
+def agregar_arboles(modelo, X, y, n_arboles):
+    """Entrenar `n_arboles` árboles nuevos sobre (X, y) conservando los existentes."""
+    modelo.set_params(warm_start=True, n_estimators=len(modelo.estimators_) + n_arboles)
+    modelo.fit(X, y)
+    return modelo
+
+
+def recortar_ventana(modelo, max_arboles):
+    """Ventana deslizante: conservar solo los `max_arboles` árboles más recientes."""
+    if max_arboles and len(modelo.estimators_) > max_arboles:
+        modelo.estimators_ = modelo.estimators_[-max_arboles:]
+        modelo.n_estimators = len(modelo.estimators_)
+    return modelo
+
+
+def reentrenar(tam_bloque, arboles_por_bloque, min_filas, max_arboles, candidato=False):
+    marca = leer_marca()
+    modelo = load(MODEL_PATH)
+    arboles_iniciales = len(modelo.estimators_)
+
+    filas_usadas = 0
+    bloques = 0
+    ultimo_id = marca["ultimo_id"]
+
+    for ids, X_crudo in leer_bloques(marca["ultimo_id"], tam_bloque):
+        if len(ids) < min_filas:
+            # Bloque final demasiado pequeño: se deja para la próxima ejecución
+            print(f"Quedan {len(ids)} filas (< {min_filas}); se esperan más datos.")
+            break
+
+        X_norm = normalize_matrix(X_crudo, FEATURE_ORDER)
+        y = etiquetas_analiticas(X_norm)
+        agregar_arboles(modelo, X_norm, y, arboles_por_bloque)
+
+        filas_usadas += len(ids)
+        bloques += 1
+        ultimo_id = int(ids[-1])
+        print(f"Bloque {bloques}: {len(ids)} filas (hasta id {ultimo_id}), +{arboles_por_bloque} árboles")
+
+    if bloques == 0:
+        print(f"No hay filas nuevas suficientes desde id {marca['ultimo_id']}; no se publica versión.")
+        return None
+
+    recortar_ventana(modelo, max_arboles)
+    modelo.set_params(warm_start=False)
+
+    # ===== PUBLICAR =====
+    print("\n==== REENTRENAMIENTO INCREMENTAL ====")
+    print(f"Filas nuevas usadas: {filas_usadas} en {bloques} bloques")
+    print(f"Árboles: {arboles_iniciales} -> {len(modelo.estimators_)}")
+
+    if candidato:
+        # El candidato no avanza la marca: el modelo vigente aún no vio estas filas
+        guardar_modelo(modelo, CANDIDATE_MODEL_PATH)
+        return CANDIDATE_MODEL_PATH
+
+    version = marca["version"] + 1
+    os.makedirs(VERSIONES_DIR, exist_ok=True)
+    ruta_version = os.path.join(VERSIONES_DIR, f"modelo_v{version:04d}.pkl")
+
+    guardar_modelo(modelo, MODEL_PATH)
+    shutil.copyfile(MODEL_PATH, ruta_version)
+    construir_pipeline(MODEL_PATH, PARAMS_PATH, FEATURE_ORDER, PIPELINE_PATH)
+    guardar_marca({"ultimo_id": ultimo_id, "version": version})
+
+    print(f"Versión publicada: {ruta_version}")
+    return ruta_version
+
+
+# ===== MAIN =====
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reentrenamiento incremental desde EcoWatcher.db.")
+    parser.add_argument("--tam-bloque", type=int, default=5000)
+    parser.add_argument("--arboles-por-bloque", type=int, default=10)
+    parser.add_argument("--min-filas", type=int, default=50, help="filas mínimas para entrenar un bloque")
+    parser.add_argument(
+        "--max-arboles", type=int, default=300,
+        help="ventana deslizante de árboles (0 = sin límite)",
+    )
+    parser.add_argument(
+        "--candidato",
+        action="store_true",
+        help="publicar como modelo candidato (sombra) en lugar de reemplazar el vigente",
+    )
+    args = parser.parse_args()
+
+    reentrenar(
+        args.tam_bloque, args.arboles_por_bloque, args.min_filas, args.max_arboles, args.candidato
+    )
@@ -30,6 +30,9 @@ ECO_WEIGHTS = {
     "porcentaje_transporte_limpio": 0.13,
 }
 
+# Variables donde MÁS = PEOR (se invierten en el ecoscore)
+NEGATIVE_FEATURES = ["pm25", "pm10", "residuos_no_gestionados"]
+
 NORMALIZATION_METHOD = "minmax"
 
 
@@ -97,7 +100,7 @@ def compute_ecoscore_0_500(df, weights):
         if norm_col not in df.columns:
             raise KeyError(f"Falta {norm_col}")
         # invertir para "más es peor"
-        if feature in ["pm25", "pm10", "residuos_no_gestionados"]:
+        if feature in NEGATIVE_FEATURES:
             contrib = (1 - df[norm_col]) * w
         else:
             contrib = df[norm_col] * w
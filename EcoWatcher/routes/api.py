@@ -1,40 +1,429 @@
-from flask import Blueprint, request, jsonify
-from database.db import SessionLocal
-from database.modelodb import Prediccion
+import io
+import math
+import queue
+
+import numpy as np
+import pandas as pd
+from flask import Blueprint, Response, request, jsonify, session
+from database.db import SessionLocal, SessionLectura
+from database.sqlite import con_reintentos
+from database.escritor import escritor, ahora_utc
+from database.agregados import insertar_predicciones_df, consultar as consultar_agregados, parsear_fecha, FORMATOS
+from database.lecturas import (
+    leer_historico, parametros_historico, respuesta_historico, respuesta_ultimo,
+    ERROR_PARAMETROS_HISTORICO,
+)
+from database.recientes import recientes
+from database.eventos import canal, Suscripcion, evento_prediccion, formato_sse, COMENTARIO_SSE
+from database.archivo import ultimo_id_archivado
+from database.exportar import exportar as exportar_predicciones, nombre_archivo, FORMATOS as FORMATOS_EXPORTAR
+from config import (
+    FEATURE_ORDER, API_PREDICT_MAX_FILAS, AGREGADOS_MAX_INTERVALOS, SSE_HEARTBEAT_S,
+    HISTORICO_MAX_LIMIT, DASHBOARD_PUNTOS,
+)
+from routes import predicciones as rutas_predicciones
+from utils.categorias import categorias_ecoscore
+from utils.recomendaciones import generar_recomendaciones
+from utils.json_rapido import dumps, respuesta_json
+from utils.sensibilidad import analizar_sensibilidad, validar_pasos, PASOS_DEFECTO
+from inferencia.sombra import sombra
+from inferencia.cache import cache_predicciones
+from inferencia.registro import registro as registro_modelos
+from inferencia.analitico import motor_analitico
 
 api = Blueprint('api', __name__, url_prefix='/api')
 
 
 @api.route("/historico")
 def historico():
-    limit = int(request.args.get("limit", 20))
-    db = SessionLocal()
-    rows = db.query(Prediccion).order_by(Prediccion.id.desc()).limit(limit).all()
-    db.close()
+    """
+    Histórico de predicciones, de la más reciente a la más antigua por
+    (timestamp, id): las lecturas viejas de una ingesta quedan en su lugar
+    cronológico aunque tengan ids nuevos.
+
+    Query params:
+        limit       filas por página (máximo HISTORICO_MAX_LIMIT)
+        before      página siguiente: filas anteriores a este cursor (`next_before`)
+        since       filas nuevas: las `limit` inmediatamente posteriores a este
+                    cursor (siguiente consulta con since=`newest`)
+        from, to    rango de timestamp ISO (UTC), inclusive
 
-    data = [
-        {
-            "id": r.id,
-            "ecoscore": r.ecoscore,
-            "timestamp": r.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
-        }
-        for r in rows
-    ]
+    Las filas archivadas se intercalan con las de SQLite por la misma clave.
+    """
+    try:
+        parametros = parametros_historico(request.args)
+    except ValueError:
+        return jsonify({"error": ERROR_PARAMETROS_HISTORICO}), 400
 
-    return jsonify({"historico": data})
+    # Páginas sin filtro de fecha dentro de la ventana reciente: desde memoria
+    limit, antes, despues, desde, hasta = parametros
+    rows = None
+    if desde is None and hasta is None:
+        rows = recientes.historico(limit, antes, despues)
+    if rows is None:
+        # Tuplas (id, ecoscore, timestamp ya formateado); nada de objetos ORM
+        rows = leer_historico(*parametros)
+    return respuesta_json(respuesta_historico(rows, *parametros))
 
 
 @api.route("/ultimo")
 def ultimo():
-    db = SessionLocal()
-    row = db.query(Prediccion).order_by(Prediccion.id.desc()).first()
-    db.close()
+    return respuesta_json(respuesta_ultimo(recientes.ultimo()))
+
+
+# ===== SNAPSHOT DEL DASHBOARD =====
+
+
+@api.route("/dashboard")
+def dashboard():
+    """
+    Todo lo que muestra el dashboard en una respuesta: última predicción (con
+    categoría y tendencia) y los últimos `n` puntos en orden cronológico.
+
+    Query params:
+        n   puntos del historial (por defecto DASHBOARD_PUNTOS)
+
+    El ETag es el id de la última predicción (la archivada si SQLite está
+    vacía, igual que /api/ultimo): con If-None-Match vigente se responde 304
+    sin armar el cuerpo, y el cuerpo de cada ETag se arma una sola vez por
+    proceso y se reutiliza para todos los clientes.
+    """
+    try:
+        n = max(1, min(int(request.args.get("n", DASHBOARD_PUNTOS)), HISTORICO_MAX_LIMIT))
+    except ValueError:
+        return jsonify({"error": "n debe ser un entero"}), 400
+
+    actual = recientes.ultimo_y_anterior()
+    etag = f"{actual[0][0] if actual else ultimo_id_archivado()}-{n}"
+    if request.if_none_match.contains(etag):
+        respuesta = Response(status=304)
+    else:
+        respuesta = Response(_cuerpo_dashboard(etag, n), mimetype="application/json")
+
+    respuesta.set_etag(etag)
+    respuesta.headers["Cache-Control"] = "no-cache"  # el navegador revalida siempre con el ETag
+    return respuesta
+
+
+_snapshots = {}  # n -> (etag, cuerpo JSON) del último snapshot armado
+_MAX_SNAPSHOTS = 32
+
+
+def _cuerpo_dashboard(etag, n):
+    guardado = _snapshots.get(n)
+    if guardado is not None and guardado[0] == etag:
+        return guardado[1]
+
+    # Una fila de más para la tendencia de la última. La página ya intercala
+    # SQLite y archivo por (timestamp, id), igual que /api/ultimo
+    rows = recientes.historico(n + 1)
+    if rows is None:
+        rows = leer_historico(n + 1)
+    historico = respuesta_historico(rows, n + 1)["historico"]
+    historico.reverse()
+
+    ultimo = None
+    if historico:
+        fila = historico[-1]
+        anterior = historico[-2]["ecoscore"] if len(historico) > 1 else None
+        ultimo = evento_prediccion((fila["id"], fila["ecoscore"], fila["timestamp"]), anterior)
+    del historico[:-n]
+
+    cuerpo = dumps({"ultimo": ultimo, "historico": historico})
+    if len(_snapshots) >= _MAX_SNAPSHOTS:
+        _snapshots.clear()
+    _snapshots[n] = (etag, cuerpo)
+    return cuerpo
+
+
+# ===== STREAM DE PREDICCIONES (SSE) =====
+
+
+@api.route("/stream")
+def stream():
+    """
+    Server-Sent Events con cada predicción nueva (id, ecoscore, timestamp, tendencia).
+
+    Al conectar se envía la última predicción; después un evento `prediccion`
+    por fila guardada y un comentario keep-alive cada SSE_HEARTBEAT_S segundos.
+
+    Bajo WSGI cada conexión ocupa un hilo del worker mientras dure: el
+    dashboard solo se conecta cuando lo sirve asgi.py y si no hace polling
+    de /api/dashboard.
+    """
+    suscripcion = Suscripcion()
+    canal.suscribir(suscripcion.entregar)
+
+    def generar():
+        try:
+            actual = recientes.ultimo_y_anterior()
+            if actual is None:
+                yield formato_sse({"status": "sin_datos"}, tipo="sin_datos")
+            else:
+                yield formato_sse(evento_prediccion(*actual))
+
+            while not suscripcion.desbordada:
+                try:
+                    evento = suscripcion.cola.get(timeout=SSE_HEARTBEAT_S)
+                except queue.Empty:
+                    recientes.revisar()  # escrituras de otros procesos
+                    yield COMENTARIO_SSE
+                    continue
+                yield formato_sse(evento)
+            canal.registrar_desborde()
+        finally:
+            canal.cancelar(suscripcion.entregar)
+
+    return Response(
+        generar(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ===== EXPORTACIÓN =====
+
+
+@api.route("/exportar")
+def exportar():
+    """
+    Descargar el histórico completo en streaming (memoria constante).
+
+    Query params:
+        format=csv|ndjson  (por defecto csv)
+        gzip=1             comprimir la descarga
+        from, to           rango de timestamp ISO (UTC), inclusive
+    """
+    formato = request.args.get("format", "csv")
+    if formato not in FORMATOS_EXPORTAR:
+        return jsonify({"error": f"format debe ser uno de: {', '.join(FORMATOS_EXPORTAR)}"}), 400
+    try:
+        desde = parsear_fecha(request.args.get("from"))
+        hasta = parsear_fecha(request.args.get("to"))
+    except ValueError:
+        return jsonify({"error": "Parámetros inválidos; fechas en formato ISO (YYYY-MM-DD[ HH:MM:SS])"}), 400
+    comprimir = request.args.get("gzip") == "1"
+
+    return Response(
+        exportar_predicciones(formato, desde, hasta, comprimir),
+        mimetype="application/gzip" if comprimir else FORMATOS_EXPORTAR[formato],
+        headers={"Content-Disposition": f"attachment; filename={nombre_archivo(formato, comprimir)}"},
+    )
+
+
+# ===== AGREGADOS POR INTERVALO =====
+
 
-    if not row:
-        return jsonify({"status": "sin_datos"})
+@api.route("/agregados")
+def agregados():
+    """
+    Ecoscore agregado por intervalo desde las tablas de resumen.
 
+    Query params:
+        granularity=minute|hour|day  (por defecto hour)
+        from, to                     fechas ISO (UTC), inclusive
+        limit                        máximo de intervalos (los más recientes del rango)
+    """
+    granularidad = request.args.get("granularity", "hour")
+    if granularidad not in FORMATOS:
+        return jsonify({"error": f"granularity debe ser una de: {', '.join(FORMATOS)}"}), 400
+    try:
+        desde = parsear_fecha(request.args.get("from"))
+        hasta = parsear_fecha(request.args.get("to"))
+        limite = max(1, min(int(request.args.get("limit", AGREGADOS_MAX_INTERVALOS)), AGREGADOS_MAX_INTERVALOS))
+    except ValueError:
+        return jsonify({"error": "Parámetros inválidos; fechas en formato ISO (YYYY-MM-DD[ HH:MM:SS])"}), 400
+
+    db = SessionLectura()
+    try:
+        data = consultar_agregados(db, granularidad, desde, hasta, limite)
+    finally:
+        db.close()
+
+    return jsonify({"granularity": granularidad, "agregados": data})
+
+
+# ===== PREDICCIÓN EN LOTE =====
+
+
+def _leer_filas():
+    """
+    Leer el cuerpo de la petición como matriz N×F en el orden de FEATURE_ORDER.
+
+    Acepta un arreglo JSON de objetos o un CSV con encabezado (Content-Type text/csv).
+    Devuelve (X, error).
+    """
+    if request.mimetype == "text/csv":
+        try:
+            df = pd.read_csv(io.BytesIO(request.get_data()))
+        except Exception:
+            return None, "CSV inválido"
+        faltantes = [f for f in FEATURE_ORDER if f not in df.columns]
+        if faltantes:
+            return None, f"Faltan columnas: {', '.join(faltantes)}"
+        try:
+            X = df[FEATURE_ORDER].to_numpy(dtype=float)
+        except (TypeError, ValueError):
+            return None, "Valores no numéricos en el CSV"
+    else:
+        filas = request.get_json(silent=True)
+        if not isinstance(filas, list):
+            return None, "Se esperaba un arreglo JSON de filas"
+        try:
+            X = np.array([[fila[f] for f in FEATURE_ORDER] for fila in filas], dtype=float)
+        except KeyError as e:
+            return None, f"Falta valor para {e.args[0]}"
+        except (TypeError, ValueError):
+            return None, "Valores inválidos en las filas"
+
+    X = X.reshape(-1, len(FEATURE_ORDER))
+    if not np.isfinite(X).all():
+        return None, "Hay valores vacíos o no finitos"
+    return X, None
+
+
+@api.route("/predict", methods=["POST"])
+def predict_lote():
+    """
+    Predecir el ecoscore de muchas filas con una sola llamada al modelo.
+
+    Query params:
+        recomendaciones=1  incluir recomendaciones por fila
+        guardar=1          persistir las filas en `predicciones` (un solo INSERT masivo);
+                           requiere sesión iniciada, igual que /predict
+        motor=auto|bosque|analitico
+                           motor de predicción (auto = analítico solo bajo sobrecarga)
+    """
+    motor = request.args.get("motor", "auto")
+    if motor not in rutas_predicciones.MOTORES:
+        return jsonify({"error": f"Motor inválido: {motor}"}), 400
+    guardar = request.args.get("guardar") == "1"
+    if guardar and "usuario_id" not in session:
+        return jsonify({"error": "Inicia sesión para guardar predicciones"}), 401
+
+    X, error = _leer_filas()
+    if error:
+        return jsonify({"error": error}), 400
+    if len(X) > API_PREDICT_MAX_FILAS:
+        return jsonify({"error": f"Máximo {API_PREDICT_MAX_FILAS} filas por petición"}), 413
+
+    if len(X) == 0:
+        motor = "bosque" if motor == "auto" else motor
+        scores = np.empty(0)
+    else:
+        # ===== NORMALIZAR Y PREDECIR =====
+        X_norm = registro_modelos.pipeline.transform(X)
+        motor = rutas_predicciones.resolver_motor(motor)
+        y = rutas_predicciones.predecir(X_norm, motor)
+        if motor == "bosque":
+            sombra.observar(X_norm, y, fuente="api_predict")
+        scores = np.round(y, 3)
+
+    categorias = categorias_ecoscore(scores)
+    filas = X.tolist()
+    scores_lista = scores.tolist()
+
+    respuesta = {
+        "n": len(scores_lista),
+        "motor": motor,
+        "ecoscores": scores_lista,
+        "categorias": categorias.tolist(),
+    }
+
+    if request.args.get("recomendaciones") == "1":
+        respuesta["recomendaciones"] = [
+            generar_recomendaciones(dict(zip(FEATURE_ORDER, fila)), score)
+            for fila, score in zip(filas, scores_lista)
+        ]
+
+    # ===== GUARDAR EN BD =====
+    if guardar and filas:
+        ahora = ahora_utc()
+        df = pd.DataFrame(X, columns=FEATURE_ORDER)
+        df["ecoscore"] = scores
+        df["timestamp"] = pd.Timestamp(ahora)
+
+        def insertar():
+            db = SessionLocal()
+            try:
+                ids = insertar_predicciones_df(db, df, devolver_ids=True)
+                db.commit()
+                return ids
+            finally:
+                db.close()
+
+        ids = con_reintentos(insertar)
+        recientes.agregar([{"ecoscore": s, "timestamp": ahora} for s in scores_lista], ids)
+        respuesta["guardadas"] = len(ids)
+
+    return jsonify(respuesta)
+
+
+# ===== ANÁLISIS DE SENSIBILIDAD (what-if) =====
+
+
+@api.route("/sensibilidad", methods=["POST"])
+def sensibilidad():
+    """
+    Curvas de sensibilidad del ecoscore alrededor de una entrada base.
+
+    Cuerpo: objeto JSON con las 7 variables crudas.
+    Query params:
+        pasos=5,10,20      cambios porcentuales (se evalúan con signo + y -)
+        motor=auto|bosque|analitico
+    """
+    inputs = request.get_json(silent=True)
+    if not isinstance(inputs, dict):
+        return jsonify({"error": "Se esperaba un objeto JSON con las variables"}), 400
+    try:
+        inputs = {f: float(inputs[f]) for f in FEATURE_ORDER}
+    except KeyError as e:
+        return jsonify({"error": f"Falta valor para {e.args[0]}"}), 400
+    except (TypeError, ValueError):
+        return jsonify({"error": "Valores inválidos"}), 400
+    if not all(math.isfinite(v) for v in inputs.values()):
+        return jsonify({"error": "Las variables deben ser números finitos"}), 400
+
+    pasos = PASOS_DEFECTO
+    if "pasos" in request.args:
+        try:
+            pasos = validar_pasos(p for p in request.args["pasos"].split(",") if p.strip())
+        except ValueError as e:
+            return jsonify({"error": f"pasos inválidos: {e}"}), 400
+
+    motor = request.args.get("motor", "auto")
+    if motor not in rutas_predicciones.MOTORES:
+        return jsonify({"error": f"Motor inválido: {motor}"}), 400
+    motor = rutas_predicciones.resolver_motor(motor)
+
+    resultado = analizar_sensibilidad(
+        inputs,
+        registro_modelos.pipeline.transform,
+        lambda X_norm: rutas_predicciones.predecir(X_norm, motor),
+        pasos,
+    )
+    resultado["motor"] = motor
+    return jsonify(resultado)
+
+
+# ===== MÉTRICAS =====
+
+
+@api.route("/metricas")
+def metricas():
+    despachador = rutas_predicciones.despachador
     return jsonify({
-        "id": row.id,
-        "ecoscore": row.ecoscore,
-        "timestamp": row.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+        "despachador": despachador.metricas() if despachador else None,
+        "sombra": sombra.metricas(),
+        "cache": cache_predicciones.metricas(),
+        "analitico": motor_analitico.metricas(),
+        "escritor": escritor.metricas(),
+        "recientes": recientes.metricas(),
+        "stream": canal.metricas(),
     })
+
+
+@api.route("/sombra")
+def comparacion_sombra():
+    """Diferencias y latencias acumuladas de cada modelo sombra frente al vigente."""
+    return jsonify({"modelos": sombra.modelos, "resumen": sombra.resumen()})
@@ -1,21 +1,68 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session
-import numpy as np
-from database.db import SessionLocal
-from database.modelodb import Prediccion
-from config import FEATURE_ORDER
-from utils.normalizacion import normalize_feature
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, session
+from database.escritor import escritor
+from config import FEATURE_ORDER, ANALITICO_UMBRAL_COLA
 from utils.recomendaciones import generar_recomendaciones
+from utils.categorias import categoria_ecoscore
+from inferencia.registro import registro as registro_modelos
+from inferencia.sombra import sombra
+from inferencia.cache import cache_predicciones
+from inferencia.analitico import motor_analitico
 
 predicciones = Blueprint('predicciones', __name__)
 
+MOTORES = ("auto", "bosque", "analitico")
+
 # Este será importado desde app.py
-model = None
+despachador = None
+
+
+def get_model():
+    """Modelo de ML vigente (propiedad del registro de modelos)."""
+    return registro_modelos.modelo
+
+
+def set_despachador(nuevo_despachador):
+    """Establecer el despachador de inferencia compartido."""
+    global despachador
+    despachador = nuevo_despachador
+
+
+def sobrecargado():
+    """True si la cola del despachador supera ANALITICO_UMBRAL_COLA."""
+    return (
+        despachador is not None
+        and ANALITICO_UMBRAL_COLA > 0
+        and despachador.profundidad_cola > ANALITICO_UMBRAL_COLA
+    )
+
 
+def resolver_motor(motor):
+    """Motor a usar ("bosque" o "analitico"); "auto" pasa al analítico bajo sobrecarga."""
+    if motor == "analitico":
+        motor_analitico.contar_uso()
+        return "analitico"
+    if motor == "auto" and sobrecargado():
+        motor_analitico.contar_uso(sobrecarga=True)
+        return "analitico"
+    return "bosque"
 
-def set_model(ml_model):
-    """Establecer el modelo de ML globalmente."""
-    global model
-    model = ml_model
+
+def predecir(X, motor="bosque"):
+    """
+    Predecir con el motor indicado.
+
+    El bosque va por el despachador compartido (o directo si no hay) y su
+    resultado alimenta el residuo del motor analítico.
+    """
+    if motor == "analitico":
+        return motor_analitico.predict(X)
+
+    if despachador is None:
+        y = get_model().predict(X)
+    else:
+        y = despachador.predecir(X)
+    motor_analitico.registrar_residuo(X, y)
+    return y
 
 
 @predicciones.route("/", methods=["GET"])
@@ -29,7 +76,11 @@ def index():
 def predict():
     if "usuario_id" not in session:
         return redirect(url_for("auth.login"))
-    
+
+    motor = request.form.get("motor") or request.args.get("motor", "auto")
+    if motor not in MOTORES:
+        return render_template("index.html", error=f"Motor inválido: {motor}"), 400
+
     inputs = {}
 
     # ===== LEER DATOS DEL FORM =====
@@ -43,32 +94,29 @@ def predict():
             return render_template("index.html", error=f"Valor inválido para {feat}")
 
     # ===== NORMALIZAR =====
-    x_norm = [normalize_feature(f, inputs[f]) for f in FEATURE_ORDER]
-    X = np.array([x_norm])
+    X = registro_modelos.pipeline.transform_dict(inputs)
 
-    # ===== PREDECIR =====
-    pred = model.predict(X)[0]
+    # ===== PREDECIR (con caché por vector normalizado) =====
+    motor = resolver_motor(motor)
+    if motor == "analitico":
+        pred = float(predecir(X, motor)[0])
+    else:
+        version = registro_modelos.version
+        pred = cache_predicciones.obtener(X[0], version)
+        if pred is None:
+            pred = float(predecir(X)[0])
+            cache_predicciones.guardar(X[0], version, pred)
+            sombra.observar(X, [pred], fuente="predict")
     pred_rounded = round(float(pred), 3)
 
     # ===== CATEGORÍA =====
-    if pred_rounded >= 450:
-        cat = "Excelente"
-    elif pred_rounded >= 350:
-        cat = "Bueno"
-    elif pred_rounded >= 200:
-        cat = "Moderado"
-    else:
-        cat = "Crítico"
+    cat = categoria_ecoscore(pred_rounded)
 
     # ===== GENERAR RECOMENDACIONES =====
     recomendaciones = generar_recomendaciones(inputs, pred_rounded)
 
-    # ===== GUARDAR EN BD =====
-    db = SessionLocal()
-    registro = Prediccion(**inputs, ecoscore=pred_rounded)
-    db.add(registro)
-    db.commit()
-    db.close()
+    # ===== GUARDAR EN BD (diferido, por lotes) =====
+    escritor.encolar(dict(inputs, ecoscore=pred_rounded))
 
     # ===== RENDER =====
     return render_template(
@@ -85,4 +133,5 @@ def dashboard():
     if "usuario_id" not in session:
         return redirect(url_for("auth.login"))
     
-    return render_template("dashboard.html")
+    # El dashboard solo abre /api/stream si lo sirve el despliegue ASGI
+    return render_template("dashboard.html", stream_sse=current_app.config.get("STREAM_SSE", False))
@@ -2,90 +2,141 @@
     document.addEventListener('DOMContentLoaded', () => {
         let graficoGlobal = null;
 
-    // ===== CALCULAR TENDENCIA =====
-    async function calcularTendencia(scoreActual) {
-        const res = await fetch('/api/historico?limit=2');
-        const data = await res.json();
-        const valores = data.historico.reverse();
-
-        if (valores.length < 2) return { texto: '→ Estable', color: '#555' };
-
-        const anterior = valores[valores.length - 2].ecoscore;
-        const diferencia = scoreActual - anterior;
-
-        if (diferencia > 5) return { texto: '↗ Mejora', color: '#2e7d32' };
-        if (diferencia < -5) return { texto: '↘ Empeora', color: '#c62828' };
-        return { texto: '→ Estable', color: '#555' };
-    }
+    // ===== CATEGORÍA Y TENDENCIA (calculadas en el servidor) =====
+    const CLASES_CATEGORIA = {
+        'Crítico': 'critical',
+        'Moderado': 'moderate',
+        'Bueno': 'good',
+        'Excelente': 'excellent',
+    };
+
+    const TENDENCIAS = {
+        mejora: { texto: '↗ Mejora', color: '#2e7d32' },
+        empeora: { texto: '↘ Empeora', color: '#c62828' },
+        estable: { texto: '→ Estable', color: '#555' },
+    };
 
     // ===== ÚLTIMO ECOSCORE =====
-    async function cargarUltimo() {
-        try {
-            const res = await fetch('/api/ultimo');
-            const data = await res.json();
+    function mostrarUltimo(data) {
+        const score = data.ecoscore;
+        document.getElementById('ultimo').innerText = `${score.toFixed(2)} (${data.timestamp})`;
+
+        // Clasificación
+        const estadoElem = document.getElementById('estado');
+        if (estadoElem) {
+            estadoElem.innerText = data.categoria;
+            estadoElem.className = 'eco-state ' + (CLASES_CATEGORIA[data.categoria] || '');
+        }
 
-            if (data.status === 'sin_datos') {
-                document.getElementById('ultimo').innerText = 'No hay datos aún';
-                return;
-            }
+        // Tendencia
+        const tendenciaElem = document.getElementById('tendencia');
+        const tendencia = TENDENCIAS[data.tendencia] || TENDENCIAS.estable;
+        if (tendenciaElem) {
+            tendenciaElem.innerText = tendencia.texto;
+            tendenciaElem.style.color = tendencia.color;
+        }
 
-            const score = data.ecoscore;
-            document.getElementById('ultimo').innerText = `${score.toFixed(2)} (${data.timestamp})`;
+        // Alerta
+        const alerta = document.getElementById('alerta');
+        const card = document.getElementById('card-principal');
+        const sonido = document.getElementById('alerta-sound');
 
-            // Clasificación
-            let estado = '', clase = '';
-            if (score < 200) { estado = 'Crítico'; clase = 'critical'; }
-            else if (score < 350) { estado = 'Moderado'; clase = 'moderate'; }
-            else if (score < 450) { estado = 'Bueno'; clase = 'good'; }
-            else { estado = 'Excelente'; clase = 'excellent'; }
+        try { if (sonido) { sonido.currentTime = 0; sonido.play(); } } catch(e){}
 
-            const estadoElem = document.getElementById('estado');
-            if (estadoElem) {
-                estadoElem.innerText = estado;
-                estadoElem.className = 'eco-state ' + clase;
-            }
+        if(data.categoria === 'Crítico') {
+            if(alerta) alerta.style.display = 'block';
+            if(card) card.style.border = '3px solid #e53935';
+        } else {
+            if(alerta) alerta.style.display = 'none';
+            if(card) card.style.border = 'none';
+        }
+    }
 
-            // Tendencia
-            const tendenciaElem = document.getElementById('tendencia');
-            const tendencia = await calcularTendencia(score);
-            if (tendenciaElem) {
-                tendenciaElem.innerText = tendencia.texto;
-                tendenciaElem.style.color = tendencia.color;
-            }
+    // ===== STREAM DE PREDICCIONES (SSE) =====
+    // Solo el despliegue ASGI (asgi.py) marca <body data-stream="sse">: allí cada
+    // cliente es una cola del event loop. Bajo WSGI cada EventSource ocuparía un
+    // hilo del worker para siempre, así que se hace polling de /api/dashboard,
+    // que con ETag/304 no arma el cuerpo si no hubo predicciones nuevas.
+    const USAR_SSE = document.body.dataset.stream === 'sse';
+    const INTERVALO_POLLING_MS = 10000;
+
+    let stream = null;
+    let ultimoId = null;
+
+    function cargarUltimo() {
+        if (stream) return;
+        stream = new EventSource('/api/stream');
+
+        // El primer evento de cada conexión es la última predicción; los siguientes, las nuevas
+        stream.addEventListener('prediccion', (e) => {
+            const data = JSON.parse(e.data);
+            if (ultimoId !== null && data.id <= ultimoId) return;
+            const esNueva = ultimoId !== null;
+            ultimoId = data.id;
+
+            mostrarUltimo(data);
+            if (esNueva) agregarPunto(data);
+        });
 
-            // Alerta
-            const alerta = document.getElementById('alerta');
-            const card = document.getElementById('card-principal');
-            const sonido = document.getElementById('alerta-sound');
+        stream.addEventListener('sin_datos', () => {
+            document.getElementById('ultimo').innerText = 'No hay datos aún';
+        });
 
-            try { if (sonido) { sonido.currentTime = 0; sonido.play(); } } catch(e){}
+        // Tras una reconexión pudieron perderse puntos: recargar el gráfico una vez
+        let conectado = false;
+        stream.addEventListener('open', () => {
+            if (conectado) dibujarGrafico();
+            conectado = true;
+        });
+
+        stream.addEventListener('error', (err) => {
+            console.error('Stream de predicciones interrumpido, reconectando:', err);
+        });
+    }
 
-            if(score < 200) {
-                if(alerta) alerta.style.display = 'block';
-                if(card) card.style.border = '3px solid #e53935';
-            } else {
-                if(alerta) alerta.style.display = 'none';
-                if(card) card.style.border = 'none';
+    // ===== POLLING (despliegue WSGI) =====
+    async function actualizarDashboard() {
+        try {
+            const snapshot = await cargarDashboard();
+            if (!snapshot.ultimo) {
+                if (ultimoId === null) document.getElementById('ultimo').innerText = 'No hay datos aún';
+                return;
             }
+            if (ultimoId !== null && snapshot.ultimo.id <= ultimoId) return;
+            ultimoId = snapshot.ultimo.id;
+            mostrarUltimo(snapshot.ultimo);
 
+            const ultimoGrafico = idsGrafico.length ? idsGrafico[idsGrafico.length - 1] : -1;
+            snapshot.historico.filter(x => x.id > ultimoGrafico).forEach(agregarPunto);
         } catch(err) {
-            console.error('Error cargando último ecoscore:', err);
+            console.error('Error actualizando el dashboard:', err);
         }
     }
 
-    // ===== HISTORIAL =====
-    async function cargarHistorial() {
-        const res = await fetch('/api/historico?limit=30');
-        const data = await res.json();
-        return data.historico.reverse();
+    // ===== SNAPSHOT (último + historial en una sola llamada) =====
+    const PUNTOS_GRAFICO = 30;
+    let idsGrafico = [];
+
+    async function cargarDashboard() {
+        // Con ETag + no-cache el navegador revalida y recibe 304 si no hubo predicciones nuevas
+        const res = await fetch(`/api/dashboard?n=${PUNTOS_GRAFICO}`);
+        return res.json();
     }
 
     // ===== GRAFICO =====
     async function dibujarGrafico() {
         try {
-            const historial = await cargarHistorial();
+            const snapshot = await cargarDashboard();
+            const historial = snapshot.historico;
+
+            if (snapshot.ultimo && (ultimoId === null || snapshot.ultimo.id > ultimoId)) {
+                ultimoId = snapshot.ultimo.id;
+                mostrarUltimo(snapshot.ultimo);
+            }
+
             const labels = historial.map(x => x.timestamp);
             const valores = historial.map(x => Number(x.ecoscore));
+            idsGrafico = historial.map(x => x.id);
 
             const canvas = document.getElementById('grafico');
             if (!canvas) return;
@@ -119,8 +170,21 @@
         }
     }
 
-    // ===== AUTO-REFRESCO =====
-    setInterval(() => { cargarUltimo(); dibujarGrafico(); }, 60000);
+    // Sumar un punto recibido por el stream sin volver a pedir el historial
+    function agregarPunto(data) {
+        if (graficoGlobal === null || idsGrafico.includes(data.id)) return;
+
+        idsGrafico.push(data.id);
+        graficoGlobal.data.labels.push(data.timestamp);
+        graficoGlobal.data.datasets[0].data.push(Number(data.ecoscore));
+
+        if (idsGrafico.length > PUNTOS_GRAFICO) {
+            idsGrafico.shift();
+            graficoGlobal.data.labels.shift();
+            graficoGlobal.data.datasets[0].data.shift();
+        }
+        graficoGlobal.update();
+    }
 
     // ===== MODAL DE TABLA =====
     const btnAbrirTabla = document.querySelector("#btn-tabla");
@@ -161,10 +225,11 @@
     });
 
         // ===== LLAMADAS INICIALES =====
-        cargarUltimo();
         dibujarGrafico();
+        if (USAR_SSE) cargarUltimo();
+        else setInterval(actualizarDashboard, INTERVALO_POLLING_MS);
 
         // exportar funciones globalmente
-        window._eco = { cargarUltimo, dibujarGrafico };
+        window._eco = { cargarUltimo, dibujarGrafico, actualizarDashboard };
     });
 })();
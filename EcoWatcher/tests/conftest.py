@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# Base y archivo de prueba antes de importar config / database.db
+_DATOS = tempfile.mkdtemp(prefix="ecowatcher-tests-")
+os.environ["ECOWATCHER_DB"] = os.path.join(_DATOS, "EcoWatcher.db")
+os.environ["ARCHIVO_DIR"] = os.path.join(_DATOS, "archivo")
+os.environ["RECIENTES_CAPACIDAD"] = "8"
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
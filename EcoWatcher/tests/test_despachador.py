@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from inferencia.despachador import DespachadorInferencia
+
+
+class ModeloSuma:
+    """Modelo mínimo: la suma de cada fila."""
+
+    def predict(self, X):
+        return np.asarray(X).sum(axis=1)
+
+
+class ModeloTresFeatures(ModeloSuma):
+    n_features_in_ = 3
+
+
+def _despachador(modelo):
+    despachador = DespachadorInferencia(lambda: modelo, ventana_ms=200, max_filas=1000)
+    despachador.iniciar()
+    return despachador
+
+
+def test_lote_con_formas_mezcladas_no_mata_el_hilo():
+    despachador = _despachador(ModeloSuma())
+    try:
+        # Sin n_features_in_ no se valida al encolar: ambas caen en el mismo lote
+        a = despachador.enviar(np.ones((2, 3)))
+        b = despachador.enviar(np.ones((1, 4)))
+        for futuro in (a, b):
+            with pytest.raises(ValueError):
+                futuro.result(timeout=5)
+
+        assert despachador.activo
+        assert despachador.enviar(np.ones((1, 3))).result(timeout=5).tolist() == [3.0]
+    finally:
+        despachador.detener(timeout=5)
+
+
+def test_forma_invalida_se_rechaza_al_encolar():
+    despachador = _despachador(ModeloTresFeatures())
+    try:
+        with pytest.raises(ValueError):
+            despachador.enviar(np.ones((1, 4)))
+        with pytest.raises(ValueError):
+            despachador.predecir(np.ones((2, 2, 3)))
+        assert despachador.predecir(np.ones((2, 3)), timeout=5).tolist() == [3.0, 3.0]
+    finally:
+        despachador.detener(timeout=5)
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_hilo_muerto_se_reinicia():
+    despachador = _despachador(ModeloSuma())
+    ejecutar = despachador._ejecutar
+
+    def morir(pendientes):
+        raise SystemExit  # escapa del except Exception del bucle
+
+    despachador._ejecutar = morir
+    try:
+        despachador.enviar(np.ones((1, 3)))
+        despachador._hilo.join(timeout=5)
+        assert not despachador.activo
+
+        despachador._ejecutar = ejecutar
+        assert despachador.enviar(np.ones((1, 3))).result(timeout=5).tolist() == [3.0]
+        assert despachador.metricas()["reinicios_hilo"] == 1
+    finally:
+        despachador.detener(timeout=5)
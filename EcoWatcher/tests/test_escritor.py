@@ -0,0 +1,74 @@
+from sqlalchemy import func, select
+
+import database.escritor as modulo_escritor
+from config import FEATURE_ORDER
+from database.db import SessionLocal, init_db
+from database.modelodb import Prediccion
+from database.escritor import EscritorPredicciones
+
+
+def _contar():
+    db = SessionLocal()
+    try:
+        return db.scalar(select(func.count()).select_from(Prediccion))
+    finally:
+        db.close()
+
+
+def _registro():
+    return dict({f: 1.0 for f in FEATURE_ORDER}, ecoscore=50.0)
+
+
+def test_insert_que_falla_una_vez_se_reintenta(monkeypatch):
+    init_db()
+    original = modulo_escritor.insertar_predicciones
+    llamadas = []
+
+    def falla_una_vez(db, registros):
+        llamadas.append(len(registros))
+        if len(llamadas) == 1:
+            raise RuntimeError("falla transitoria")
+        return original(db, registros)
+
+    monkeypatch.setattr(modulo_escritor, "insertar_predicciones", falla_una_vez)
+    escritor = EscritorPredicciones(max_lote=10, intervalo_ms=20, reintentos=3, espera_ms=1)
+    guardadas = []
+    escritor.al_guardar(lambda lote, ids: guardadas.extend(ids))
+
+    antes = _contar()
+    escritor.iniciar()
+    try:
+        for _ in range(3):
+            escritor.encolar(_registro())
+        escritor.vaciar()
+    finally:
+        escritor.detener(timeout=5)
+
+    assert _contar() == antes + 3
+    assert len(guardadas) == 3
+    metricas = escritor.metricas()
+    assert metricas["reintentos"] == 1
+    assert metricas["descartadas"] == 0
+
+
+def test_lote_sin_exito_queda_en_descartadas(monkeypatch):
+    init_db()
+    original = modulo_escritor.insertar_predicciones
+
+    def siempre_falla(db, registros):
+        raise RuntimeError("sin disco")
+
+    monkeypatch.setattr(modulo_escritor, "insertar_predicciones", siempre_falla)
+    escritor = EscritorPredicciones(reintentos=2, espera_ms=1)
+    antes = _contar()
+    escritor.encolar(_registro())  # sin hilo: guardado síncrono
+
+    metricas = escritor.metricas()
+    assert metricas["descartadas"] == 1
+    assert metricas["errores"] == 2
+    assert "sin disco" in metricas["ultimo_error"]
+
+    monkeypatch.setattr(modulo_escritor, "insertar_predicciones", original)
+    assert escritor.reprocesar_descartadas() == 1
+    assert _contar() == antes + 1
+    assert escritor.metricas()["descartadas"] == 0
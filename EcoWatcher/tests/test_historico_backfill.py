@@ -0,0 +1,127 @@
+"""
+Una ingesta de lecturas viejas recibe ids mayores que las predicciones en
+vivo: /api/historico y /api/ultimo deben seguir el orden (timestamp, id),
+también a través del archivo.
+"""
+from datetime import timedelta
+
+import pandas as pd
+import pytest
+from flask import Flask
+from sqlalchemy import delete
+
+from config import FEATURE_ORDER
+from database.db import SessionLocal, init_db
+from database.modelodb import Prediccion
+from database.agregados import insertar_predicciones_df
+from database.archivo import archivar
+from database.exportar import bloques_filas
+from database.escritor import ahora_utc
+from database.recientes import recientes
+from routes.api import api
+
+
+def _insertar(timestamps):
+    df = pd.DataFrame({f: 1.0 for f in FEATURE_ORDER}, index=range(len(timestamps)))
+    df["ecoscore"] = 50.0
+    df["timestamp"] = pd.to_datetime(timestamps).floor("s")
+    db = SessionLocal()
+    try:
+        insertar_predicciones_df(db, df)
+        db.commit()
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="module")
+def cliente():
+    init_db()
+    # Tabla vacía (sin AUTOINCREMENT los ids vuelven a empezar en 1)
+    db = SessionLocal()
+    try:
+        db.execute(delete(Prediccion))
+        db.commit()
+    finally:
+        db.close()
+    ahora = ahora_utc().replace(microsecond=0)
+
+    # En vivo primero (ids 1..15), luego el backfill con ids más altos
+    _insertar([ahora - timedelta(minutes=15 - i) for i in range(15)])
+    recientes.sembrar()
+    avisos = []
+    recientes.al_agregar(avisos.append)
+
+    _insertar([ahora - timedelta(days=200, minutes=10 - i) for i in range(10)])  # va al archivo
+    _insertar([ahora - timedelta(days=10, minutes=10 - i) for i in range(10)])   # queda en SQLite
+    assert archivar(dias=90) == 10
+    recientes.sembrar()
+
+    app = Flask(__name__)
+    app.register_blueprint(api)
+    return app.test_client(), avisos
+
+
+def _paginar(c, parametro, cursor, campo):
+    paginas = []
+    while cursor is not None:
+        datos = c.get(f"/api/historico?limit=4&{parametro}={cursor}").get_json()
+        if not datos["historico"]:
+            break
+        paginas.append(datos["historico"])
+        cursor = datos[campo]
+    return paginas
+
+
+def test_paginas_hacia_atras(cliente):
+    c, _ = cliente
+    primera = c.get("/api/historico?limit=4").get_json()
+    filas = primera["historico"]
+    for pagina in _paginar(c, "before", primera["next_before"], "next_before"):
+        filas += pagina
+
+    claves = [(f["timestamp"], f["id"]) for f in filas]
+    assert len(claves) == 35
+    assert len({f["id"] for f in filas}) == 35
+    assert claves == sorted(claves, reverse=True)
+    assert filas[0]["id"] == 15
+
+
+def test_paginas_hacia_adelante(cliente):
+    c, _ = cliente
+    filas = []
+    for pagina in _paginar(c, "since", "2000-01-01T00:00:00_0", "newest"):
+        filas += reversed(pagina)
+
+    claves = [(f["timestamp"], f["id"]) for f in filas]
+    assert len(claves) == 35
+    assert len({f["id"] for f in filas}) == 35
+    assert claves == sorted(claves)
+    assert [f["id"] for f in filas[:10]] == list(range(16, 26))  # archivadas
+    assert [f["id"] for f in filas[-15:]] == list(range(1, 16))  # en vivo
+
+
+def test_ultimo_es_la_lectura_mas_reciente(cliente):
+    c, _ = cliente
+    assert c.get("/api/ultimo").get_json()["id"] == 15
+    assert c.get("/api/dashboard?n=5").get_json()["ultimo"]["id"] == 15
+
+
+def test_cursor_invalido(cliente):
+    c, _ = cliente
+    assert c.get("/api/historico?before=15").status_code == 400
+
+
+def test_exportar_intercala_archivo(cliente):
+    filas = [fila for bloque in bloques_filas(tam_bloque=4) for fila in bloque]
+    claves = [(fila[-1], fila[0]) for fila in filas]
+    assert len(claves) == 35
+    assert claves == sorted(claves)
+
+
+def test_resiembra_no_avisa_el_backfill(cliente):
+    _, avisos = cliente
+    assert avisos == []
+
+    _insertar([ahora_utc()])
+    recientes.sembrar()
+    assert [fila[0] for lote in avisos for fila, _ in lote] == [36]
@@ -0,0 +1,42 @@
+import numpy as np
+
+
+# ===== UMBRALES DE CATEGORÍA (ecoscore 0-500) =====
+UMBRALES = [
+    (450, "Excelente"),
+    (350, "Bueno"),
+    (200, "Moderado"),
+]
+CATEGORIA_MINIMA = "Crítico"
+
+
+def categoria_ecoscore(score):
+    """Categoría textual de un ecoscore."""
+    for umbral, nombre in UMBRALES:
+        if score >= umbral:
+            return nombre
+    return CATEGORIA_MINIMA
+
+
+def categorias_ecoscore(scores):
+    """Categorías de un arreglo de ecoscores en una sola operación."""
+    scores = np.asarray(scores, dtype=float)
+    condiciones = [scores >= umbral for umbral, _ in UMBRALES]
+    nombres = [nombre for _, nombre in UMBRALES]
+    return np.select(condiciones, nombres, default=CATEGORIA_MINIMA)
+
+
+# ===== TENDENCIA =====
+UMBRAL_TENDENCIA = 5.0  # puntos de ecoscore entre lecturas consecutivas
+
+
+def tendencia_ecoscore(actual, anterior):
+    """'mejora', 'empeora' o 'estable' frente a la lectura anterior (None = estable)."""
+    if anterior is None:
+        return "estable"
+    diferencia = actual - anterior
+    if diferencia > UMBRAL_TENDENCIA:
+        return "mejora"
+    if diferencia < -UMBRAL_TENDENCIA:
+        return "empeora"
+    return "estable"
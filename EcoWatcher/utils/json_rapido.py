@@ -0,0 +1,21 @@
+import json
+
+from flask import Response
+
+# orjson es opcional: si no está instalado se usa el módulo json estándar
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(obj):
+    """Serializar a bytes JSON (orjson si está disponible)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def respuesta_json(obj, status=200):
+    """Equivalente a `jsonify` para respuestas grandes, con el codificador rápido."""
+    return Response(dumps(obj), status=status, mimetype="application/json")
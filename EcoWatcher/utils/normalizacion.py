@@ -1,6 +1,7 @@
 import json
 from pathlib import Path
-from config import PARAMS_PATH
+import numpy as np
+from config import PARAMS_PATH, FEATURE_ORDER
 
 
 # ===== CARGAR PARÁMETROS DE NORMALIZACIÓN =====
@@ -8,6 +9,91 @@ with open(PARAMS_PATH, "r") as f:
     norm_params = json.load(f)
 
 
+def _or_nan(value):
+    return np.nan if value is None else value
+
+
+class Normalizador:
+    """
+    Normalizador compilado a partir de `parametros_normalizados.json`.
+
+    Los límites de cada columna se precomputan como arreglos (`vmin`, `scale`)
+    y una matriz N×F se normaliza en pocas operaciones vectorizadas, opcionalmente
+    sobre un buffer preasignado (`out`). Columnas sin parámetros o de rango
+    cero valen 0.5, igual que en `apply_minmax`.
+
+    Métodos:
+        minmax      (x - vmin) / (vmax - vmin)
+        percentile  (x - p_low) / (p_high - p_low), recortado a [0, 1]
+    """
+
+    def __init__(self, params, feature_order):
+        self.method = params.get("method", "minmax")
+        self.feature_order = list(feature_order)
+        columns = params.get("columns", {})
+
+        if self.method == "minmax":
+            claves, self.recortar = ("vmin", "vmax"), False
+        elif self.method == "percentile":
+            claves, self.recortar = ("p_low", "p_high"), True
+        else:
+            claves, self.recortar = None, False
+
+        if claves is None:
+            inferior = superior = np.full(len(self.feature_order), np.nan)
+        else:
+            inferior = np.array([_or_nan(columns.get(f, {}).get(claves[0])) for f in self.feature_order])
+            superior = np.array([_or_nan(columns.get(f, {}).get(claves[1])) for f in self.feature_order])
+
+        rango = superior - inferior
+        valido = np.isfinite(rango) & (rango != 0)
+
+        # Columnas inválidas: (x - 0) * 0 + 0.5 = 0.5
+        self.vmin = np.where(valido, inferior, 0.0)
+        self.scale = np.where(valido, 1.0 / np.where(valido, rango, 1.0), 0.0)
+        self.relleno = np.where(valido, 0.0, 0.5)
+        self._indice = {f: i for i, f in enumerate(self.feature_order)}
+
+    @classmethod
+    def desde_archivo(cls, path, feature_order):
+        with open(path, "r") as f:
+            return cls(json.load(f), feature_order)
+
+    def transform(self, X, out=None):
+        """
+        Normalizar una matriz N×F (o un vector de F) de valores crudos.
+
+        Si se pasa `out` (float64 con la forma de X) el resultado se escribe
+        ahí sin reservar memoria nueva.
+        """
+        X = np.asarray(X, dtype=float)
+        out = np.subtract(X, self.vmin, out=out)
+        np.multiply(out, self.scale, out=out)
+        np.add(out, self.relleno, out=out)
+        if self.recortar:
+            np.clip(out, 0.0, 1.0, out=out)
+        return out
+
+    def transform_dict(self, inputs, out=None):
+        """Normalizar un dict variable -> valor crudo como matriz 1×F."""
+        fila = np.array([[float(inputs[f]) for f in self.feature_order]])
+        return self.transform(fila, out=out)
+
+    def transform_valor(self, name, raw_value):
+        """Normalizar un único valor de la variable `name`."""
+        i = self._indice.get(name)
+        if i is None:
+            return 0.5
+        valor = (float(raw_value) - self.vmin[i]) * self.scale[i] + self.relleno[i]
+        if self.recortar:
+            valor = min(max(valor, 0.0), 1.0)
+        return float(valor)
+
+
+# ===== INSTANCIA COMPARTIDA =====
+normalizador = Normalizador(norm_params, FEATURE_ORDER)
+
+
 def apply_minmax(value, vmin, vmax):
     """Normalización MinMax."""
     if vmin is None or vmax is None or vmax == vmin:
@@ -17,11 +103,14 @@ def apply_minmax(value, vmin, vmax):
 
 def normalize_feature(name, raw_value):
     """Normalizar una feature según los parámetros guardados."""
-    method = norm_params.get("method", "minmax")
-    colparams = norm_params.get("columns", {}).get(name, {})
-    x = float(raw_value)
+    return normalizador.transform_valor(name, raw_value)
 
-    if method == "minmax":
-        return apply_minmax(x, colparams.get("vmin"), colparams.get("vmax"))
 
-    return 0.5  # fallback seguro
+def normalize_matrix(X, feature_order, out=None):
+    """
+    Normalizar una matriz N×F de valores crudos cuyas columnas siguen
+    `feature_order`, en una sola operación vectorizada.
+    """
+    if list(feature_order) == normalizador.feature_order:
+        return normalizador.transform(X, out=out)
+    return Normalizador(norm_params, feature_order).transform(X, out=out)
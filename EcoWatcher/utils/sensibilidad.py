@@ -0,0 +1,127 @@
+import math
+
+import numpy as np
+from config import FEATURE_ORDER
+
+
+# ===== PERTURBACIONES POR DEFECTO (% sobre el valor base) =====
+PASOS_DEFECTO = (5, 10, 20)
+MAX_PASOS = 20
+
+# Variables en porcentaje (no pueden superar 100)
+FEATURES_PORCENTAJE = {
+    "cobertura_arbolado_pct",
+    "porcentaje_reciclaje",
+    "porcentaje_transporte_limpio",
+}
+
+NOMBRES = {
+    "ha_verdes_km2": "las hectáreas verdes",
+    "cobertura_arbolado_pct": "la cobertura arbórea",
+    "pm25": "el PM2.5",
+    "pm10": "el PM10",
+    "residuos_no_gestionados": "los residuos no gestionados",
+    "porcentaje_reciclaje": "el reciclaje",
+    "porcentaje_transporte_limpio": "el transporte limpio",
+}
+
+
+def validar_pasos(pasos):
+    """
+    Pasos -> lista de floats. ValueError si está vacía, supera MAX_PASOS o
+    algún paso es 0, inf o NaN.
+    """
+    try:
+        pasos = [float(p) for p in pasos]
+    except (TypeError, ValueError):
+        raise ValueError("Se esperaba una lista de números separados por coma") from None
+    if not pasos:
+        raise ValueError("Se necesita al menos un paso")
+    if len(pasos) > MAX_PASOS:
+        raise ValueError(f"Máximo {MAX_PASOS} pasos")
+    if not all(math.isfinite(p) and p != 0 for p in pasos):
+        raise ValueError("Los pasos deben ser números finitos distintos de 0")
+    return pasos
+
+
+def cambios_simetricos(pasos):
+    """(5, 10) -> [-10, -5, 5, 10]: cambios porcentuales ordenados, sin el 0."""
+    positivos = sorted({abs(float(p)) for p in pasos if p})
+    return [-p for p in reversed(positivos)] + positivos
+
+
+def grilla_perturbaciones(inputs, cambios):
+    """
+    Matriz cruda (1 + F·C)×F: la fila 0 es la entrada base y luego, por cada
+    variable, una fila por cambio porcentual aplicado solo a esa variable.
+    """
+    base = np.array([float(inputs[f]) for f in FEATURE_ORDER])
+    factores = 1.0 + np.asarray(cambios, dtype=float) / 100.0
+    n_feat, n_cambios = len(FEATURE_ORDER), len(factores)
+
+    X = np.tile(base, (1 + n_feat * n_cambios, 1))
+    for j, feat in enumerate(FEATURE_ORDER):
+        filas = slice(1 + j * n_cambios, 1 + (j + 1) * n_cambios)
+        valores = np.maximum(base[j] * factores, 0.0)
+        if feat in FEATURES_PORCENTAJE:
+            valores = np.minimum(valores, 100.0)
+        X[filas, j] = valores
+    return X
+
+
+def analizar_sensibilidad(inputs, normalizar, predecir, pasos=PASOS_DEFECTO):
+    """
+    Evaluar la grilla de perturbaciones con una sola llamada a `predecir`
+    (recibe la matriz que devuelve `normalizar`) y devolver curvas y
+    recomendaciones ordenadas por ganancia predicha.
+    """
+    cambios = cambios_simetricos(validar_pasos(pasos))
+    if not all(math.isfinite(float(inputs[f])) for f in FEATURE_ORDER):
+        raise ValueError("Las variables deben ser números finitos")
+    X = grilla_perturbaciones(inputs, cambios)
+    scores = np.asarray(predecir(normalizar(X)), dtype=float)
+
+    base = float(scores[0])
+    n_cambios = len(cambios)
+    curvas = {}
+    recomendaciones = []
+
+    for j, feat in enumerate(FEATURE_ORDER):
+        filas = slice(1 + j * n_cambios, 1 + (j + 1) * n_cambios)
+        valores = X[filas, j]
+        ganancias = scores[filas] - base
+
+        curvas[feat] = [
+            {
+                "cambio_pct": cambio,
+                "valor": round(float(valor), 4),
+                "ecoscore": round(float(score), 3),
+                "ganancia": round(float(ganancia), 3),
+            }
+            for cambio, valor, score, ganancia in zip(cambios, valores, scores[filas], ganancias)
+        ]
+
+        mejor = int(np.argmax(ganancias))
+        if ganancias[mejor] > 0:
+            cambio = cambios[mejor]
+            accion = "Aumentar" if cambio > 0 else "Reducir"
+            recomendaciones.append({
+                "feature": feat,
+                "cambio_pct": cambio,
+                "valor_sugerido": round(float(valores[mejor]), 4),
+                "ganancia": round(float(ganancias[mejor]), 3),
+                "texto": (
+                    f"{accion} {NOMBRES.get(feat, feat)} un {abs(cambio):g}% "
+                    f"subiría el ecoscore en {ganancias[mejor]:.1f} puntos."
+                ),
+            })
+
+    recomendaciones.sort(key=lambda r: r["ganancia"], reverse=True)
+
+    return {
+        "ecoscore_base": round(base, 3),
+        "cambios_pct": cambios,
+        "evaluaciones": len(X),
+        "curvas": curvas,
+        "recomendaciones": recomendaciones,
+    }